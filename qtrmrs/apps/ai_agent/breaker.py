@@ -0,0 +1,119 @@
+"""
+Per-model circuit breakers.
+
+Each Gemini model name gets a breaker that counts consecutive quota, timeout
+and not-found failures. After AI_BREAKER_FAILURE_THRESHOLD of them the
+breaker opens and QuizGenerator skips that model, falling back to the next
+active AIModel by priority. Once AI_BREAKER_COOLDOWN seconds have passed a
+single half-open probe is let through: success closes the breaker, failure
+opens it for another cooldown.
+
+State is per-process, like the metrics module.
+"""
+import threading
+import time
+from typing import Optional
+
+from django.conf import settings
+
+from . import metrics
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Weight of the newest sample in the latency and error-rate moving averages
+EWMA_ALPHA = 0.3
+
+
+class CircuitBreaker:
+    """Failure and latency tracking for one model."""
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.latency_ewma = None
+        self.error_rate = 0.0  # Moving average of failures (0 = none recently)
+        self._lock = threading.Lock()
+
+    @property
+    def threshold(self) -> int:
+        return getattr(settings, 'AI_BREAKER_FAILURE_THRESHOLD', 3)
+
+    @property
+    def cooldown(self) -> float:
+        return getattr(settings, 'AI_BREAKER_COOLDOWN', 60)
+
+    def allow_request(self) -> bool:
+        """True if a call may be sent to this model right now."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if time.monotonic() - self.opened_at >= self.cooldown:
+                # One probe per cooldown window; others keep being skipped
+                self.state = HALF_OPEN
+                self.opened_at = time.monotonic()
+                metrics.incr('breaker.probe')
+                return True
+            return False
+
+    def record_success(self, latency: float) -> None:
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self.error_rate *= 1 - EWMA_ALPHA
+            if self.latency_ewma is None:
+                self.latency_ewma = latency
+            else:
+                self.latency_ewma = EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * self.latency_ewma
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self.error_rate = EWMA_ALPHA + (1 - EWMA_ALPHA) * self.error_rate
+            if self.state == HALF_OPEN or self.failures >= self.threshold:
+                if self.state != OPEN:
+                    metrics.incr('breaker.opened')
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                'state': self.state,
+                'failures': self.failures,
+                'latency_ewma': round(self.latency_ewma, 3) if self.latency_ewma is not None else None,
+                'error_rate': round(self.error_rate, 3),
+            }
+
+
+_breakers = {}
+_lock = threading.Lock()
+
+
+def get_breaker(model_name: str) -> CircuitBreaker:
+    """Return the process-wide breaker for a model."""
+    with _lock:
+        if model_name not in _breakers:
+            _breakers[model_name] = CircuitBreaker(model_name)
+        return _breakers[model_name]
+
+
+def peek_breaker(model_name: str) -> Optional[CircuitBreaker]:
+    """Return a model's breaker if it has one, without creating it."""
+    with _lock:
+        return _breakers.get(model_name)
+
+
+def snapshot() -> dict:
+    with _lock:
+        breakers = list(_breakers.values())
+    return {breaker.model_name: breaker.snapshot() for breaker in breakers}
+
+
+def reset() -> None:
+    """Forget all breaker state. Mostly useful in tests."""
+    with _lock:
+        _breakers.clear()
@@ -0,0 +1,214 @@
+"""
+Two-tier cache for generated quizzes.
+
+Tier 1 is a small in-process LRU so repeat requests in the same worker never
+leave memory. Tier 2 is a Django cache backend (``AI_CACHE_ALIAS``, a
+DatabaseCache by default) shared by all workers, with its own TTL and
+MAX_ENTRIES culling. A hit in either tier skips the Gemini round trip.
+"""
+import copy
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import caches
+
+from . import formats, metrics
+from .prompts import PROMPT_VERSION
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_topic(value: str) -> str:
+    """Lowercase, collapse whitespace and trim punctuation so near-identical topics share a key."""
+    value = re.sub(r'\s+', ' ', str(value or '')).strip().lower()
+    return value.strip('.,;:!?"\'')
+
+
+def make_cache_key(
+    kind: str,
+    model_name: str,
+    subject: str,
+    topic: str,
+    level: str,
+    num_questions: int,
+    include_code: bool = False,
+) -> str:
+    """
+    Build a stable cache key from the normalized request parameters, the
+    prompt version and the active quiz output format (AI_QUIZ_OUTPUT_FORMAT).
+    """
+    parts = [
+        kind,
+        model_name,
+        normalize_topic(subject),
+        normalize_topic(topic),
+        str(level).strip().lower(),
+        int(num_questions),
+        bool(include_code),
+        PROMPT_VERSION,
+        formats.version(),
+    ]
+    digest = hashlib.sha256(json.dumps(parts).encode('utf-8')).hexdigest()
+    return f"quizgen:{digest}"
+
+
+class GenerationCache:
+    """In-process LRU in front of a shared Django cache backend."""
+
+    def __init__(self, max_size: int = 256):
+        self.max_size = max_size
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return getattr(settings, 'AI_CACHE_ENABLED', True)
+
+    @property
+    def ttl(self) -> int:
+        return getattr(settings, 'AI_CACHE_TTL', 60 * 60 * 24)
+
+    @property
+    def backend(self):
+        """The shared Django cache backend, or None if it isn't configured."""
+        return self._backend()
+
+    def _backend(self):
+        alias = getattr(settings, 'AI_CACHE_ALIAS', 'ai_generation')
+        if alias not in settings.CACHES:
+            return None
+        return caches[alias]
+
+    def _memory_get(self, key: str) -> Optional[list]:
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._lru[key]
+                return None
+            self._lru.move_to_end(key)
+        metrics.incr('cache.hit.memory')
+        return copy.deepcopy(value)
+
+    def _backend_hit(self, key: str, value) -> Optional[list]:
+        if value is None:
+            metrics.incr('cache.miss')
+            return None
+        self._remember(key, value)
+        metrics.incr('cache.hit.backend')
+        return copy.deepcopy(value)
+
+    def get(self, key: str) -> Optional[list]:
+        """Return a copy of the cached questions, or None on a miss."""
+        if not self.enabled:
+            return None
+
+        value = self._memory_get(key)
+        if value is not None:
+            return value
+
+        backend = self._backend()
+        if backend is not None:
+            try:
+                value = backend.get(key)
+            except Exception as e:
+                logger.warning(f"Generation cache backend read failed: {e}")
+        return self._backend_hit(key, value)
+
+    async def aget(self, key: str) -> Optional[list]:
+        """Async version of get() for ASGI views."""
+        if not self.enabled:
+            return None
+
+        value = self._memory_get(key)
+        if value is not None:
+            return value
+
+        backend = self._backend()
+        if backend is not None:
+            try:
+                value = await backend.aget(key)
+            except Exception as e:
+                logger.warning(f"Generation cache backend read failed: {e}")
+        return self._backend_hit(key, value)
+
+    def set(self, key: str, questions: list) -> None:
+        """Store questions in both tiers."""
+        if not self.enabled or not questions:
+            return
+
+        self._remember(key, copy.deepcopy(questions))
+
+        backend = self._backend()
+        if backend is not None:
+            try:
+                backend.set(key, questions, timeout=self.ttl)
+            except Exception as e:
+                logger.warning(f"Generation cache backend write failed: {e}")
+
+    async def aset(self, key: str, questions: list) -> None:
+        """Async version of set() for ASGI views."""
+        if not self.enabled or not questions:
+            return
+
+        self._remember(key, copy.deepcopy(questions))
+
+        backend = self._backend()
+        if backend is not None:
+            try:
+                await backend.aset(key, questions, timeout=self.ttl)
+            except Exception as e:
+                logger.warning(f"Generation cache backend write failed: {e}")
+
+    def _remember(self, key: str, value: list) -> None:
+        with self._lock:
+            self._lru[key] = (time.monotonic() + self.ttl, value)
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_size:
+                self._lru.popitem(last=False)
+                metrics.incr('cache.evicted.memory')
+
+    def clear(self) -> None:
+        """Drop every entry from both tiers."""
+        with self._lock:
+            self._lru.clear()
+        backend = self._backend()
+        if backend is not None:
+            try:
+                backend.clear()
+            except Exception as e:
+                logger.warning(f"Generation cache backend clear failed: {e}")
+
+    def stats(self) -> dict:
+        hits = metrics.get('cache.hit.memory') + metrics.get('cache.hit.backend')
+        misses = metrics.get('cache.miss')
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / total, 3) if total else 0.0,
+            'memory_entries': len(self._lru),
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_generation_cache() -> GenerationCache:
+    """Return the process-wide generation cache."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = GenerationCache(max_size=getattr(settings, 'AI_CACHE_LRU_SIZE', 256))
+    return _cache
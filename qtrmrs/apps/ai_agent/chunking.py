@@ -0,0 +1,89 @@
+"""
+Parallel chunked generation for large quizzes.
+
+Output length dominates generation time, so one 20-question call takes
+roughly four times as long as a 5-question one. Above
+AI_CHUNK_MIN_QUESTIONS, QuizGenerator splits the request into up to
+AI_CHUNK_MAX_PARALLEL sub-requests of about AI_CHUNK_SIZE questions, run
+concurrently. Each gets a different focus area so the parts don't all
+ask the same things. The merged questions are de-duplicated and, if that
+leaves the quiz short, topped up with one more call that lists what the
+quiz already has.
+"""
+import math
+import re
+
+from django.conf import settings
+
+from .prompts import CHUNK_FOCUS_PROMPT, CHUNK_TOP_UP_PROMPT
+
+# Angles handed to the sub-requests in order; the nth chunk gets the nth
+FOCUS_AREAS = [
+    'core concepts and definitions',
+    'practical usage and common patterns',
+    'edge cases, pitfalls and common mistakes',
+    'best practices, performance and trade-offs',
+    'comparisons with related concepts and alternatives',
+    'debugging, errors and unexpected behaviour',
+]
+
+_WORD_RE = re.compile(r'\w+')
+
+
+def _enabled() -> bool:
+    return getattr(settings, 'AI_CHUNKED_GENERATION_ENABLED', True)
+
+
+def plan(num_questions: int) -> list[int]:
+    """
+    Question counts for the sub-requests of a quiz, e.g. 20 -> [5, 5, 5, 5].
+    A single-item list means "don't split".
+    """
+    if not _enabled() or num_questions < getattr(settings, 'AI_CHUNK_MIN_QUESTIONS', 10):
+        return [num_questions]
+    size = max(getattr(settings, 'AI_CHUNK_SIZE', 5), 1)
+    parts = min(math.ceil(num_questions / size), getattr(settings, 'AI_CHUNK_MAX_PARALLEL', 4), len(FOCUS_AREAS))
+    if parts < 2:
+        return [num_questions]
+    base, extra = divmod(num_questions, parts)
+    return [base + 1 if index < extra else base for index in range(parts)]
+
+
+def focus_hint(part: int, parts: int) -> str:
+    """Prompt suffix for sub-request `part` (0-based) of `parts`."""
+    return CHUNK_FOCUS_PROMPT.format(part=part + 1, parts=parts, focus=FOCUS_AREAS[part % len(FOCUS_AREAS)])
+
+
+def top_up_hint(questions: list[dict]) -> str:
+    """Prompt suffix asking for questions unlike the ones already collected."""
+    existing = '\n'.join(f"- {question.get('text', '')[:120]}" for question in questions)
+    return CHUNK_TOP_UP_PROMPT.format(existing=existing)
+
+
+def _words(question: dict) -> frozenset:
+    parts = [question.get('text', ''), question.get('code_snippet', ''), *question.get('options', [])]
+    return frozenset(_WORD_RE.findall(' '.join(map(str, parts)).casefold()))
+
+
+def _similarity(a: frozenset, b: frozenset) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def dedupe(questions: list[dict], threshold: float = None) -> list[dict]:
+    """
+    Drop questions that are near-identical to an earlier one: the same
+    words in their text, code and options (ignoring case, punctuation and
+    order) up to a Jaccard similarity of AI_CHUNK_DEDUPE_THRESHOLD.
+    """
+    if threshold is None:
+        threshold = getattr(settings, 'AI_CHUNK_DEDUPE_THRESHOLD', 0.9)
+    kept, seen = [], []
+    for question in questions:
+        words = _words(question)
+        if any(_similarity(words, other) >= threshold for other in seen):
+            continue
+        kept.append(question)
+        seen.append(words)
+    return kept
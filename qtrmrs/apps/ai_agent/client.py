@@ -1,14 +1,194 @@
+"""
+Process-wide Gemini client registry.
+
+`genai.configure` runs once per process (again only if the API key changes)
+and GenerativeModel instances are cached per model name, so every
+QuizGenerator in a worker shares the same SDK client and its open
+connections instead of paying setup and TLS handshakes per request.
+The active AIModel names (the fallback chain) are cached alongside, so
+model calls, including those on explanation and chunk pool threads, don't
+query the database. Both caches are dropped whenever an AIModel row is
+saved or deleted (see apps/ai_agent/models.py): in the process that made
+the change at once, and in every other worker through a version stamp in
+the shared AI_CACHE_ALIAS cache, which each worker re-reads at most every
+AI_MODEL_REGISTRY_CHECK_INTERVAL seconds on any lookup (get_generative_model
+or active_model_names). Without that cache configured, other workers only
+notice after a restart.
+
+AI_BACKEND picks what the models are: 'gemini' (the real SDK), 'fake' (the
+offline FakeGenerativeModel in fake_backend.py, for load tests and local
+benchmarks) or a dotted path to any callable(model_name) returning an object
+with generate_content / generate_content_async.
+"""
+import asyncio
 import logging
+import threading
+import time
+import uuid
 import google.generativeai as genai
 from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
 
 logger = logging.getLogger(__name__)
 
+_lock = threading.Lock()
+_configured_key = None
+_models = {}
+_active_model_names = None
+_models_version = None
+_version_checked_at = None
+
+MODELS_VERSION_KEY = 'ai-model-registry:version'
+
+BACKENDS = {
+    'fake': 'apps.ai_agent.fake_backend.FakeGenerativeModel',
+}
+
+
 def get_gemini_client():
+    """Return the configured `genai` module, configuring it on first use."""
+    global _configured_key
     api_key = settings.GEMINI_API_KEY
     if not api_key:
         logger.error("GEMINI_API_KEY is not configured - AI features will not work")
         raise ValueError("GEMINI_API_KEY is not set in environment variables.")
-    
-    genai.configure(api_key=api_key)
-    return genai
\ No newline at end of file
+
+    if _configured_key != api_key:
+        with _lock:
+            if _configured_key != api_key:
+                genai.configure(api_key=api_key)
+                # Models built against the old configuration hold stale clients
+                _models.clear()
+                _configured_key = api_key
+    return genai
+
+
+def _create_model(backend: str, model_name: str):
+    if backend == 'gemini':
+        return get_gemini_client().GenerativeModel(model_name)
+    return import_string(BACKENDS.get(backend, backend))(model_name)
+
+
+def get_generative_model(model_name: str):
+    """Return the shared model for model_name on the AI_BACKEND, creating it once."""
+    check_models_version()
+    backend = getattr(settings, 'AI_BACKEND', 'gemini')
+    if backend == 'gemini':
+        # Re-checks the API key, rebuilding the models if it changed
+        get_gemini_client()
+    key = (backend, model_name)
+    model = _models.get(key)
+    if model is None:
+        with _lock:
+            model = _models.get(key)
+            if model is None:
+                model = _create_model(backend, model_name)
+                _models[key] = model
+                logger.info(f"Created {backend} model for {model_name}")
+    return model
+
+
+def _active_models_query():
+    from apps.quizzes.models import AIModel
+    return AIModel.objects.filter(is_active=True).order_by('priority', 'id').values_list('model_name', flat=True)
+
+
+def _registry_cache():
+    """The shared cache holding the version stamp, or None if it isn't configured."""
+    alias = getattr(settings, 'AI_CACHE_ALIAS', 'ai_generation')
+    return caches[alias] if alias in settings.CACHES else None
+
+
+def _version_check_due() -> bool:
+    global _version_checked_at
+    now = time.monotonic()
+    interval = getattr(settings, 'AI_MODEL_REGISTRY_CHECK_INTERVAL', 10)
+    if _registry_cache() is None or (_version_checked_at is not None and now - _version_checked_at < interval):
+        return False
+    _version_checked_at = now
+    return True
+
+
+def _apply_version(version) -> None:
+    """Drop this process's caches if another one changed the model catalogue."""
+    global _models_version, _active_model_names
+    if version != _models_version:
+        with _lock:
+            _models.clear()
+            _active_model_names = None
+            _models_version = version
+
+
+def check_models_version() -> None:
+    """
+    Drop this process's models if the shared version stamp changed (read
+    at most every AI_MODEL_REGISTRY_CHECK_INTERVAL seconds). A no-op on a
+    running event loop, which mustn't block on the cache: async code awaits
+    acheck_models_version instead.
+    """
+    try:
+        asyncio.get_running_loop()
+        return
+    except RuntimeError:
+        pass
+    if _version_check_due():
+        try:
+            _apply_version(_registry_cache().get(MODELS_VERSION_KEY))
+        except Exception as e:
+            logger.warning(f"Model registry version read failed: {e}")
+
+
+async def acheck_models_version() -> None:
+    """Async version of check_models_version."""
+    if _version_check_due():
+        try:
+            _apply_version(await _registry_cache().aget(MODELS_VERSION_KEY))
+        except Exception as e:
+            logger.warning(f"Model registry version read failed: {e}")
+
+
+def active_model_names() -> list[str]:
+    """Active AIModel names in priority order, read from the database once."""
+    global _active_model_names
+    check_models_version()
+    names = _active_model_names
+    if names is None:
+        names = _active_model_names = list(_active_models_query())
+    return names
+
+
+async def aactive_model_names() -> list[str]:
+    """Async version of active_model_names."""
+    global _active_model_names
+    await acheck_models_version()
+    names = _active_model_names
+    if names is None:
+        names = _active_model_names = [name async for name in _active_models_query()]
+    return names
+
+
+def invalidate_models() -> None:
+    """
+    Forget this process's cached GenerativeModels and model names; they
+    are rebuilt, and the shared version stamp re-read, on next use.
+    """
+    global _active_model_names, _version_checked_at
+    with _lock:
+        _models.clear()
+        _active_model_names = None
+        _version_checked_at = None
+
+
+def publish_models_change() -> None:
+    """Invalidate the model registry here and, via the version stamp, in every other process."""
+    global _models_version
+    cache = _registry_cache()
+    if cache is not None:
+        version = uuid.uuid4().hex
+        try:
+            cache.set(MODELS_VERSION_KEY, version, None)
+            _models_version = version
+        except Exception as e:
+            logger.warning(f"Model registry version write failed: {e}")
+    invalidate_models()
@@ -0,0 +1,283 @@
+"""
+Offline stand-in for Gemini, selected with AI_BACKEND='fake'.
+
+FakeGenerativeModel has the parts of the GenerativeModel interface that
+QuizGenerator uses (generate_content with stream=, generate_content_async,
+usage_metadata). It recognises which prompt it was sent and answers with
+schema-valid JSON: quizzes, intents, chat quizzes and explanations. The
+content is derived from a hash of the prompt, so the same request always
+gets the same answer and load tests stay repeatable. Calls that pass a
+response_schema get quizzes in the compact format (see formats.py), with
+token usage scaled down to match.
+
+Timing and failures are modelled from settings:
+
+    AI_FAKE_LATENCY            median seconds to the first token (lognormal)
+    AI_FAKE_LATENCY_SIGMA      spread of that lognormal
+    AI_FAKE_TOKENS_PER_SECOND  output speed once generating (0 = instant)
+    AI_FAKE_TOKENS_PER_QUESTION  response tokens reported per question
+    AI_FAKE_ERROR_RATE         share of calls that fail (0-1)
+    AI_FAKE_ERROR_TYPES        which failures: 'quota', 'model_not_found', 'timeout'
+    AI_FAKE_SEED               seed for latency/failure draws (None = random)
+"""
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from django.conf import settings
+
+from . import formats
+from .intent import parse_message
+
+# Messages shaped like the SDK's, so classify_error sorts them the same way
+ERROR_MESSAGES = {
+    'quota': "429 Resource has been exhausted (e.g. check quota).",
+    'model_not_found': "404 models/{model} is not found for API version v1beta.",
+    'timeout': "504 Deadline Exceeded",
+}
+
+STREAM_CHUNKS = 8
+
+_rng = None
+_rng_lock = threading.Lock()
+
+
+def _draw(method: str, *args):
+    """Call a method on the shared, optionally seeded, Random."""
+    global _rng
+    with _rng_lock:
+        if _rng is None:
+            _rng = random.Random(getattr(settings, 'AI_FAKE_SEED', None))
+        return getattr(_rng, method)(*args)
+
+
+def reset() -> None:
+    """Re-seed the latency/failure draws. Mostly useful in tests."""
+    global _rng
+    with _rng_lock:
+        _rng = None
+
+
+@dataclass
+class FakeUsage:
+    prompt_token_count: int
+    candidates_token_count: int
+
+    @property
+    def total_token_count(self) -> int:
+        return self.prompt_token_count + self.candidates_token_count
+
+
+class FakeResponse:
+    def __init__(self, text: str, usage: FakeUsage):
+        self.text = text
+        self.usage_metadata = usage
+
+
+class FakeChunk:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeStream:
+    """Streamed response: chunks of the text, paced like real output."""
+
+    def __init__(self, text: str, usage: FakeUsage, delay: float):
+        self._text = text
+        self._delay = delay
+        self.usage_metadata = usage
+
+    def __iter__(self):
+        size = math.ceil(len(self._text) / STREAM_CHUNKS) or 1
+        for start in range(0, len(self._text), size):
+            time.sleep(self._delay)
+            yield FakeChunk(self._text[start:start + size])
+
+
+@dataclass
+class _Plan:
+    """What one fake call will return and how long it takes."""
+    text: str
+    usage: FakeUsage
+    first_token: float
+    generation: float
+    error: Optional[str]
+
+    def timed_out(self, timeout: Optional[float]) -> bool:
+        return timeout is not None and self.first_token + self.generation > timeout
+
+
+# ==========================================
+# CANNED ANSWERS
+# ==========================================
+
+def _seed(*parts) -> int:
+    return int(hashlib.sha256('\x1f'.join(map(str, parts)).encode('utf-8')).hexdigest()[:12], 16)
+
+
+def _field(prompt: str, pattern: str, default: str = '') -> str:
+    match = re.search(pattern, prompt)
+    return match.group(1).strip() if match else default
+
+
+def _count(prompt: str) -> int:
+    return int(_field(prompt, r'Generate exactly (\d+) questions', '5'))
+
+
+def _questions(prompt: str, subject: str, topic: str, count: int, with_code: bool = False) -> list:
+    rng = random.Random(_seed(prompt))
+    # Chunked sub-requests each get a focus area; keep their questions apart
+    focus = _field(prompt, r'Focus area: (.*)')
+    about = f"{subject}, {focus}" if focus else subject
+    questions = []
+    for number in range(1, count + 1):
+        options = [f"{topic}: statement {letter}{number}" for letter in 'ABCD']
+        correct = options[rng.randrange(len(options))]
+        question = {
+            'text': f"Question {number} on {topic} ({about}): which statement is correct?",
+            'options': options,
+            'correct_answer': correct,
+            'explanation': f"'{correct}' is the accurate statement about {topic}.",
+        }
+        if with_code:
+            question['code_snippet'] = f"# {topic}\nresult = {rng.randint(1, 99)}\nprint(result)"
+        questions.append(question)
+    return questions
+
+
+def _intent(prompt: str) -> dict:
+    message = _field(prompt, r'(?:request|message): "(.*)"')
+    parsed = parse_message(message)
+    return {
+        'subject': (parsed and parsed.subject) or 'General Knowledge',
+        'topic': (parsed and parsed.topic) or 'Trivia',
+        'level': (parsed and parsed.level) or 'Intermediate',
+        'count': (parsed and parsed.count) or 5,
+    }
+
+
+def _answer(prompt: str) -> tuple[str, Optional[int]]:
+    """Returns (response text, question count) for a prompt."""
+    if '"explanations"' in prompt:
+        items = json.loads(_field(prompt, r'(?s)correct answer:\n(.*)\n\nTask:', '[]'))
+        return json.dumps({'explanations': [
+            {'id': item['id'], 'explanation': f"The answer is '{item['correct_answer']}', not '{item['user_answer']}'."}
+            for item in items
+        ]}), None
+
+    if 'answered a quiz question incorrectly' in prompt:
+        correct = _field(prompt, r'Correct Answer: "(.*)"')
+        return f"The correct answer is '{correct}'. Review this concept and you'll get it next time.", None
+
+    if 'A user asked for a quiz' in prompt:
+        intent = _intent(prompt)
+        count = _count(prompt)
+        questions = _questions(prompt, intent['subject'], intent['topic'], count)
+        return json.dumps({
+            'subject': intent['subject'], 'topic': intent['topic'], 'level': intent['level'], 'questions': questions,
+        }), count
+
+    if 'generate a coding quiz' in prompt:
+        intent = _intent(prompt)
+        return json.dumps({
+            'language': intent['subject'], 'topic': intent['topic'], 'level': intent['level'], 'count': intent['count'],
+        }), None
+
+    if 'quiz on ANY topic' in prompt:
+        return json.dumps(_intent(prompt)), None
+
+    count = _count(prompt)
+    if 'Subject area:' in prompt:
+        subject = _field(prompt, r'Subject area: (.*)', 'General')
+        topic = _field(prompt, r'quiz about: (.*)', 'Trivia')
+        questions = _questions(prompt, subject, topic, count)
+    else:
+        subject = _field(prompt, r'programmer in (.*)\.', 'Programming')
+        topic = _field(prompt, r'The specific topic is: (.*)\.', 'Basics')
+        questions = _questions(prompt, subject, topic, count, with_code='MUST include' in prompt)
+    return json.dumps({'questions': questions}), count
+
+
+def _compact(text: str) -> str:
+    """A verbose quiz answer rewritten in the compact format."""
+    data = json.loads(text)
+    items = [formats.compact_question(question) for question in data['questions']]
+    compact = {'q': [item for item in items if item is not None]}
+    if 'subject' in data:
+        compact = {'s': data['subject'], 'p': data['topic'], 'l': data['level'], **compact}
+    return json.dumps(compact, separators=(',', ':'))
+
+
+def _plan(model_name: str, prompt, generation_config=None) -> _Plan:
+    prompt = str(prompt)
+    error_types = [t for t in getattr(settings, 'AI_FAKE_ERROR_TYPES', ERROR_MESSAGES) if t in ERROR_MESSAGES]
+    error = None
+    if error_types and _draw('random') < getattr(settings, 'AI_FAKE_ERROR_RATE', 0.0):
+        error = ERROR_MESSAGES[_draw('choice', error_types)].format(model=model_name)
+
+    text, question_count = _answer(prompt)
+    if question_count:
+        response_tokens = question_count * getattr(settings, 'AI_FAKE_TOKENS_PER_QUESTION', 150)
+        if 'response_schema' in (generation_config or {}):
+            compact = _compact(text)
+            response_tokens = max(response_tokens * len(compact) // len(text), 1)
+            text = compact
+    else:
+        response_tokens = max(len(text) // 4, 1)
+
+    median = getattr(settings, 'AI_FAKE_LATENCY', 0.8)
+    first_token = median * math.exp(_draw('gauss', 0, getattr(settings, 'AI_FAKE_LATENCY_SIGMA', 0.5))) if median else 0.0
+    tokens_per_second = getattr(settings, 'AI_FAKE_TOKENS_PER_SECOND', 200)
+    generation = response_tokens / tokens_per_second if tokens_per_second else 0.0
+
+    usage = FakeUsage(prompt_token_count=max(len(prompt) // 4, 1), candidates_token_count=response_tokens)
+    return _Plan(text, usage, first_token, generation, error)
+
+
+def _timeout(request_options) -> Optional[float]:
+    return (request_options or {}).get('timeout')
+
+
+class FakeGenerativeModel:
+    """Drop-in for genai.GenerativeModel that never touches the network."""
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+
+    def generate_content(self, prompt, generation_config=None, stream=False, request_options=None):
+        plan = _plan(self.model_name, prompt, generation_config)
+        timeout = _timeout(request_options)
+
+        if plan.error:
+            time.sleep(plan.first_token)
+            raise Exception(plan.error)
+        if plan.timed_out(timeout):
+            time.sleep(timeout)
+            raise Exception(ERROR_MESSAGES['timeout'])
+
+        time.sleep(plan.first_token)
+        if stream:
+            return FakeStream(plan.text, plan.usage, plan.generation / STREAM_CHUNKS)
+        time.sleep(plan.generation)
+        return FakeResponse(plan.text, plan.usage)
+
+    async def generate_content_async(self, prompt, generation_config=None, request_options=None):
+        plan = _plan(self.model_name, prompt, generation_config)
+        timeout = _timeout(request_options)
+
+        if plan.error:
+            await asyncio.sleep(plan.first_token)
+            raise Exception(plan.error)
+        if plan.timed_out(timeout):
+            await asyncio.sleep(timeout)
+            raise Exception(ERROR_MESSAGES['timeout'])
+
+        await asyncio.sleep(plan.first_token + plan.generation)
+        return FakeResponse(plan.text, plan.usage)
@@ -0,0 +1,145 @@
+"""
+Quiz output formats.
+
+Output tokens dominate generation latency, so the 'compact' format asks for
+as few as possible: one-letter keys, the correct option as an index instead
+of repeating its text, and nothing the caller already knows. The SDK's
+response_schema enforces the shape, so the prompt needs no JSON example:
+
+    {"q": [{"t": text, "c": code, "o": [4 options], "a": correct index, "e": explanation}]}
+
+The original 'verbose' format (full key names, correct_answer repeated as
+option text) is kept for comparison. AI_QUIZ_OUTPUT_FORMAT picks one and
+every call is logged with its version, so telemetry.format_stats() can
+compare output tokens and latency between them. Either way parse_questions
+returns the question dicts the views have always used.
+"""
+import logging
+from typing import Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+VERBOSE = 'verbose'
+COMPACT = 'compact'
+
+# Bump a version when its prompt or schema changes
+VERSIONS = {
+    VERBOSE: 'verbose-1',
+    COMPACT: 'compact-1',
+}
+
+_QUESTION_SCHEMA = {
+    'type': 'OBJECT',
+    'properties': {
+        't': {'type': 'STRING'},
+        'c': {'type': 'STRING'},
+        'o': {'type': 'ARRAY', 'items': {'type': 'STRING'}},
+        'a': {'type': 'INTEGER'},
+        'e': {'type': 'STRING'},
+    },
+    'required': ['t', 'o', 'a', 'e'],
+}
+
+QUIZ_SCHEMA = {
+    'type': 'OBJECT',
+    'properties': {'q': {'type': 'ARRAY', 'items': _QUESTION_SCHEMA}},
+    'required': ['q'],
+}
+
+# Chat quizzes also return the subject (s), topic (p) and level (l) they chose
+CHAT_QUIZ_SCHEMA = {
+    'type': 'OBJECT',
+    'properties': {
+        's': {'type': 'STRING'},
+        'p': {'type': 'STRING'},
+        'l': {'type': 'STRING'},
+        'q': {'type': 'ARRAY', 'items': _QUESTION_SCHEMA},
+    },
+    'required': ['s', 'p', 'l', 'q'],
+}
+
+
+def active() -> str:
+    output_format = getattr(settings, 'AI_QUIZ_OUTPUT_FORMAT', COMPACT)
+    return output_format if output_format in VERSIONS else COMPACT
+
+
+def version(output_format: Optional[str] = None) -> str:
+    return VERSIONS[output_format or active()]
+
+
+def generation_config(output_format: str, schema: dict = QUIZ_SCHEMA) -> dict:
+    config = {"response_mime_type": "application/json"}
+    if output_format == COMPACT:
+        config["response_schema"] = schema
+    return config
+
+
+def expand_question(item: dict) -> Optional[dict]:
+    """
+    Compact question -> the usual question dict. Verbose questions pass
+    through unchanged. Returns None for a compact question whose answer
+    index doesn't point at an option.
+    """
+    if 't' not in item:
+        return item
+    options = [str(option) for option in item.get('o', [])]
+    index = item.get('a')
+    if not isinstance(index, int) or not 0 <= index < len(options):
+        logger.warning(f"Dropping compact question with answer index {index!r} for {len(options)} options")
+        return None
+    return {
+        'text': item['t'],
+        'code_snippet': item.get('c', ''),
+        'options': options,
+        'correct_answer': options[index],
+        'explanation': item.get('e', ''),
+    }
+
+
+def compact_question(question: dict) -> Optional[dict]:
+    """
+    The usual question dict -> compact form (the inverse of expand_question).
+    Returns None if correct_answer isn't one of the options: there is no
+    index to give it.
+    """
+    options = [str(option) for option in question.get('options', [])]
+    correct = str(question.get('correct_answer', ''))
+    if correct not in options:
+        logger.warning(f"Dropping question whose answer {correct!r} isn't among its options")
+        return None
+    item = {
+        't': question.get('text', ''),
+        'o': options,
+        'a': options.index(correct),
+        'e': question.get('explanation', ''),
+    }
+    if question.get('code_snippet'):
+        item['c'] = question['code_snippet']
+    return item
+
+
+def parse_questions(data) -> list[dict]:
+    """Questions from a decoded quiz response in either format."""
+    if isinstance(data, dict):
+        items = data.get('q', data.get('questions', []))
+    else:
+        items = data
+    questions = []
+    for item in items or []:
+        if isinstance(item, dict):
+            question = expand_question(item)
+            if question is not None:
+                questions.append(question)
+    return questions
+
+
+def parse_chat_params(data: dict) -> dict:
+    """subject/topic/level from a decoded chat quiz response in either format."""
+    return {
+        'subject': data.get('s', data.get('subject')),
+        'topic': data.get('p', data.get('topic')),
+        'level': data.get('l', data.get('level')),
+    }
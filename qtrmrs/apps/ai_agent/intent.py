@@ -0,0 +1,190 @@
+"""
+Rule-based intent parsing for chat messages.
+
+Most requests look like "10 expert questions on ancient rome" or "python
+decorators, beginner". Difficulty keywords, question counts and known
+subjects can be read off such messages without a Gemini call. parse_message
+returns the parameters with a confidence score; QuizGenerator only falls back
+to the LLM intent prompts when the score is below AI_INTENT_CONFIDENCE_THRESHOLD.
+
+A wrong parse is worse than a Gemini call, so the parser gives up (returns
+None) on anything it can't read literally: qualifiers such as "not too
+easy" or "but without", and topics with a known subject in the middle
+("the history of java island"). The count is only taken from a number
+right before "questions" (only difficulty or subject words may come
+between), and nothing else is ever removed from the topic.
+"""
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+from django.conf import settings
+
+from . import metrics
+
+LEVEL_KEYWORDS = {
+    'beginner': 'Beginner', 'beginners': 'Beginner', 'easy': 'Beginner', 'basic': 'Beginner',
+    'basics': 'Beginner', 'simple': 'Beginner', 'intro': 'Beginner', 'novice': 'Beginner',
+    'intermediate': 'Intermediate', 'medium': 'Intermediate', 'moderate': 'Intermediate',
+    'expert': 'Expert', 'experts': 'Expert', 'advanced': 'Expert', 'hard': 'Expert',
+    'difficult': 'Expert', 'tricky': 'Expert',
+}
+
+NUMBER_WORDS = {
+    'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5, 'six': 6, 'seven': 7,
+    'eight': 8, 'nine': 9, 'ten': 10, 'twelve': 12, 'fifteen': 15, 'twenty': 20,
+}
+
+# Languages from the languages page (core/languages.html) plus common aliases.
+# Bare "go" is left out on purpose; it is too common an English word.
+LANGUAGE_ALIASES = {
+    'python': 'Python', 'javascript': 'JavaScript', 'js': 'JavaScript',
+    'react': 'React', 'django': 'Django', 'sql': 'SQL', 'databases': 'SQL',
+    'database': 'SQL', 'golang': 'Go', 'rust': 'Rust', 'typescript': 'TypeScript',
+    'ts': 'TypeScript', 'c++': 'C++', 'cpp': 'C++', 'css': 'CSS', 'html': 'HTML',
+    'java': 'Java',
+}
+
+GENERAL_SUBJECTS = [
+    'History', 'Geography', 'Science', 'Physics', 'Chemistry', 'Biology', 'Math',
+    'Mathematics', 'Literature', 'Movies', 'Music', 'Sports', 'Art', 'Economics',
+]
+
+# Words that carry no topic information in a quiz request
+FILLER_WORDS = {
+    'a', 'an', 'the', 'me', 'my', 'i', 'some', 'please', 'give', 'make', 'generate',
+    'create', 'want', 'need', 'quiz', 'quizzes', 'test', 'question', 'questions',
+    'q', 'qs', 'mcq', 'mcqs', 'on', 'about', 'covering', 'regarding', 'of', 'for',
+    'with', 'level', 'difficulty', 'can', 'you', 'could', 'would', 'like', 'and',
+}
+
+# Negations and hedges change what the user wants in ways the parser can't read
+QUALIFIER_WORDS = {'not', 'too', 'but', 'without', 'except', 'no', "don't", 'avoid'}
+
+MAX_TOPIC_WORDS = 6
+
+_COUNT_TOKEN = r'\b(\d{1,2}|' + '|'.join(NUMBER_WORDS) + r')'
+# "10 questions", "5 hard python questions": the number before "questions",
+# with at most two words between that _parse_count checks are level/subject words
+_COUNT_RE = re.compile(_COUNT_TOKEN + r'((?:\s+\S+){0,2}?)\s+(?:questions?|qs?|mcqs?)\b')
+_TOPIC_MARKER_RE = re.compile(r'\b(?:on|about|covering|regarding)\s+(.+)$')
+_TOKEN_RE = re.compile(r'[a-z0-9][a-z0-9+#.\'-]*')
+
+
+@dataclass
+class ParsedIntent:
+    subject: Optional[str]
+    topic: Optional[str]
+    level: Optional[str]
+    count: Optional[int]
+    confidence: float
+
+
+@lru_cache(maxsize=1)
+def known_subjects() -> dict:
+    """Lowercase alias -> canonical subject, seeded from the demo topics and languages page."""
+    from apps.quizzes.pool import DEMO_TOPICS
+
+    subjects = {name.lower(): name for name in GENERAL_SUBJECTS}
+    subjects.update({language.lower(): language for language, _ in DEMO_TOPICS})
+    subjects.update(LANGUAGE_ALIASES)
+    return subjects
+
+
+def _parse_count(text: str) -> tuple[Optional[int], str]:
+    """Return (count, text with the count removed)."""
+    subjects = known_subjects()
+    match = _COUNT_RE.search(text)
+    # Candidates can overlap ("2 please, 3 questions"), so step one character at a time
+    while match and not all(word in LEVEL_KEYWORDS or word in subjects for word in match.group(2).split()):
+        match = _COUNT_RE.search(text, match.start() + 1)
+    if not match:
+        return None, text
+    token = match.group(1)
+    count = int(token) if token.isdigit() else NUMBER_WORDS[token]
+    text = text[:match.start(1)] + text[match.end(1):]
+    return min(max(count, 1), 20), text
+
+
+def _clean_topic(tokens: list[str], subject_aliases: set) -> str:
+    words = [
+        token for token in tokens
+        if token not in FILLER_WORDS and token not in LEVEL_KEYWORDS and token not in subject_aliases
+    ]
+    return ' '.join(words)
+
+
+def _alias_inside_topic(topic_tokens: list[str], subjects: dict) -> bool:
+    """
+    True if a known subject is part of the topic rather than its first
+    word: "python decorators" is fine, "history of java island" is not.
+    """
+    words = [token for token in topic_tokens if token not in FILLER_WORDS and token not in LEVEL_KEYWORDS]
+    return any(word in subjects for word in words[1:])
+
+
+def parse_message(message: str) -> Optional[ParsedIntent]:
+    """
+    Extract subject/topic/level/count from a chat message, with a 0-1
+    confidence. None if the message is one the rules would misread.
+    """
+    text = re.sub(r'\s+', ' ', str(message or '')).strip().lower()
+    count, text = _parse_count(text)
+    tokens = [token.strip('.,;:!?\'"') for token in _TOKEN_RE.findall(text)]
+    if QUALIFIER_WORDS.intersection(tokens):
+        return None
+
+    level = next((LEVEL_KEYWORDS[token] for token in tokens if token in LEVEL_KEYWORDS), None)
+
+    subjects = known_subjects()
+    subject_aliases = {token for token in tokens if token in subjects}
+    first_alias = next((token for token in tokens if token in subjects), None)
+    subject = subjects[first_alias] if first_alias else None
+
+    marker = _TOPIC_MARKER_RE.search(text)
+    topic_tokens = [token.strip('.,;:!?\'"') for token in _TOKEN_RE.findall(marker.group(1))] if marker else tokens
+    if _alias_inside_topic(topic_tokens, subjects):
+        return None
+    topic = _clean_topic(topic_tokens, subject_aliases)
+    if not topic and subject:
+        topic = subject
+    if topic and len(topic.split()) > MAX_TOPIC_WORDS:
+        topic = None
+    if topic and topic.islower():
+        topic = topic.title()
+
+    confidence = 0.0
+    if topic:
+        confidence += 0.4
+    if subject:
+        confidence += 0.3
+    if level:
+        confidence += 0.15
+    if count:
+        confidence += 0.15
+    return ParsedIntent(subject, topic or None, level, count, round(confidence, 2))
+
+
+def confident_intent(message: str) -> Optional[ParsedIntent]:
+    """
+    Return the local parse if it clears AI_INTENT_CONFIDENCE_THRESHOLD,
+    else None (the caller should ask the LLM). Counts hits and misses.
+    """
+    parsed = parse_message(message)
+    if parsed and parsed.topic and parsed.confidence >= getattr(settings, 'AI_INTENT_CONFIDENCE_THRESHOLD', 0.6):
+        metrics.incr('intent.local_hit')
+        return parsed
+    metrics.incr('intent.local_miss')
+    return None
+
+
+def stats() -> dict:
+    hits = metrics.get('intent.local_hit')
+    misses = metrics.get('intent.local_miss')
+    total = hits + misses
+    return {
+        'local_hits': hits,
+        'llm_fallbacks': misses,
+        'hit_rate': round(hits / total, 3) if total else 0.0,
+    }
@@ -0,0 +1,74 @@
+"""
+Lightweight in-process metrics for the AI service layer.
+
+Counters and timings live in memory and are per-process, so they reset on
+restart and each gunicorn worker keeps its own totals. They are meant for
+quick health checks (see the staff-only ``ai_metrics`` view), not long-term
+reporting.
+"""
+import threading
+from collections import defaultdict, deque
+
+# Number of recent samples kept per timing for percentile estimates
+MAX_SAMPLES = 500
+
+_lock = threading.Lock()
+_counters = defaultdict(int)
+_timings = defaultdict(lambda: deque(maxlen=MAX_SAMPLES))
+
+
+def incr(name: str, amount: int = 1) -> None:
+    """Increment a named counter."""
+    with _lock:
+        _counters[name] += amount
+
+
+def get(name: str) -> int:
+    """Return the current value of a counter (0 if never incremented)."""
+    with _lock:
+        return _counters.get(name, 0)
+
+
+def observe(name: str, seconds: float) -> None:
+    """Record a timing sample in seconds."""
+    with _lock:
+        _timings[name].append(seconds)
+
+
+def percentile(sorted_samples: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted, non-empty list."""
+    index = min(len(sorted_samples) - 1, int(round(pct / 100 * (len(sorted_samples) - 1))))
+    return sorted_samples[index]
+
+
+def timing_summary(name: str) -> dict:
+    """Return count/avg/p50/p95/max for a timing, or an empty dict."""
+    with _lock:
+        samples = sorted(_timings.get(name, ()))
+    if not samples:
+        return {}
+    return {
+        'count': len(samples),
+        'avg': round(sum(samples) / len(samples), 3),
+        'p50': round(percentile(samples, 50), 3),
+        'p95': round(percentile(samples, 95), 3),
+        'max': round(samples[-1], 3),
+    }
+
+
+def snapshot() -> dict:
+    """Return a copy of all metrics."""
+    with _lock:
+        counters = dict(_counters)
+        timing_names = list(_timings)
+    return {
+        'counters': counters,
+        'timings': {name: timing_summary(name) for name in timing_names},
+    }
+
+
+def reset() -> None:
+    """Clear all metrics. Mostly useful in tests."""
+    with _lock:
+        _counters.clear()
+        _timings.clear()
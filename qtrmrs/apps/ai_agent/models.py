@@ -1,3 +1,13 @@
-from django.db import models
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 
-# Create your models here.
+from .client import publish_models_change
+
+
+# === Signals ===
+
+@receiver(post_save, sender='quizzes.AIModel')
+@receiver(post_delete, sender='quizzes.AIModel')
+def invalidate_model_registry(sender, **kwargs):
+    """Drop cached GenerativeModels in every worker when the AI model catalogue changes."""
+    publish_models_change()
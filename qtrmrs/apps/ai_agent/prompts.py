@@ -1,3 +1,9 @@
+# Bump whenever a prompt or its output format changes so cached
+# generations from the old prompt are not served for the new one. The
+# output format's own version (formats.VERSIONS) is part of the key too.
+PROMPT_VERSION = "2"
+
+
 QUIZ_GENERATION_PROMPT = """
 You are an expert technical interviewer.
 Generate a multiple-choice quiz for a {level}-level programmer in {language}.
@@ -43,6 +49,27 @@ Be encouraging but technically precise.
 
 
 
+BATCH_EXPLANATION_PROMPT = """
+A user answered several quiz questions incorrectly or skipped them.
+Each item below has an id, the question, the user's answer and the correct answer:
+{items_json}
+
+Task:
+For EVERY item, explain briefly (in 2 sentences max) why the user's answer is wrong and why the correct answer is right.
+Be encouraging but technically precise. If the user skipped, just explain the correct answer.
+
+Output ONLY valid JSON in this format, with one entry per item and the same ids:
+{{
+  "explanations": [
+    {{"id": 12, "explanation": "Why the user was wrong and why the correct answer is right."}}
+  ]
+}}
+"""
+
+
+
+
+
 INTENT_PARSING_PROMPT = """
 Analyze the user's request: "{user_message}"
 
@@ -109,4 +136,88 @@ Output ONLY valid JSON in this format:
   "level": "Intermediate",
   "count": 5
 }}
-"""
\ No newline at end of file
+"""
+
+CHAT_QUIZ_PROMPT = """
+You are an expert educator and quiz master.
+A user asked for a quiz with this message: "{user_message}"
+
+Step 1 - Understand the request:
+- Subject (e.g., History, Science, Geography, Movies, Sports). Be specific.
+- Topic (e.g., World War 2, Solar System, European Capitals). Be specific.
+- Difficulty (Beginner, Intermediate, Expert). Default to Intermediate.
+
+Step 2 - Generate the quiz for that subject, topic and difficulty:
+1. Generate exactly {num_questions} questions.
+2. Questions should test knowledge, not opinion.
+3. Provide 4 options for each question.
+4. Only ONE option should be correct.
+5. Provide a brief explanation for each answer.
+
+Output Format (Strict JSON):
+{{
+  "subject": "History",
+  "topic": "Ancient Rome",
+  "level": "Intermediate",
+  "questions": [
+    {{
+      "text": "The question text here",
+      "options": ["Option A", "Option B", "Option C", "Option D"],
+      "correct_answer": "Option A",
+      "explanation": "Why this is correct."
+    }}
+  ]
+}}
+"""
+
+
+# ==========================================
+# COMPACT OUTPUT PROMPTS (AI_QUIZ_OUTPUT_FORMAT='compact')
+# The shape is enforced by response_schema (see formats.py), so these
+# only name the keys instead of showing a JSON example.
+# ==========================================
+
+COMPACT_QUIZ_GENERATION_PROMPT = """
+You are an expert technical interviewer.
+Generate a multiple-choice quiz for a {level}-level programmer in {language}.
+The specific topic is: {topic}.
+
+Generate exactly {num_questions} questions. {code_instruction}
+For each question give: t = question text (no code), c = code snippet ("" if none), o = 4 options, a = index (0-3) of the correct option in o, e = a one-sentence explanation.
+"""
+
+COMPACT_GENERAL_QUIZ_PROMPT = """
+You are an expert educator and quiz master.
+Generate a multiple-choice quiz about: {topic}
+Subject area: {subject}
+Difficulty level: {level}
+
+Generate exactly {num_questions} questions that test knowledge, not opinion, with exactly one correct option each.
+For each question give: t = question text, o = 4 options, a = index (0-3) of the correct option in o, e = a one-sentence explanation.
+"""
+
+COMPACT_CHAT_QUIZ_PROMPT = """
+You are an expert educator and quiz master.
+A user asked for a quiz with this message: "{user_message}"
+
+Pick a specific subject (s), topic (p) and difficulty (l: Beginner, Intermediate or Expert; default Intermediate) for the request.
+Then generate exactly {num_questions} questions on it that test knowledge, not opinion, with exactly one correct option each.
+For each question give: t = question text, o = 4 options, a = index (0-3) of the correct option in o, e = a one-sentence explanation.
+"""
+
+
+# ==========================================
+# CHUNKED GENERATION HINTS (see chunking.py)
+# Appended to a quiz prompt when a large quiz is split into sub-requests.
+# ==========================================
+
+CHUNK_FOCUS_PROMPT = """
+This is part {part} of {parts} of a larger quiz; the other parts are written separately.
+Focus area: {focus}
+Keep every question within this focus area so the parts don't overlap.
+"""
+
+CHUNK_TOP_UP_PROMPT = """
+The quiz already contains these questions. Write new ones that ask about something different:
+{existing}
+"""
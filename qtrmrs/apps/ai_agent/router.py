@@ -0,0 +1,158 @@
+"""
+Default-model routing.
+
+When the user doesn't pick a model, choose_model picks one of the active
+AIModels using the live stats the circuit breakers keep (latency and error
+moving averages). The policy is set by AI_ROUTER_POLICY:
+
+    fastest      lowest latency EWMA among healthy models (default), see below
+    cheapest     lowest AIModel.relative_cost among healthy models
+    round_robin  rotate through healthy models
+    default      the is_default model, as before routing existed
+
+'fastest' replaces is_default as the way the Auto model is chosen, but still
+falls back to it. A model with no latency reading yet (new, or this process
+hasn't called it) is tried first so it gets one. Models within
+AI_ROUTER_LATENCY_TOLERANCE of the fastest count as tied, and ties go to the
+is_default model, then AIModel priority. AI_ROUTER_EXPLORE_RATE of requests
+go to a random healthy model, so a model that was slow once keeps getting
+re-measured instead of being ranked on a stale reading forever.
+
+A dotted path to any callable(models) -> AIModel also works, and new names
+can be added with @register_policy. AI_ROUTER_OVERRIDE pins one model name
+regardless of policy, which keeps tests and incident response deterministic.
+Views resolve the model selector through resolve_model, which honours an
+explicit choice and only falls back to the router for "Auto".
+"""
+import itertools
+import logging
+import random
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from apps.quizzes.models import AIModel
+from . import metrics
+from .breaker import OPEN, peek_breaker
+
+logger = logging.getLogger(__name__)
+
+_policies = {}
+_round_robin = itertools.count()
+
+
+def register_policy(name: str) -> Callable:
+    """Decorator registering a policy: callable(list[AIModel]) -> AIModel."""
+    def decorator(func):
+        _policies[name] = func
+        return func
+    return decorator
+
+
+def _latency(ai_model: AIModel) -> Optional[float]:
+    breaker = peek_breaker(ai_model.model_name)
+    return breaker.latency_ewma if breaker else None
+
+
+@register_policy('fastest')
+def fastest(models: list) -> AIModel:
+    # `models` is in default-then-priority order, which breaks every tie below
+    latencies = [(m, _latency(m)) for m in models]
+    unmeasured = [m for m, latency in latencies if latency is None]
+    if unmeasured:
+        return unmeasured[0]
+    if random.random() < getattr(settings, 'AI_ROUTER_EXPLORE_RATE', 0.05):
+        metrics.incr('router.explored')
+        return random.choice(models)
+    best = min(latency for _, latency in latencies)
+    tolerance = getattr(settings, 'AI_ROUTER_LATENCY_TOLERANCE', 0.2)
+    return next(m for m, latency in latencies if latency <= best * (1 + tolerance))
+
+
+@register_policy('cheapest')
+def cheapest(models: list) -> AIModel:
+    return min(models, key=lambda m: m.relative_cost)
+
+
+@register_policy('round_robin')
+def round_robin(models: list) -> AIModel:
+    return models[next(_round_robin) % len(models)]
+
+
+@register_policy('default')
+def default(models: list) -> AIModel:
+    return models[0]
+
+
+def _is_healthy(ai_model: AIModel) -> bool:
+    breaker = peek_breaker(ai_model.model_name)
+    if breaker is None:
+        return True
+    return breaker.state != OPEN and breaker.error_rate <= getattr(settings, 'AI_ROUTER_MAX_ERROR_RATE', 0.5)
+
+
+def _get_policy() -> Callable:
+    name = getattr(settings, 'AI_ROUTER_POLICY', 'fastest')
+    if name in _policies:
+        return _policies[name]
+    return import_string(name)
+
+
+def _candidates():
+    # Default model first, then priority order: the tie-break for every policy
+    return AIModel.objects.filter(is_active=True).order_by('-is_default', 'priority', 'id')
+
+
+def _pick(models: list) -> tuple[Optional[AIModel], str]:
+    override = getattr(settings, 'AI_ROUTER_OVERRIDE', '')
+    if override:
+        return next((m for m in models if m.model_name == override), None), override
+    if not models:
+        return None, getattr(settings, 'DEFAULT_AI_MODEL', 'gemini-flash-latest')
+
+    healthy = [m for m in models if _is_healthy(m)] or models
+    chosen = _get_policy()(healthy)
+    metrics.incr(f'router.chosen.{chosen.model_name}')
+    logger.debug(f"Router picked {chosen.model_name} from {len(healthy)} healthy models")
+    return chosen, chosen.model_name
+
+
+def choose_model() -> tuple[Optional[AIModel], str]:
+    """
+    Returns (AIModel or None, model_name) for a request that didn't select
+    a model. AIModel is None when no model is active (DEFAULT_AI_MODEL is
+    used) or when AI_ROUTER_OVERRIDE names a model that isn't in the table.
+    """
+    return _pick(list(_candidates()))
+
+
+async def achoose_model() -> tuple[Optional[AIModel], str]:
+    """Async version of choose_model."""
+    return _pick([m async for m in _candidates()])
+
+
+def resolve_model(model_id) -> tuple[Optional[AIModel], str]:
+    """
+    Returns (AIModel or None, model_name) for a model selector value: the
+    chosen active AIModel, or the router's pick when the selection is
+    empty ("Auto") or not a valid active model.
+    """
+    if model_id:
+        try:
+            ai_model = AIModel.objects.get(id=model_id, is_active=True)
+            return ai_model, ai_model.model_name
+        except (AIModel.DoesNotExist, ValueError):
+            pass
+    return choose_model()
+
+
+async def aresolve_model(model_id) -> tuple[Optional[AIModel], str]:
+    """Async version of resolve_model."""
+    if model_id:
+        try:
+            ai_model = await AIModel.objects.aget(id=model_id, is_active=True)
+            return ai_model, ai_model.model_name
+        except (AIModel.DoesNotExist, ValueError):
+            pass
+    return await achoose_model()
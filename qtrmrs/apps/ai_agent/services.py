@@ -1,17 +1,44 @@
+import asyncio
 import json
 import logging
+import math
 import time
-from typing import Optional, Union
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Iterator, Optional, Union
 from django.conf import settings
-from .client import get_gemini_client
+from django.db import connection
+from google.api_core.exceptions import ResourceExhausted
+from . import chunking, formats, metrics, singleflight, telemetry
+from .cache import get_generation_cache, make_cache_key
+from .breaker import get_breaker
+from .client import get_generative_model, active_model_names, aactive_model_names, acheck_models_version
+from .intent import confident_intent
 from .prompts import (
-    QUIZ_GENERATION_PROMPT, EXPLANATION_PROMPT, INTENT_PARSING_PROMPT,
-    GENERAL_QUIZ_PROMPT, GENERAL_INTENT_PROMPT
+    QUIZ_GENERATION_PROMPT, EXPLANATION_PROMPT, BATCH_EXPLANATION_PROMPT, INTENT_PARSING_PROMPT,
+    GENERAL_QUIZ_PROMPT, GENERAL_INTENT_PROMPT, CHAT_QUIZ_PROMPT,
+    COMPACT_QUIZ_GENERATION_PROMPT, COMPACT_GENERAL_QUIZ_PROMPT, COMPACT_CHAT_QUIZ_PROMPT
 )
+from .streaming import QuestionStreamParser
 
 logger = logging.getLogger(__name__)
 
 
+# Fallback parameters when intent parsing fails
+DEFAULT_INTENT = {
+    "language": "General",
+    "topic": "Random",
+    "level": "Intermediate",
+    "count": 5
+}
+
+DEFAULT_GENERAL_INTENT = {
+    "subject": "General Knowledge",
+    "topic": "Trivia",
+    "level": "Intermediate",
+    "count": 5
+}
+
+
 class AIError:
     """Represents an AI generation error with details."""
     def __init__(self, error_type: str, message: str, suggestion: str = ""):
@@ -23,6 +50,51 @@ class AIError:
         return False  # So it evaluates as falsy like empty list
 
 
+class FailedExplanation(str):
+    """
+    Error text returned in place of an explanation. It is still shown to the
+    user, but callers can tell it apart from a real explanation and avoid
+    memoizing it.
+    """
+
+
+class ModelsUnavailable(Exception):
+    """Raised when every candidate model failed or has an open circuit."""
+
+
+# Errors that say "this model, right now" rather than "this request":
+# they trip the model's circuit breaker and move on to the next model.
+FALLBACK_ERRORS = {'quota', 'model_not_found', 'timeout'}
+
+
+def classify_error(e: Exception) -> str:
+    """Map an SDK exception to an AIError error_type."""
+    error_str = str(e).lower()
+    # Matched explicitly: 'quota' trips breakers, so a bare 'rate' (as in
+    # "generate" or "accurate") must not count
+    if (
+        isinstance(e, ResourceExhausted) or '429' in error_str or 'quota' in error_str
+        or 'rate limit' in error_str or 'resource exhausted' in error_str
+        or 'resource_exhausted' in error_str
+    ):
+        return 'quota'
+    if '404' in str(e) or 'not found' in error_str:
+        return 'model_not_found'
+    if '403' in str(e) or 'permission' in error_str or 'api key' in error_str:
+        return 'auth'
+    if 'timeout' in error_str or 'deadline' in error_str:
+        return 'timeout'
+    return 'unknown'
+
+
+def _in_pool_thread(func, *args, **kwargs):
+    """Run func on a ThreadPoolExecutor thread, closing any connection it opened."""
+    try:
+        return func(*args, **kwargs)
+    finally:
+        connection.close()
+
+
 class QuizGenerator:
     """
     Service class to handle AI interactions for Quizzes.
@@ -30,33 +102,39 @@ class QuizGenerator:
     """
     
     def __init__(self, model_name: Optional[str] = None):
-        self.genai = get_gemini_client()
         self.model_name = model_name or getattr(settings, 'DEFAULT_AI_MODEL', 'gemini-flash-latest')
-        self.model = self.genai.GenerativeModel(self.model_name)
+        # Shared per process; see client.get_generative_model
+        self.model = get_generative_model(self.model_name)
 
     def _handle_error(self, e: Exception, operation: str) -> AIError:
         """Parse exception and return appropriate AIError."""
-        error_str = str(e).lower()
-        
-        if '429' in str(e) or 'quota' in error_str or 'rate' in error_str:
+        error_type = classify_error(e)
+
+        if isinstance(e, ModelsUnavailable):
+            return AIError(
+                error_type='unavailable',
+                message="All AI models are temporarily unavailable",
+                suggestion="Please wait a minute before trying again."
+            )
+        elif error_type == 'quota':
             return AIError(
                 error_type='quota',
                 message=f"API quota exceeded for model: {self.model_name}",
                 suggestion="Try selecting a different AI model, or wait a few minutes before trying again."
             )
-        elif '404' in str(e) or 'not found' in error_str:
+        elif error_type == 'model_not_found':
             return AIError(
                 error_type='model_not_found',
                 message=f"Model '{self.model_name}' not available",
                 suggestion="This model may be deprecated. Try 'Gemini Flash (Latest)' instead."
             )
-        elif '403' in str(e) or 'permission' in error_str or 'api key' in error_str:
+        elif error_type == 'auth':
             return AIError(
                 error_type='auth',
                 message="API authentication failed",
                 suggestion="Please check your API key configuration."
             )
-        elif 'timeout' in error_str or 'deadline' in error_str:
+        elif error_type == 'timeout':
             return AIError(
                 error_type='timeout',
                 message="Request timed out",
@@ -71,27 +149,148 @@ class QuizGenerator:
             )
 
     # ==========================================
-    # PROGRAMMING QUIZ METHODS
+    # MODEL CALLS (circuit breaker + fallback)
     # ==========================================
 
-    def generate_quiz(
-        self, 
-        language: str, 
-        topic: str, 
-        level: str, 
-        num_questions: int = 5, 
-        include_code: bool = False
-    ) -> Union[list[dict], AIError]:
+    def _fallback_models(self) -> list[str]:
+        """Other active models, in AIModel priority order (cached per process)."""
+        if not getattr(settings, 'AI_FALLBACK_ENABLED', True):
+            return []
+        return [name for name in active_model_names() if name != self.model_name]
+
+    async def _afallback_models(self) -> list[str]:
+        if not getattr(settings, 'AI_FALLBACK_ENABLED', True):
+            return []
+        return [name for name in await aactive_model_names() if name != self.model_name]
+
+    def _model_for(self, model_name: str):
+        return self.model if model_name == self.model_name else get_generative_model(model_name)
+
+    def _attempt_failed(self, model_name: str, e: Exception, start_time: float, call: dict) -> None:
+        """Trip the breaker for model-level errors; re-raise anything else."""
+        error_type = classify_error(e)
+        telemetry.record(model_name, latency=time.time() - start_time, error_type=error_type, **call)
+        if error_type not in FALLBACK_ERRORS:
+            raise e
+        get_breaker(model_name).record_failure()
+        metrics.incr('fallback.model_error')
+        logger.warning(f"Model {model_name} failed, trying the next one: {e}")
+
+    def _attempt_succeeded(self, model_name: str, start_time: float, call: dict, response) -> None:
+        latency = time.time() - start_time
+        get_breaker(model_name).record_success(latency)
+        telemetry.record(model_name, latency=latency, response=response, **call)
+        if model_name != self.model_name:
+            metrics.incr('fallback.served')
+            logger.info(f"Request for {self.model_name} served by fallback model {model_name}")
+
+    def _drain(self, model_name: str, start_time: float, call: dict, response) -> Iterator:
         """
-        Generates a structured programming quiz using Gemini.
-        Returns list of questions on success, AIError on failure.
+        Yield a streamed response's chunks, recording the attempt when it
+        ends: success (with the full latency and token usage) once the last
+        chunk is read, failure if the stream breaks. A stream the consumer
+        abandons is not recorded.
+        """
+        try:
+            yield from response
+        except Exception as e:
+            # Too late to fall back: questions may already have been used
+            self._attempt_failed(model_name, e, start_time, call)
+            raise
+        self._attempt_succeeded(model_name, start_time, call, response)
+
+    def _generate(
+        self, *args, operation: str, question_count: Optional[int] = None, prompt_version: str = '', **kwargs
+    ):
         """
+        generate_content with circuit breaking: models with an open breaker
+        are skipped and quota/timeout/not-found errors are retried on the
+        next active AIModel within the same request. Other errors propagate.
+        Every attempt is recorded in telemetry under `operation` (and the
+        quiz output format's `prompt_version`, for quiz generations).
+        With stream=True the attempt is only recorded once the caller has
+        drained the stream (see _drain).
+        Raises the last model error, or ModelsUnavailable if none was tried.
+        """
+        call = {'operation': operation, 'question_count': question_count, 'prompt_version': prompt_version}
+        last_error = None
+        fallbacks = None
+        candidates = [self.model_name]
+        index = 0
+        while index < len(candidates):
+            model_name = candidates[index]
+            index += 1
+            if get_breaker(model_name).allow_request():
+                start_time = time.time()
+                try:
+                    response = self._model_for(model_name).generate_content(*args, **kwargs)
+                except Exception as e:
+                    self._attempt_failed(model_name, e, start_time, call)
+                    last_error = e
+                else:
+                    if kwargs.get('stream'):
+                        return self._drain(model_name, start_time, call, response)
+                    self._attempt_succeeded(model_name, start_time, call, response)
+                    return response
+            else:
+                metrics.incr('breaker.skipped')
+            if fallbacks is None:
+                # Only hit the DB once the primary model is out
+                fallbacks = self._fallback_models()
+                candidates.extend(fallbacks)
+        raise last_error or ModelsUnavailable(f"No healthy model for {self.model_name}")
+
+    async def _agenerate(
+        self, *args, operation: str, question_count: Optional[int] = None, prompt_version: str = '', **kwargs
+    ):
+        """Async version of _generate, using generate_content_async."""
+        # get_generative_model can't read the version stamp on the event loop
+        await acheck_models_version()
+        call = {'operation': operation, 'question_count': question_count, 'prompt_version': prompt_version}
+        last_error = None
+        fallbacks = None
+        candidates = [self.model_name]
+        index = 0
+        while index < len(candidates):
+            model_name = candidates[index]
+            index += 1
+            if get_breaker(model_name).allow_request():
+                start_time = time.time()
+                try:
+                    response = await self._model_for(model_name).generate_content_async(*args, **kwargs)
+                except Exception as e:
+                    self._attempt_failed(model_name, e, start_time, call)
+                    last_error = e
+                else:
+                    self._attempt_succeeded(model_name, start_time, call, response)
+                    return response
+            else:
+                metrics.incr('breaker.skipped')
+            if fallbacks is None:
+                fallbacks = await self._afallback_models()
+                candidates.extend(fallbacks)
+        raise last_error or ModelsUnavailable(f"No healthy model for {self.model_name}")
+
+    # ==========================================
+    # PROGRAMMING QUIZ METHODS
+    # ==========================================
+
+    def _build_quiz_prompt(
+        self,
+        language: str,
+        topic: str,
+        level: str,
+        num_questions: int,
+        include_code: bool,
+        output_format: str = formats.VERBOSE
+    ) -> str:
         if include_code:
             code_instruction = "Each question MUST include a relevant code snippet that the user must analyze to answer."
         else:
             code_instruction = "Questions should be conceptual. Do NOT include long code snippets."
 
-        prompt = QUIZ_GENERATION_PROMPT.format(
+        template = COMPACT_QUIZ_GENERATION_PROMPT if output_format == formats.COMPACT else QUIZ_GENERATION_PROMPT
+        return template.format(
             language=language,
             topic=topic,
             level=level,
@@ -99,44 +298,292 @@ class QuizGenerator:
             code_instruction=code_instruction
         )
 
+    def _build_general_quiz_prompt(
+        self,
+        subject: str,
+        topic: str,
+        level: str,
+        num_questions: int,
+        output_format: str = formats.VERBOSE
+    ) -> str:
+        template = COMPACT_GENERAL_QUIZ_PROMPT if output_format == formats.COMPACT else GENERAL_QUIZ_PROMPT
+        return template.format(subject=subject, topic=topic, level=level, num_questions=num_questions)
+
+    def _build_chat_quiz_prompt(self, user_message: str, num_questions: int, output_format: str = formats.VERBOSE) -> str:
+        template = COMPACT_CHAT_QUIZ_PROMPT if output_format == formats.COMPACT else CHAT_QUIZ_PROMPT
+        return template.format(user_message=user_message, num_questions=num_questions)
+
+    def _format_kwargs(self, output_format: str, schema: dict = formats.QUIZ_SCHEMA) -> dict:
+        """generation_config and telemetry prompt_version for a quiz call in output_format."""
+        return {
+            'generation_config': formats.generation_config(output_format, schema),
+            'prompt_version': formats.version(output_format),
+        }
+
+    def generate_quiz(
+        self, 
+        language: str, 
+        topic: str, 
+        level: str, 
+        num_questions: int = 5, 
+        include_code: bool = False,
+        use_cache: bool = True
+    ) -> Union[list[dict], AIError]:
+        """
+        Generates a structured programming quiz using Gemini.
+        Returns list of questions on success, AIError on failure.
+        Pass use_cache=False to always get a freshly generated quiz
+        (this also opts out of sharing an identical in-flight call).
+        """
+        cache = get_generation_cache()
+        cache_key = make_cache_key(
+            'quiz', self.model_name, language, topic, level, num_questions, include_code
+        )
+        if use_cache:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"Quiz served from cache: model={self.model_name}, language={language}, topic={topic}")
+                return cached
+            # Identical requests already in flight wait for that call instead
+            return singleflight.do(cache_key, lambda: self._fetch_quiz(
+                cache_key, language, topic, level, num_questions, include_code
+            ))
+        return self._fetch_quiz(cache_key, language, topic, level, num_questions, include_code)
+
+    def _fetch_quiz(
+        self,
+        cache_key: str,
+        language: str,
+        topic: str,
+        level: str,
+        num_questions: int,
+        include_code: bool
+    ) -> Union[list[dict], AIError]:
+        """The Gemini call behind generate_quiz; caches the result."""
+        sizes = chunking.plan(num_questions)
+        if len(sizes) > 1:
+            return self._fetch_quiz_chunked(cache_key, language, topic, level, num_questions, include_code, sizes)
+
+        cache = get_generation_cache()
+        output_format = formats.active()
+        prompt = self._build_quiz_prompt(language, topic, level, num_questions, include_code, output_format)
+
         start_time = time.time()
         logger.info(f"Generating quiz: model={self.model_name}, language={language}, topic={topic}, level={level}, num_questions={num_questions}")
         
         try:
-            response = self.model.generate_content(
+            response = self._generate(
                 prompt,
-                generation_config={"response_mime_type": "application/json"}
+                operation='quiz', question_count=num_questions,
+                **self._format_kwargs(output_format)
             )
             elapsed = time.time() - start_time
-            quiz_data = json.loads(response.text)
-            questions = quiz_data.get('questions', [])
+            questions = formats.parse_questions(json.loads(response.text))
             logger.info(f"Quiz generated successfully: {len(questions)} questions in {elapsed:.2f}s")
+            cache.set(cache_key, questions)
             return questions
         except Exception as e:
             elapsed = time.time() - start_time
             logger.error(f"Quiz generation failed after {elapsed:.2f}s: {e}")
             return self._handle_error(e, "Quiz Generation")
 
+    def _quiz_chunk(
+        self,
+        language: str,
+        topic: str,
+        level: str,
+        num_questions: int,
+        include_code: bool,
+        output_format: str,
+        hint: str
+    ) -> list[dict]:
+        """One sub-request of a chunked quiz. Raises on failure."""
+        prompt = self._build_quiz_prompt(language, topic, level, num_questions, include_code, output_format) + hint
+        response = self._generate(
+            prompt,
+            operation='quiz', question_count=num_questions,
+            **self._format_kwargs(output_format)
+        )
+        return formats.parse_questions(json.loads(response.text))
+
+    def _fetch_quiz_chunked(
+        self,
+        cache_key: str,
+        language: str,
+        topic: str,
+        level: str,
+        num_questions: int,
+        include_code: bool,
+        sizes: list[int]
+    ) -> Union[list[dict], AIError]:
+        """
+        _fetch_quiz for large quizzes: the chunks in `sizes` are generated
+        concurrently, merged and de-duplicated, then topped up if short.
+        """
+        output_format = formats.active()
+        start_time = time.time()
+        logger.info(f"Generating quiz in {len(sizes)} chunks: model={self.model_name}, language={language}, topic={topic}, level={level}, num_questions={num_questions}")
+
+        questions, errors = [], []
+        # Resolve the fallback chain here, so the pool threads never need the database
+        self._fallback_models()
+        executor = ThreadPoolExecutor(max_workers=len(sizes), thread_name_prefix='quiz-chunk')
+        try:
+            futures = [
+                executor.submit(
+                    _in_pool_thread, self._quiz_chunk, language, topic, level, size, include_code, output_format,
+                    chunking.focus_hint(part, len(sizes))
+                )
+                for part, size in enumerate(sizes)
+            ]
+            for future in futures:
+                try:
+                    questions.extend(future.result())
+                except Exception as e:
+                    errors.append(e)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        questions = chunking.dedupe(questions)
+        for _ in range(getattr(settings, 'AI_CHUNK_TOP_UP_ROUNDS', 1)):
+            missing = num_questions - len(questions)
+            if missing <= 0:
+                break
+            metrics.incr('chunking.top_up')
+            try:
+                extra = self._quiz_chunk(
+                    language, topic, level, missing, include_code, output_format, chunking.top_up_hint(questions)
+                )
+            except Exception as e:
+                errors.append(e)
+                break
+            questions = chunking.dedupe(questions + extra)
+
+        result = self._finish_chunked_quiz(questions[:num_questions], num_questions, errors, start_time)
+        if result and len(result) == num_questions:
+            get_generation_cache().set(cache_key, result)
+        return result
+
+    def _finish_chunked_quiz(
+        self,
+        questions: list[dict],
+        num_questions: int,
+        errors: list[Exception],
+        start_time: float
+    ) -> Union[list[dict], AIError]:
+        """
+        Log a merged chunked quiz, or turn its failures into an AIError.
+        Short quizzes are returned as they are; callers only cache full ones
+        so a retry can do better.
+        """
+        elapsed = time.time() - start_time
+        if not questions:
+            logger.error(f"Chunked quiz generation failed after {elapsed:.2f}s: {errors[0] if errors else 'no questions'}")
+            return self._handle_error(errors[0] if errors else ValueError("No questions generated"), "Quiz Generation")
+        if len(questions) < num_questions:
+            logger.warning(f"Chunked quiz is short: {len(questions)} of {num_questions} questions in {elapsed:.2f}s")
+        else:
+            logger.info(f"Chunked quiz generated successfully: {len(questions)} questions in {elapsed:.2f}s")
+        return questions
+
+    def stream_quiz(
+        self,
+        language: str,
+        topic: str,
+        level: str,
+        num_questions: int = 5,
+        include_code: bool = False,
+        use_cache: bool = True
+    ) -> Iterator[Union[dict, AIError]]:
+        """
+        Streaming version of generate_quiz.
+        Yields each question dict as soon as the model finishes writing it.
+        On failure an AIError is yielded as the final item instead. The call
+        counts towards the model's breaker and telemetry once fully consumed.
+        """
+        cache = get_generation_cache()
+        cache_key = make_cache_key(
+            'quiz', self.model_name, language, topic, level, num_questions, include_code
+        )
+        if use_cache:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"Quiz served from cache: model={self.model_name}, language={language}, topic={topic}")
+                yield from cached
+                return
+
+        output_format = formats.active()
+        prompt = self._build_quiz_prompt(language, topic, level, num_questions, include_code, output_format)
+        parser = QuestionStreamParser()
+        questions = []
+
+        start_time = time.time()
+        logger.info(f"Streaming quiz: model={self.model_name}, language={language}, topic={topic}, level={level}, num_questions={num_questions}")
+
+        try:
+            response = self._generate(
+                prompt,
+                stream=True,
+                operation='quiz_stream', question_count=num_questions,
+                **self._format_kwargs(output_format)
+            )
+            for chunk in response:
+                for item in parser.feed(chunk.text):
+                    question = formats.expand_question(item)
+                    if question is None:
+                        continue
+                    if not questions:
+                        first_elapsed = time.time() - start_time
+                        metrics.observe('quiz.time_to_first_question', first_elapsed)
+                        logger.info(f"First streamed question after {first_elapsed:.2f}s")
+                    questions.append(question)
+                    yield question
+        except Exception as e:
+            elapsed = time.time() - start_time
+            logger.error(f"Quiz streaming failed after {elapsed:.2f}s ({len(questions)} questions received): {e}")
+            yield self._handle_error(e, "Quiz Streaming")
+            return
+
+        elapsed = time.time() - start_time
+        metrics.observe('quiz.stream_total', elapsed)
+        logger.info(f"Quiz streamed successfully: {len(questions)} questions in {elapsed:.2f}s")
+        if len(questions) >= num_questions:
+            cache.set(cache_key, questions)
+
+    def _local_intent(self, user_message: str, subject_key: str, defaults: dict) -> Optional[dict]:
+        """Intent dict from the rule-based parser, or None when it isn't confident."""
+        parsed = confident_intent(user_message)
+        if parsed is None:
+            return None
+        logger.info(f"Intent parsed locally (confidence={parsed.confidence}): {user_message[:80]!r}")
+        return {
+            subject_key: parsed.subject or defaults[subject_key],
+            'topic': parsed.topic,
+            'level': parsed.level or defaults['level'],
+            'count': parsed.count or defaults['count'],
+        }
+
     def parse_intent(self, user_message: str) -> dict:
         """
         Converts natural language into structured programming quiz parameters.
+        Clear requests are parsed locally; only ambiguous ones cost an LLM call.
         """
+        local = self._local_intent(user_message, 'language', DEFAULT_INTENT)
+        if local:
+            return local
+
         prompt = INTENT_PARSING_PROMPT.format(user_message=user_message)
         
         try:
-            response = self.model.generate_content(
+            response = self._generate(
                 prompt, 
-                generation_config={"response_mime_type": "application/json"}
+                generation_config={"response_mime_type": "application/json"},
+                operation='intent'
             )
             return json.loads(response.text)
         except Exception as e:
             logger.error(f"Intent Parsing Error: {e}")
-            return {
-                "language": "General",
-                "topic": "Random",
-                "level": "Intermediate",
-                "count": 5
-            }
+            return dict(DEFAULT_INTENT)
 
     # ==========================================
     # GENERAL PURPOSE QUIZ METHODS
@@ -147,49 +594,133 @@ class QuizGenerator:
         subject: str, 
         topic: str, 
         level: str, 
-        num_questions: int = 5
+        num_questions: int = 5,
+        use_cache: bool = True
     ) -> Union[list[dict], AIError]:
         """
         Generates a general-purpose quiz on any topic (non-programming).
         Returns list of questions on success, AIError on failure.
+        Pass use_cache=False to always get a freshly generated quiz
+        (this also opts out of sharing an identical in-flight call).
         """
-        prompt = GENERAL_QUIZ_PROMPT.format(
-            subject=subject,
-            topic=topic,
-            level=level,
-            num_questions=num_questions
+        cache = get_generation_cache()
+        cache_key = make_cache_key(
+            'general_quiz', self.model_name, subject, topic, level, num_questions
         )
+        if use_cache:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"General quiz served from cache: model={self.model_name}, subject={subject}, topic={topic}")
+                return cached
+            return singleflight.do(cache_key, lambda: self._fetch_general_quiz(
+                cache_key, subject, topic, level, num_questions
+            ))
+        return self._fetch_general_quiz(cache_key, subject, topic, level, num_questions)
+
+    def _fetch_general_quiz(
+        self,
+        cache_key: str,
+        subject: str,
+        topic: str,
+        level: str,
+        num_questions: int
+    ) -> Union[list[dict], AIError]:
+        """The Gemini call behind generate_general_quiz; caches the result."""
+        cache = get_generation_cache()
+        output_format = formats.active()
+        prompt = self._build_general_quiz_prompt(subject, topic, level, num_questions, output_format)
 
         try:
-            response = self.model.generate_content(
+            response = self._generate(
                 prompt,
-                generation_config={"response_mime_type": "application/json"}
+                operation='general_quiz', question_count=num_questions,
+                **self._format_kwargs(output_format)
             )
-            quiz_data = json.loads(response.text)
-            return quiz_data.get('questions', [])
+            questions = formats.parse_questions(json.loads(response.text))
+            cache.set(cache_key, questions)
+            return questions
         except Exception as e:
             return self._handle_error(e, "General Quiz Generation")
 
     def parse_general_intent(self, user_message: str) -> dict:
         """
         Converts natural language into structured general quiz parameters.
+        Clear requests are parsed locally; only ambiguous ones cost an LLM call.
         """
+        local = self._local_intent(user_message, 'subject', DEFAULT_GENERAL_INTENT)
+        if local:
+            return local
+
         prompt = GENERAL_INTENT_PROMPT.format(user_message=user_message)
         
         try:
-            response = self.model.generate_content(
+            response = self._generate(
                 prompt, 
-                generation_config={"response_mime_type": "application/json"}
+                generation_config={"response_mime_type": "application/json"},
+                operation='general_intent'
             )
             return json.loads(response.text)
         except Exception as e:
             logger.error(f"General Intent Parsing Error: {e}")
-            return {
-                "subject": "General Knowledge",
-                "topic": "Trivia",
-                "level": "Intermediate",
-                "count": 5
-            }
+            return dict(DEFAULT_GENERAL_INTENT)
+
+    def _parse_chat_quiz(self, response_text: str, num_questions: int) -> tuple[dict, list[dict]]:
+        """Split a combined chat response into (intent params, questions)."""
+        data = json.loads(response_text)
+        chosen = formats.parse_chat_params(data)
+        params = {
+            key: chosen[key] or DEFAULT_GENERAL_INTENT[key]
+            for key in ('subject', 'topic', 'level')
+        }
+        params['count'] = num_questions
+        return params, formats.parse_questions(data)
+
+    def _chat_quiz_cache_key(self, params: dict) -> str:
+        """
+        Combined results are cached under the same key generate_general_quiz
+        uses, so a two-step request for the same topic is a cache hit.
+        """
+        return make_cache_key(
+            'general_quiz', self.model_name, params['subject'], params['topic'],
+            params['level'], params['count']
+        )
+
+    def generate_chat_quiz(
+        self,
+        user_message: str,
+        num_questions: int = 5,
+        use_cache: bool = True
+    ) -> tuple[dict, Union[list[dict], AIError]]:
+        """
+        Parses the chat message AND generates the quiz in ONE Gemini call,
+        instead of parse_general_intent followed by generate_general_quiz.
+        Returns (params, questions); questions is an AIError on failure.
+        Messages the local parser understands go straight to the
+        (cache-aware) generate_general_quiz. Otherwise the topic is only
+        known after the call, so the result is cached for later requests.
+        """
+        local = self._local_intent(user_message, 'subject', DEFAULT_GENERAL_INTENT)
+        if local:
+            local['count'] = num_questions
+            return local, self.generate_general_quiz(
+                local['subject'], local['topic'], local['level'], num_questions, use_cache=use_cache
+            )
+
+        output_format = formats.active()
+        prompt = self._build_chat_quiz_prompt(user_message, num_questions, output_format)
+
+        try:
+            response = self._generate(
+                prompt,
+                operation='chat_quiz', question_count=num_questions,
+                **self._format_kwargs(output_format, formats.CHAT_QUIZ_SCHEMA)
+            )
+            params, questions = self._parse_chat_quiz(response.text, num_questions)
+        except Exception as e:
+            return dict(DEFAULT_GENERAL_INTENT, count=num_questions), self._handle_error(e, "Chat Quiz Generation")
+
+        get_generation_cache().set(self._chat_quiz_cache_key(params), questions)
+        return params, questions
 
     # ==========================================
     # SHARED METHODS
@@ -199,7 +730,8 @@ class QuizGenerator:
         self, 
         question_text: str, 
         user_answer: str, 
-        correct_answer: str
+        correct_answer: str,
+        timeout: Optional[float] = None
     ) -> str:
         """
         Generates a concise explanation for why the user was wrong.
@@ -212,17 +744,126 @@ class QuizGenerator:
         )
         
         try:
-            response = self.model.generate_content(prompt)
+            if timeout:
+                response = self._generate(prompt, request_options={"timeout": timeout}, operation='explanation')
+            else:
+                response = self._generate(prompt, operation='explanation')
             return response.text.strip()
         except Exception as e:
             logger.error(f"Explanation Generation Error: {e}")
-            if '429' in str(e) or 'quota' in str(e).lower():
-                return f"⚠️ Could not generate explanation (API quota exceeded for {self.model_name}). Try a different model."
-            return "Unable to generate explanation at this moment."
+            return self._explanation_error_message(e)
+
+    def generate_explanations(
+        self,
+        items: list[dict],
+        max_concurrency: Optional[int] = None,
+        timeout: Optional[float] = None
+    ) -> list[Optional[str]]:
+        """
+        Generates explanations for several answers concurrently.
+        Each item holds question_text, user_answer and correct_answer
+        (any other keys, such as an id, are ignored).
+        Returns explanations in input order, with None for calls that timed out.
+        """
+        if not items:
+            return []
+
+        max_concurrency = max_concurrency or getattr(settings, 'AI_EXPLANATION_CONCURRENCY', 4)
+        timeout = timeout or getattr(settings, 'AI_EXPLANATION_TIMEOUT', 20)
+        workers = min(max_concurrency, len(items))
+        # Queued items only start once a worker frees up, so allow one timeout per "wave"
+        deadline = timeout * math.ceil(len(items) / workers)
+
+        results = [None] * len(items)
+        start_time = time.time()
+        # Resolve the fallback chain here, so the pool threads never need the database
+        self._fallback_models()
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='explain')
+        try:
+            futures = {
+                executor.submit(
+                    _in_pool_thread, self.generate_explanation,
+                    item['question_text'], item['user_answer'], item['correct_answer'],
+                    timeout=timeout
+                ): index
+                for index, item in enumerate(items)
+            }
+            done, not_done = wait(futures, timeout=deadline)
+            for future in done:
+                results[futures[future]] = future.result()
+            if not_done:
+                logger.warning(f"{len(not_done)} of {len(items)} explanations timed out after {deadline:.0f}s")
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        logger.info(f"Generated {len(items)} explanations ({workers} concurrent) in {time.time() - start_time:.2f}s")
+        return results
+
+    def _build_batch_explanation_prompt(self, items: list[dict]) -> str:
+        return BATCH_EXPLANATION_PROMPT.format(items_json=json.dumps([
+            {
+                'id': item['id'],
+                'question': item['question_text'],
+                'user_answer': item['user_answer'],
+                'correct_answer': item['correct_answer'],
+            }
+            for item in items
+        ], indent=2))
+
+    def _parse_batch_explanations(self, response_text: str) -> dict:
+        """Map str(id) -> explanation text from a batch response."""
+        data = json.loads(response_text)
+        entries = data.get('explanations', []) if isinstance(data, dict) else data
+        parsed = {}
+        for entry in entries:
+            if isinstance(entry, dict) and entry.get('explanation'):
+                parsed[str(entry.get('id'))] = str(entry['explanation']).strip()
+        return parsed
+
+    def generate_explanations_batch(self, items: list[dict]) -> list[Optional[str]]:
+        """
+        Explains all items with ONE Gemini call instead of one per answer.
+        Each item needs an 'id' (e.g. the question id) plus the explanation
+        fields. Items missing from a partial or failed batch response fall
+        back to individual generate_explanation calls.
+        """
+        if not items:
+            return []
+
+        start_time = time.time()
+        try:
+            response = self._generate(
+                self._build_batch_explanation_prompt(items),
+                generation_config={"response_mime_type": "application/json"},
+                operation='explanation_batch', question_count=len(items)
+            )
+            by_id = self._parse_batch_explanations(response.text)
+        except Exception as e:
+            logger.error(f"Batch Explanation Error: {e}")
+            by_id = {}
+
+        results = [by_id.get(str(item['id'])) for item in items]
+        missing = [index for index, text in enumerate(results) if text is None]
+        logger.info(f"Batch explanations: {len(items) - len(missing)}/{len(items)} in {time.time() - start_time:.2f}s")
+
+        if missing:
+            fallback = self.generate_explanations([items[index] for index in missing])
+            for index, text in zip(missing, fallback):
+                results[index] = text
+        return results
+
+    def _explanation_error_message(self, e: Exception) -> "FailedExplanation":
+        """User-facing text shown in place of an explanation that failed."""
+        if '429' in str(e) or 'quota' in str(e).lower():
+            return FailedExplanation(f"⚠️ Could not generate explanation (API quota exceeded for {self.model_name}). Try a different model.")
+        return FailedExplanation("Unable to generate explanation at this moment.")
 
     # ==========================================
-    # ASYNC METHODS (for ASGI/Django Channels)
+    # ASYNC METHODS (for ASGI deployments)
     # ==========================================
+    # These await the SDK's native async client (generate_content_async)
+    # instead of parking a thread per request, so one ASGI worker can hold
+    # many concurrent Gemini calls.
 
     async def generate_quiz_async(
         self, 
@@ -230,36 +871,243 @@ class QuizGenerator:
         topic: str, 
         level: str, 
         num_questions: int = 5, 
-        include_code: bool = False
+        include_code: bool = False,
+        use_cache: bool = True
+    ) -> Union[list[dict], AIError]:
+        """Async version of generate_quiz."""
+        cache = get_generation_cache()
+        cache_key = make_cache_key(
+            'quiz', self.model_name, language, topic, level, num_questions, include_code
+        )
+        if use_cache:
+            cached = await cache.aget(cache_key)
+            if cached is not None:
+                logger.info(f"Quiz served from cache: model={self.model_name}, language={language}, topic={topic}")
+                return cached
+            return await singleflight.ado(cache_key, lambda: self._afetch_quiz(
+                cache_key, language, topic, level, num_questions, include_code
+            ))
+        return await self._afetch_quiz(cache_key, language, topic, level, num_questions, include_code)
+
+    async def _afetch_quiz(
+        self,
+        cache_key: str,
+        language: str,
+        topic: str,
+        level: str,
+        num_questions: int,
+        include_code: bool
     ) -> Union[list[dict], AIError]:
-        """Async version of generate_quiz for ASGI deployments."""
-        import asyncio
-        return await asyncio.to_thread(
-            self.generate_quiz, language, topic, level, num_questions, include_code
+        """Async version of _fetch_quiz."""
+        sizes = chunking.plan(num_questions)
+        if len(sizes) > 1:
+            return await self._afetch_quiz_chunked(cache_key, language, topic, level, num_questions, include_code, sizes)
+
+        cache = get_generation_cache()
+        output_format = formats.active()
+        prompt = self._build_quiz_prompt(language, topic, level, num_questions, include_code, output_format)
+
+        start_time = time.time()
+        logger.info(f"Generating quiz (async): model={self.model_name}, language={language}, topic={topic}, level={level}, num_questions={num_questions}")
+
+        try:
+            response = await self._agenerate(
+                prompt,
+                operation='quiz', question_count=num_questions,
+                **self._format_kwargs(output_format)
+            )
+            elapsed = time.time() - start_time
+            questions = formats.parse_questions(json.loads(response.text))
+            logger.info(f"Quiz generated successfully: {len(questions)} questions in {elapsed:.2f}s")
+            await cache.aset(cache_key, questions)
+            return questions
+        except Exception as e:
+            elapsed = time.time() - start_time
+            logger.error(f"Quiz generation failed after {elapsed:.2f}s: {e}")
+            return self._handle_error(e, "Quiz Generation")
+
+    async def _aquiz_chunk(
+        self,
+        language: str,
+        topic: str,
+        level: str,
+        num_questions: int,
+        include_code: bool,
+        output_format: str,
+        hint: str
+    ) -> list[dict]:
+        """Async version of _quiz_chunk."""
+        prompt = self._build_quiz_prompt(language, topic, level, num_questions, include_code, output_format) + hint
+        response = await self._agenerate(
+            prompt,
+            operation='quiz', question_count=num_questions,
+            **self._format_kwargs(output_format)
         )
+        return formats.parse_questions(json.loads(response.text))
+
+    async def _afetch_quiz_chunked(
+        self,
+        cache_key: str,
+        language: str,
+        topic: str,
+        level: str,
+        num_questions: int,
+        include_code: bool,
+        sizes: list[int]
+    ) -> Union[list[dict], AIError]:
+        """Async version of _fetch_quiz_chunked."""
+        output_format = formats.active()
+        start_time = time.time()
+        logger.info(f"Generating quiz (async) in {len(sizes)} chunks: model={self.model_name}, language={language}, topic={topic}, level={level}, num_questions={num_questions}")
+
+        results = await asyncio.gather(*(
+            self._aquiz_chunk(
+                language, topic, level, size, include_code, output_format, chunking.focus_hint(part, len(sizes))
+            )
+            for part, size in enumerate(sizes)
+        ), return_exceptions=True)
+        questions, errors = [], []
+        for result in results:
+            if isinstance(result, Exception):
+                errors.append(result)
+            else:
+                questions.extend(result)
+
+        questions = chunking.dedupe(questions)
+        for _ in range(getattr(settings, 'AI_CHUNK_TOP_UP_ROUNDS', 1)):
+            missing = num_questions - len(questions)
+            if missing <= 0:
+                break
+            metrics.incr('chunking.top_up')
+            try:
+                extra = await self._aquiz_chunk(
+                    language, topic, level, missing, include_code, output_format, chunking.top_up_hint(questions)
+                )
+            except Exception as e:
+                errors.append(e)
+                break
+            questions = chunking.dedupe(questions + extra)
+
+        result = self._finish_chunked_quiz(questions[:num_questions], num_questions, errors, start_time)
+        if result and len(result) == num_questions:
+            await get_generation_cache().aset(cache_key, result)
+        return result
 
     async def generate_general_quiz_async(
         self, 
         subject: str, 
         topic: str, 
         level: str, 
-        num_questions: int = 5
+        num_questions: int = 5,
+        use_cache: bool = True
     ) -> Union[list[dict], AIError]:
-        """Async version of generate_general_quiz for ASGI deployments."""
-        import asyncio
-        return await asyncio.to_thread(
-            self.generate_general_quiz, subject, topic, level, num_questions
+        """Async version of generate_general_quiz."""
+        cache = get_generation_cache()
+        cache_key = make_cache_key(
+            'general_quiz', self.model_name, subject, topic, level, num_questions
         )
+        if use_cache:
+            cached = await cache.aget(cache_key)
+            if cached is not None:
+                logger.info(f"General quiz served from cache: model={self.model_name}, subject={subject}, topic={topic}")
+                return cached
+            return await singleflight.ado(cache_key, lambda: self._afetch_general_quiz(
+                cache_key, subject, topic, level, num_questions
+            ))
+        return await self._afetch_general_quiz(cache_key, subject, topic, level, num_questions)
+
+    async def _afetch_general_quiz(
+        self,
+        cache_key: str,
+        subject: str,
+        topic: str,
+        level: str,
+        num_questions: int
+    ) -> Union[list[dict], AIError]:
+        """Async version of _fetch_general_quiz."""
+        cache = get_generation_cache()
+        output_format = formats.active()
+        prompt = self._build_general_quiz_prompt(subject, topic, level, num_questions, output_format)
+
+        try:
+            response = await self._agenerate(
+                prompt,
+                operation='general_quiz', question_count=num_questions,
+                **self._format_kwargs(output_format)
+            )
+            questions = formats.parse_questions(json.loads(response.text))
+            await cache.aset(cache_key, questions)
+            return questions
+        except Exception as e:
+            return self._handle_error(e, "General Quiz Generation")
 
     async def parse_intent_async(self, user_message: str) -> dict:
-        """Async version of parse_intent for ASGI deployments."""
-        import asyncio
-        return await asyncio.to_thread(self.parse_intent, user_message)
+        """Async version of parse_intent."""
+        local = self._local_intent(user_message, 'language', DEFAULT_INTENT)
+        if local:
+            return local
+
+        prompt = INTENT_PARSING_PROMPT.format(user_message=user_message)
+
+        try:
+            response = await self._agenerate(
+                prompt,
+                generation_config={"response_mime_type": "application/json"},
+                operation='intent'
+            )
+            return json.loads(response.text)
+        except Exception as e:
+            logger.error(f"Intent Parsing Error: {e}")
+            return dict(DEFAULT_INTENT)
 
     async def parse_general_intent_async(self, user_message: str) -> dict:
-        """Async version of parse_general_intent for ASGI deployments."""
-        import asyncio
-        return await asyncio.to_thread(self.parse_general_intent, user_message)
+        """Async version of parse_general_intent."""
+        local = self._local_intent(user_message, 'subject', DEFAULT_GENERAL_INTENT)
+        if local:
+            return local
+
+        prompt = GENERAL_INTENT_PROMPT.format(user_message=user_message)
+
+        try:
+            response = await self._agenerate(
+                prompt,
+                generation_config={"response_mime_type": "application/json"},
+                operation='general_intent'
+            )
+            return json.loads(response.text)
+        except Exception as e:
+            logger.error(f"General Intent Parsing Error: {e}")
+            return dict(DEFAULT_GENERAL_INTENT)
+
+    async def generate_chat_quiz_async(
+        self,
+        user_message: str,
+        num_questions: int = 5,
+        use_cache: bool = True
+    ) -> tuple[dict, Union[list[dict], AIError]]:
+        """Async version of generate_chat_quiz."""
+        local = self._local_intent(user_message, 'subject', DEFAULT_GENERAL_INTENT)
+        if local:
+            local['count'] = num_questions
+            return local, await self.generate_general_quiz_async(
+                local['subject'], local['topic'], local['level'], num_questions, use_cache=use_cache
+            )
+
+        output_format = formats.active()
+        prompt = self._build_chat_quiz_prompt(user_message, num_questions, output_format)
+
+        try:
+            response = await self._agenerate(
+                prompt,
+                operation='chat_quiz', question_count=num_questions,
+                **self._format_kwargs(output_format, formats.CHAT_QUIZ_SCHEMA)
+            )
+            params, questions = self._parse_chat_quiz(response.text, num_questions)
+        except Exception as e:
+            return dict(DEFAULT_GENERAL_INTENT, count=num_questions), self._handle_error(e, "Chat Quiz Generation")
+
+        await get_generation_cache().aset(self._chat_quiz_cache_key(params), questions)
+        return params, questions
 
     async def generate_explanation_async(
         self, 
@@ -267,8 +1115,66 @@ class QuizGenerator:
         user_answer: str, 
         correct_answer: str
     ) -> str:
-        """Async version of generate_explanation for ASGI deployments."""
-        import asyncio
-        return await asyncio.to_thread(
-            self.generate_explanation, question_text, user_answer, correct_answer
+        """Async version of generate_explanation."""
+        prompt = EXPLANATION_PROMPT.format(
+            question_text=question_text,
+            user_answer=user_answer,
+            correct_answer=correct_answer
         )
+
+        try:
+            response = await self._agenerate(prompt, operation='explanation')
+            return response.text.strip()
+        except Exception as e:
+            logger.error(f"Explanation Generation Error: {e}")
+            return self._explanation_error_message(e)
+
+    async def generate_explanations_async(
+        self,
+        items: list[dict],
+        max_concurrency: Optional[int] = None,
+        timeout: Optional[float] = None
+    ) -> list[Optional[str]]:
+        """Async version of generate_explanations, bounded by a semaphore."""
+        max_concurrency = max_concurrency or getattr(settings, 'AI_EXPLANATION_CONCURRENCY', 4)
+        timeout = timeout or getattr(settings, 'AI_EXPLANATION_TIMEOUT', 20)
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def explain(item):
+            async with semaphore:
+                try:
+                    return await asyncio.wait_for(
+                        self.generate_explanation_async(
+                            item['question_text'], item['user_answer'], item['correct_answer']
+                        ),
+                        timeout
+                    )
+                except asyncio.TimeoutError:
+                    logger.warning(f"Explanation timed out after {timeout}s")
+                    return None
+
+        return list(await asyncio.gather(*(explain(item) for item in items)))
+
+    async def generate_explanations_batch_async(self, items: list[dict]) -> list[Optional[str]]:
+        """Async version of generate_explanations_batch."""
+        if not items:
+            return []
+
+        try:
+            response = await self._agenerate(
+                self._build_batch_explanation_prompt(items),
+                generation_config={"response_mime_type": "application/json"},
+                operation='explanation_batch', question_count=len(items)
+            )
+            by_id = self._parse_batch_explanations(response.text)
+        except Exception as e:
+            logger.error(f"Batch Explanation Error: {e}")
+            by_id = {}
+
+        results = [by_id.get(str(item['id'])) for item in items]
+        missing = [index for index, text in enumerate(results) if text is None]
+        if missing:
+            fallback = await self.generate_explanations_async([items[index] for index in missing])
+            for index, text in zip(missing, fallback):
+                results[index] = text
+        return results
@@ -0,0 +1,211 @@
+"""
+Single-flight coalescing of identical generation requests.
+
+When several users ask for the same quiz at once, only the first request
+(the leader) calls Gemini; the others wait for it and get a copy of its
+result, so each still saves its own Quiz rows. Requests are identical when
+they share a generation cache key.
+
+Within a process this uses a shared Event per key (or an asyncio Future for
+async views). With AI_SINGLEFLIGHT_CROSS_PROCESS the leader also takes a lock
+in the shared generation cache backend; leaders in other workers then poll
+that backend for the cached result instead of making their own call.
+"""
+import asyncio
+import copy
+import logging
+import threading
+import time
+from typing import Awaitable, Callable
+
+from django.conf import settings
+
+from . import metrics
+from .cache import get_generation_cache
+
+logger = logging.getLogger(__name__)
+
+# How often a worker checks the shared cache while another worker generates
+POLL_INTERVAL = 0.25
+
+_lock = threading.Lock()
+_flights = {}
+_async_flights = {}
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def _enabled() -> bool:
+    return getattr(settings, 'AI_SINGLEFLIGHT_ENABLED', True)
+
+
+def _timeout() -> float:
+    return getattr(settings, 'AI_SINGLEFLIGHT_TIMEOUT', 90)
+
+
+def _shared_backend():
+    if not getattr(settings, 'AI_SINGLEFLIGHT_CROSS_PROCESS', False):
+        return None
+    return get_generation_cache().backend
+
+
+def _lock_key(key: str) -> str:
+    return f"{key}:inflight"
+
+
+def do(key: str, fn: Callable):
+    """Run fn() once for all concurrent callers with the same key."""
+    if not _enabled():
+        return fn()
+
+    with _lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = _Flight()
+
+    if not leader:
+        metrics.incr('singleflight.coalesced')
+        if not flight.done.wait(_timeout()):
+            logger.warning(f"Single-flight leader for {key} timed out; generating separately")
+            return fn()
+        if flight.error is not None:
+            raise flight.error
+        return copy.deepcopy(flight.result)
+
+    metrics.incr('singleflight.leader')
+    try:
+        flight.result = _lead(key, fn)
+        return flight.result
+    except Exception as e:
+        flight.error = e
+        raise
+    finally:
+        with _lock:
+            _flights.pop(key, None)
+        flight.done.set()
+
+
+def _wait_for_remote(backend, key: str):
+    """
+    Take the cross-worker lock for key, or wait for the worker holding it.
+    Returns (acquired, result): result is that worker's cached quiz if it
+    finished while we waited; acquired is False if we gave up waiting.
+    """
+    deadline = time.monotonic() + _timeout()
+    while not backend.add(_lock_key(key), 1, timeout=_timeout()):
+        time.sleep(POLL_INTERVAL)
+        result = backend.get(key)
+        if result is not None:
+            return False, result
+        if time.monotonic() > deadline:
+            return False, None
+    return True, None
+
+
+def _lead(key: str, fn: Callable):
+    """Run fn(), first waiting out a leader in another worker if there is one."""
+    backend = _shared_backend()
+    if backend is None:
+        return fn()
+
+    try:
+        acquired, result = _wait_for_remote(backend, key)
+    except Exception as e:
+        logger.warning(f"Single-flight lock unavailable, generating without it: {e}")
+        return fn()
+    if result is not None:
+        metrics.incr('singleflight.coalesced_remote')
+        return result
+    if not acquired:
+        return fn()
+
+    try:
+        return fn()
+    finally:
+        try:
+            backend.delete(_lock_key(key))
+        except Exception as e:
+            logger.warning(f"Single-flight lock release failed: {e}")
+
+
+async def ado(key: str, coro_fn: Callable[[], Awaitable]):
+    """Async version of do(): coro_fn() is awaited once per key."""
+    if not _enabled():
+        return await coro_fn()
+
+    future = _async_flights.get(key)
+    if future is not None:
+        metrics.incr('singleflight.coalesced')
+        try:
+            result = await asyncio.wait_for(asyncio.shield(future), _timeout())
+        except asyncio.TimeoutError:
+            logger.warning(f"Single-flight leader for {key} timed out; generating separately")
+            return await coro_fn()
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                raise  # We were cancelled, not the leader
+            return await coro_fn()
+        return copy.deepcopy(result)
+
+    future = asyncio.get_running_loop().create_future()
+    _async_flights[key] = future
+    metrics.incr('singleflight.leader')
+    try:
+        result = await _alead(key, coro_fn)
+        future.set_result(result)
+        return result
+    except Exception as e:
+        future.set_exception(e)
+        # Mark retrieved so a failure nobody waited on isn't logged as lost
+        future.exception()
+        raise
+    finally:
+        _async_flights.pop(key, None)
+        if not future.done():
+            # Leader was cancelled; waiting requests generate on their own
+            future.cancel()
+
+
+async def _await_remote(backend, key: str):
+    """Async version of _wait_for_remote."""
+    deadline = time.monotonic() + _timeout()
+    while not await backend.aadd(_lock_key(key), 1, timeout=_timeout()):
+        await asyncio.sleep(POLL_INTERVAL)
+        result = await backend.aget(key)
+        if result is not None:
+            return False, result
+        if time.monotonic() > deadline:
+            return False, None
+    return True, None
+
+
+async def _alead(key: str, coro_fn: Callable[[], Awaitable]):
+    """Async version of _lead."""
+    backend = _shared_backend()
+    if backend is None:
+        return await coro_fn()
+
+    try:
+        acquired, result = await _await_remote(backend, key)
+    except Exception as e:
+        logger.warning(f"Single-flight lock unavailable, generating without it: {e}")
+        return await coro_fn()
+    if result is not None:
+        metrics.incr('singleflight.coalesced_remote')
+        return result
+    if not acquired:
+        return await coro_fn()
+
+    try:
+        return await coro_fn()
+    finally:
+        try:
+            await backend.adelete(_lock_key(key))
+        except Exception as e:
+            logger.warning(f"Single-flight lock release failed: {e}")
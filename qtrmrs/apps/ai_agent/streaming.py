@@ -0,0 +1,86 @@
+"""
+Incremental JSON parsing for streamed quiz generation.
+
+Gemini streams the quiz as raw text chunks of one JSON document:
+``{"questions": [{...}, {...}]}``. QuestionStreamParser scans the chunks as
+they arrive and hands back each question object as soon as its closing brace
+is seen, so the first question can be saved long before the last token.
+"""
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class QuestionStreamParser:
+    """
+    Feed text chunks in, get completed question dicts out.
+
+    Question objects are the ``{...}`` items of the top-level ``questions``
+    array (or of a bare top-level array). Strings and escapes are tracked so
+    braces inside question text or code snippets don't confuse the parser.
+    """
+
+    def __init__(self):
+        self._buffer = ''
+        self._pos = 0            # Next unscanned index in _buffer
+        self._stack = []         # Open containers: '{' or '['
+        self._in_string = False
+        self._escape = False
+        self._item_start = None  # Buffer index where the current question began
+
+    def _at_item_level(self) -> bool:
+        """True when the innermost container is the questions array."""
+        return self._stack in (['{', '['], ['['])
+
+    def feed(self, chunk: str) -> list[dict]:
+        """Consume a chunk and return any questions completed by it."""
+        self._buffer += chunk
+        completed = []
+
+        while self._pos < len(self._buffer):
+            char = self._buffer[self._pos]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in '{[':
+                if char == '{' and self._at_item_level():
+                    self._item_start = self._pos
+                self._stack.append(char)
+            elif char in '}]':
+                if self._stack:
+                    self._stack.pop()
+                if char == '}' and self._item_start is not None and self._at_item_level():
+                    item = self._decode(self._buffer[self._item_start:self._pos + 1])
+                    if item is not None:
+                        completed.append(item)
+                    self._item_start = None
+
+            self._pos += 1
+
+        # Drop text that can no longer be part of a pending question
+        if self._item_start is None:
+            self._buffer = ''
+            self._pos = 0
+        elif self._item_start > 0:
+            self._buffer = self._buffer[self._item_start:]
+            self._pos -= self._item_start
+            self._item_start = 0
+
+        return completed
+
+    @staticmethod
+    def _decode(text: str):
+        try:
+            item = json.loads(text)
+        except json.JSONDecodeError as e:
+            logger.warning(f"Skipping malformed streamed question: {e}")
+            return None
+        return item if isinstance(item, dict) else None
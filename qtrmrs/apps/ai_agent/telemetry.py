@@ -0,0 +1,198 @@
+"""
+Persistent per-call telemetry for Gemini requests.
+
+QuizGenerator records every call attempt (model, operation, latency, token
+usage, outcome) here. Records are buffered in memory and written to AICallLog
+in one bulk_create from a background thread, so request threads and the event
+loop never wait on the insert. The table is pruned to the newest
+AI_TELEMETRY_MAX_ROWS rows on each flush.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Optional
+
+from django.conf import settings
+from django.db import connection
+
+from apps.quizzes.models import AICallLog
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_buffer = []
+_oldest = None  # monotonic time of the oldest buffered record
+
+QUIZ_OPERATIONS = ('quiz', 'quiz_stream', 'general_quiz', 'chat_quiz')
+
+
+def _enabled() -> bool:
+    return getattr(settings, 'AI_TELEMETRY_ENABLED', True)
+
+
+def _token_count(usage, field: str) -> Optional[int]:
+    value = getattr(usage, field, None)
+    return value if isinstance(value, int) else None
+
+
+def _usage(response) -> tuple[Optional[int], Optional[int]]:
+    """(prompt_tokens, response_tokens) from a response's usage_metadata, if present."""
+    try:
+        usage = getattr(response, 'usage_metadata', None)
+    except Exception:
+        # Streamed responses only have usage once fully consumed
+        return None, None
+    return _token_count(usage, 'prompt_token_count'), _token_count(usage, 'candidates_token_count')
+
+
+def record(
+    model_name: str,
+    operation: str,
+    latency: float,
+    response=None,
+    error_type: str = '',
+    question_count: Optional[int] = None,
+    prompt_version: str = ''
+) -> None:
+    """Buffer one call; flushes in the background when the buffer is full or old."""
+    global _oldest
+    if not _enabled():
+        return
+
+    prompt_tokens, response_tokens = _usage(response)
+    entry = AICallLog(
+        model_name=model_name[:100],
+        operation=operation,
+        latency_ms=int(latency * 1000),
+        prompt_tokens=prompt_tokens,
+        response_tokens=response_tokens,
+        error_type=error_type,
+        question_count=question_count,
+        prompt_version=prompt_version,
+    )
+    with _lock:
+        _buffer.append(entry)
+        if _oldest is None:
+            _oldest = time.monotonic()
+        due = (
+            len(_buffer) >= getattr(settings, 'AI_TELEMETRY_FLUSH_SIZE', 20)
+            or time.monotonic() - _oldest >= getattr(settings, 'AI_TELEMETRY_FLUSH_INTERVAL', 30)
+        )
+    if due:
+        threading.Thread(target=_flush_in_background, daemon=True, name='telemetry-flush').start()
+
+
+def _take_buffer() -> list:
+    global _oldest
+    with _lock:
+        entries = _buffer[:]
+        _buffer.clear()
+        _oldest = None
+    return entries
+
+
+def flush() -> int:
+    """Write buffered records and prune the table. Returns the number written."""
+    entries = _take_buffer()
+    if not entries:
+        return 0
+    AICallLog.objects.bulk_create(entries)
+    metrics.incr('telemetry.flushed', len(entries))
+
+    # Keep a rolling window: drop everything older than the newest N rows
+    max_rows = getattr(settings, 'AI_TELEMETRY_MAX_ROWS', 10000)
+    cutoff = AICallLog.objects.order_by('-id').values_list('id', flat=True)[max_rows:max_rows + 1].first()
+    if cutoff is not None:
+        AICallLog.objects.filter(id__lte=cutoff).delete()
+    return len(entries)
+
+
+def _flush_in_background() -> None:
+    try:
+        flush()
+    except Exception as e:
+        logger.warning(f"Telemetry flush failed: {e}")
+    finally:
+        connection.close()
+
+
+@atexit.register
+def _flush_at_exit() -> None:
+    try:
+        flush()
+    except Exception:
+        pass
+
+
+def reset() -> None:
+    """Drop buffered records without writing them. Mostly useful in tests."""
+    _take_buffer()
+
+
+def _summarize(rows) -> dict:
+    """Summary stats of (key, latency_ms, error_type, prompt_tokens, response_tokens, question_count) rows, per key."""
+    latencies = defaultdict(list)
+    calls = defaultdict(int)
+    errors = defaultdict(int)
+    tokens = defaultdict(lambda: [0, 0, 0, 0, 0])  # prompt total, response total, samples, questions, question samples
+
+    for key, latency_ms, error_type, prompt_tokens, response_tokens, question_count in rows:
+        calls[key] += 1
+        if error_type:
+            errors[key] += 1
+            continue
+        latencies[key].append(latency_ms)
+        if prompt_tokens is not None and response_tokens is not None:
+            totals = tokens[key]
+            totals[0] += prompt_tokens
+            totals[1] += response_tokens
+            totals[2] += 1
+            if question_count:
+                totals[3] += question_count
+                totals[4] += response_tokens
+
+    stats = {}
+    for key, count in calls.items():
+        samples = sorted(latencies[key])
+        prompt_total, response_total, token_samples, questions, question_tokens = tokens[key]
+        stats[key] = {
+            'calls': count,
+            'error_rate': round(errors[key] / count, 3),
+            'p50': metrics.percentile(samples, 50) if samples else None,
+            'p95': metrics.percentile(samples, 95) if samples else None,
+            'p99': metrics.percentile(samples, 99) if samples else None,
+            'avg_prompt_tokens': round(prompt_total / token_samples) if token_samples else None,
+            'avg_response_tokens': round(response_total / token_samples) if token_samples else None,
+            'response_tokens_per_question': round(question_tokens / questions, 1) if questions else None,
+        }
+    return stats
+
+
+def model_stats() -> dict:
+    """
+    Per-model summary of the rolling window:
+    {model_name: {'calls', 'error_rate', 'p50', 'p95', 'p99', 'avg_prompt_tokens', 'avg_response_tokens',
+                  'response_tokens_per_question'}}
+    Latency percentiles (ms) are over successful calls only.
+    """
+    rows = AICallLog.objects.values_list(
+        'model_name', 'latency_ms', 'error_type', 'prompt_tokens', 'response_tokens', 'question_count'
+    )
+    return _summarize(rows.iterator())
+
+
+def format_stats() -> dict:
+    """
+    The same summary for quiz-generating calls, per output format version
+    (formats.VERSIONS), to compare output tokens and latency between them.
+    Calls logged before versions were recorded are left out.
+    """
+    rows = AICallLog.objects.filter(
+        operation__in=QUIZ_OPERATIONS
+    ).exclude(prompt_version='').values_list(
+        'prompt_version', 'latency_ms', 'error_type', 'prompt_tokens', 'response_tokens', 'question_count'
+    )
+    return _summarize(rows.iterator())
@@ -0,0 +1,73 @@
+"""
+Tests for the quiz generation cache.
+"""
+from apps.ai_agent import metrics
+from apps.ai_agent.cache import make_cache_key
+from apps.ai_agent.services import QuizGenerator
+
+
+class TestCacheKey:
+    """Tests for cache key normalization."""
+
+    def test_topic_normalization(self):
+        """Whitespace, case and trailing punctuation don't change the key."""
+        a = make_cache_key('quiz', 'gemini-flash-latest', 'Python', 'Decorators', 'intermediate', 5)
+        b = make_cache_key('quiz', 'gemini-flash-latest', 'python ', '  decorators. ', 'Intermediate', 5)
+        assert a == b
+
+    def test_parameters_change_key(self):
+        """Different counts, models or code flags get different keys."""
+        base = make_cache_key('quiz', 'gemini-flash-latest', 'Python', 'Decorators', 'intermediate', 5)
+        assert base != make_cache_key('quiz', 'gemini-flash-latest', 'Python', 'Decorators', 'intermediate', 10)
+        assert base != make_cache_key('quiz', 'gemini-2.5-pro', 'Python', 'Decorators', 'intermediate', 5)
+        assert base != make_cache_key('quiz', 'gemini-flash-latest', 'Python', 'Decorators', 'intermediate', 5, True)
+
+    def test_output_format_changes_key(self, settings):
+        """Quizzes cached under one output format aren't served for another."""
+        settings.AI_QUIZ_OUTPUT_FORMAT = 'compact'
+        compact = make_cache_key('quiz', 'gemini-flash-latest', 'Python', 'Decorators', 'intermediate', 5)
+        settings.AI_QUIZ_OUTPUT_FORMAT = 'verbose'
+        assert compact != make_cache_key('quiz', 'gemini-flash-latest', 'Python', 'Decorators', 'intermediate', 5)
+
+
+class TestGenerationCache:
+    """Tests for cached quiz generation."""
+
+    def test_repeat_request_skips_llm(self, mock_gemini):
+        """Second identical request is served from cache."""
+        generator = QuizGenerator(model_name='gemini-flash-latest')
+        first = generator.generate_quiz('Python', 'Decorators', 'intermediate', 1)
+        second = generator.generate_quiz('python', 'decorators', 'Intermediate', 1)
+
+        assert first == second
+        assert mock_gemini.generate_content.call_count == 1
+        assert metrics.get('cache.miss') == 1
+        assert metrics.get('cache.hit.memory') == 1
+
+    def test_backend_tier_survives_memory_eviction(self, mock_gemini):
+        """Entries dropped from the LRU are still found in the shared backend."""
+        from apps.ai_agent.cache import get_generation_cache
+
+        generator = QuizGenerator(model_name='gemini-flash-latest')
+        generator.generate_quiz('Python', 'Decorators', 'intermediate', 1)
+        get_generation_cache()._lru.clear()
+
+        generator.generate_quiz('Python', 'Decorators', 'intermediate', 1)
+        assert mock_gemini.generate_content.call_count == 1
+        assert metrics.get('cache.hit.backend') == 1
+
+    def test_fresh_opt_out(self, mock_gemini):
+        """use_cache=False always calls the model."""
+        generator = QuizGenerator(model_name='gemini-flash-latest')
+        generator.generate_quiz('Python', 'Decorators', 'intermediate', 1)
+        generator.generate_quiz('Python', 'Decorators', 'intermediate', 1, use_cache=False)
+        assert mock_gemini.generate_content.call_count == 2
+
+    def test_errors_not_cached(self, mock_gemini, settings):
+        """Failed generations are not stored."""
+        settings.AI_FALLBACK_ENABLED = False
+        mock_gemini.generate_content.side_effect = Exception('429 quota exceeded')
+        generator = QuizGenerator(model_name='gemini-flash-latest')
+        assert not generator.generate_quiz('Python', 'Decorators', 'intermediate', 1)
+        assert not generator.generate_quiz('Python', 'Decorators', 'intermediate', 1)
+        assert mock_gemini.generate_content.call_count == 2
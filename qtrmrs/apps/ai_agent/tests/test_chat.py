@@ -0,0 +1,74 @@
+"""
+Tests for the chat agent's quiz generation.
+"""
+import json
+from types import SimpleNamespace
+
+from django.urls import reverse
+from apps.ai_agent import metrics
+from apps.quizzes.models import Quiz
+
+
+CHAT_RESPONSE = json.dumps({
+    'subject': 'History',
+    'topic': 'Ancient Rome',
+    'level': 'Beginner',
+    'questions': [{
+        'text': 'Who was the first Roman emperor?',
+        'options': ['Augustus', 'Nero', 'Caesar', 'Trajan'],
+        'correct_answer': 'Augustus',
+        'explanation': 'Augustus ruled from 27 BC.'
+    }]
+})
+
+
+class TestChatQuizGeneration:
+    """Tests for process_chat_message."""
+
+    def test_single_call_parses_and_generates(self, authenticated_client, mock_gemini, settings):
+        """Combined mode needs exactly one model call per chat message."""
+        settings.AI_CHAT_MODE = 'combined'
+        mock_gemini.generate_content.return_value = SimpleNamespace(text=CHAT_RESPONSE)
+
+        response = authenticated_client.post(reverse('chat_process'), {
+            'message': 'Quiz me on ancient Rome', 'num_questions': '1'
+        })
+
+        quiz = Quiz.objects.get()
+        assert response['HX-Redirect'] == f"/quiz/play/{quiz.id}/"
+        assert quiz.topic_description == 'History: Ancient Rome'
+        assert quiz.difficulty == 'beginner'
+        assert mock_gemini.generate_content.call_count == 1
+        assert metrics.timing_summary('chat.single_call')['count'] == 1
+
+    def test_two_step_mode(self, authenticated_client, mock_gemini, settings):
+        """The two-step path parses intent, then generates."""
+        settings.AI_CHAT_MODE = 'two_step'
+        intent = SimpleNamespace(text=json.dumps({
+            'subject': 'History', 'topic': 'Ancient Rome', 'level': 'Beginner', 'count': 1
+        }))
+        mock_gemini.generate_content.side_effect = [intent, SimpleNamespace(text=CHAT_RESPONSE)]
+
+        authenticated_client.post(reverse('chat_process'), {
+            'message': 'Quiz me on ancient Rome', 'num_questions': '1'
+        })
+
+        assert Quiz.objects.get().topic_description == 'History: Ancient Rome'
+        assert mock_gemini.generate_content.call_count == 2
+        assert metrics.timing_summary('chat.two_step')['count'] == 1
+
+    def test_fresh_toggle_skips_cache(self, authenticated_client, mock_gemini, settings):
+        """The chat form's "Always fresh" toggle regenerates instead of reusing a cached quiz."""
+        settings.AI_CHAT_MODE = 'combined'
+        settings.AI_ROUTER_OVERRIDE = 'gemini-flash-latest'
+        mock_gemini.generate_content.return_value = SimpleNamespace(text=CHAT_RESPONSE)
+        # Parsed locally, so the generation goes through the cache
+        form = {'message': 'beginner history quiz on ancient rome', 'num_questions': '1'}
+
+        assert b'name="fresh"' in authenticated_client.get(reverse('chat_interface')).content
+        authenticated_client.post(reverse('chat_process'), form)
+        authenticated_client.post(reverse('chat_process'), form)
+        assert mock_gemini.generate_content.call_count == 1
+
+        authenticated_client.post(reverse('chat_process'), {**form, 'fresh': 'on'})
+        assert mock_gemini.generate_content.call_count == 2
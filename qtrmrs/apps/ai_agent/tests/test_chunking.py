@@ -0,0 +1,95 @@
+"""
+Tests for parallel chunked generation of large quizzes.
+"""
+import json
+from types import SimpleNamespace
+
+from apps.ai_agent import breaker, chunking, client, fake_backend
+from apps.ai_agent.cache import get_generation_cache, make_cache_key
+from apps.ai_agent.services import QuizGenerator
+
+
+def _question(text, options=('1', '2', '3', '4')):
+    return {'text': text, 'code_snippet': '', 'options': list(options), 'correct_answer': options[0], 'explanation': ''}
+
+
+class TestPlanning:
+    """Tests for splitting and de-duplicating."""
+
+    def test_large_quizzes_are_split_evenly(self, settings):
+        settings.AI_CHUNK_SIZE = 5
+        settings.AI_CHUNK_MAX_PARALLEL = 4
+
+        assert chunking.plan(20) == [5, 5, 5, 5]
+        assert chunking.plan(14) == [5, 5, 4]
+        assert chunking.plan(5) == [5]
+
+    def test_disabled(self, settings):
+        settings.AI_CHUNKED_GENERATION_ENABLED = False
+
+        assert chunking.plan(20) == [20]
+
+    def test_dedupe_drops_near_identical_questions(self):
+        questions = [
+            _question('Which keyword defines a function in Python?'),
+            _question('In Python, which keyword defines a function'),
+            _question('Which keyword defines a class in Python?'),
+        ]
+
+        assert [q['text'] for q in chunking.dedupe(questions)] == [
+            'Which keyword defines a function in Python?', 'Which keyword defines a class in Python?',
+        ]
+
+
+class TestChunkedGeneration:
+    """Tests for generate_quiz on large quizzes."""
+
+    def test_sub_requests_are_merged(self, db, settings, monkeypatch):
+        settings.AI_BACKEND = 'fake'
+        settings.AI_FAKE_LATENCY = 0
+        settings.AI_FAKE_TOKENS_PER_SECOND = 0
+        monkeypatch.setattr(client, '_models', {})
+        breaker.reset()
+        generator = QuizGenerator(model_name='gemini-flash-latest')
+        prompts = []
+        generate = generator.model.generate_content
+        monkeypatch.setattr(generator.model, 'generate_content', lambda prompt, **kw: prompts.append(prompt) or generate(prompt, **kw))
+
+        questions = generator.generate_quiz('Python', 'Decorators', 'Expert', 20, use_cache=False)
+
+        assert len(questions) == 20
+        assert len({q['text'] for q in questions}) == 20
+        assert len(prompts) == 4
+        assert all('Generate exactly 5 questions' in prompt for prompt in prompts)
+        assert all(any(focus in prompt for prompt in prompts) for focus in chunking.FOCUS_AREAS[:4])
+        fake_backend.reset()
+
+    def test_duplicates_and_failures_are_topped_up(self, mock_gemini, settings):
+        settings.AI_FALLBACK_ENABLED = False
+
+        def respond(prompt, **kwargs):
+            if 'part 2 of 2' in prompt:
+                raise Exception('504 Deadline Exceeded')
+            prefix = 'Top-up' if 'already contains' in prompt else 'First'
+            return SimpleNamespace(text=json.dumps({'questions': [
+                _question(f'{prefix} question about topic number {n}', options=(f'{prefix}{n}', 'b', 'c', 'd'))
+                for n in range(5)
+            ]}))
+        mock_gemini.generate_content.side_effect = respond
+
+        questions = QuizGenerator(model_name='gemini-flash-latest').generate_quiz('Python', 'Lists', 'Beginner', 10)
+
+        assert len(questions) == 10
+        assert sum(q['text'].startswith('Top-up') for q in questions) == 5
+        assert mock_gemini.generate_content.call_count == 3
+
+    def test_short_quiz_is_not_cached(self, mock_gemini, settings):
+        # Every call returns the same single question, so dedupe can't reach 10
+        settings.AI_FALLBACK_ENABLED = False
+
+        questions = QuizGenerator(model_name='gemini-flash-latest').generate_quiz('Python', 'Lists', 'Beginner', 10)
+
+        assert len(questions) == 1
+        assert mock_gemini.generate_content.call_count == 3
+        cache_key = make_cache_key('quiz', 'gemini-flash-latest', 'Python', 'Lists', 'Beginner', 10, False)
+        assert get_generation_cache().get(cache_key) is None
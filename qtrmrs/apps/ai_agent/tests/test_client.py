@@ -0,0 +1,93 @@
+"""
+Tests for the process-wide Gemini client registry.
+"""
+from unittest.mock import MagicMock
+
+import pytest
+from apps.ai_agent import client
+from apps.quizzes.models import AIModel
+
+
+@pytest.fixture
+def fake_genai(monkeypatch, settings):
+    """Swap the SDK for a mock and start from an empty registry."""
+    settings.GEMINI_API_KEY = 'test-key'
+    genai = MagicMock()
+    genai.GenerativeModel.side_effect = lambda name: MagicMock(name=name)
+    monkeypatch.setattr(client, 'genai', genai)
+    monkeypatch.setattr(client, '_configured_key', None)
+    monkeypatch.setattr(client, '_models', {})
+    return genai
+
+
+class TestModelRegistry:
+    """Tests for get_generative_model."""
+
+    def test_configures_once_and_reuses_models(self, fake_genai):
+        """Repeated lookups share one configuration and one model per name."""
+        flash = client.get_generative_model('gemini-flash-latest')
+
+        assert client.get_generative_model('gemini-flash-latest') is flash
+        assert client.get_generative_model('gemini-pro-latest') is not flash
+        fake_genai.configure.assert_called_once_with(api_key='test-key')
+        assert fake_genai.GenerativeModel.call_count == 2
+
+    def test_aimodel_change_invalidates(self, fake_genai, db):
+        """Saving an AIModel row drops the cached models."""
+        flash = client.get_generative_model('gemini-flash-latest')
+
+        AIModel.objects.create(model_name='gemini-flash-latest', display_name='Flash')
+
+        assert client.get_generative_model('gemini-flash-latest') is not flash
+        fake_genai.configure.assert_called_once()
+
+    def test_change_in_another_process_drops_models(self, fake_genai, db, settings):
+        """get_generative_model also honours another worker's version stamp."""
+        from django.core.cache import caches
+        settings.AI_MODEL_REGISTRY_CHECK_INTERVAL = 0
+        flash = client.get_generative_model('gemini-flash-latest')
+        assert client.get_generative_model('gemini-flash-latest') is flash
+
+        caches[settings.AI_CACHE_ALIAS].set(client.MODELS_VERSION_KEY, 'elsewhere', None)
+
+        assert client.get_generative_model('gemini-flash-latest') is not flash
+
+
+class TestActiveModelNames:
+    """Tests for the cached fallback chain."""
+
+    def test_read_once_until_a_model_changes(self, db, django_assert_num_queries):
+        AIModel.objects.update(is_active=False)
+        AIModel.objects.create(model_name='backup', display_name='Backup', priority=2)
+        AIModel.objects.create(model_name='primary', display_name='Primary', priority=1)
+
+        # The shared version stamp, then the names
+        with django_assert_num_queries(2):
+            assert client.active_model_names() == ['primary', 'backup']
+            assert client.active_model_names() == ['primary', 'backup']
+
+        AIModel.objects.filter(model_name='backup').delete()
+
+        assert client.active_model_names() == ['primary']
+
+    def test_change_in_another_process_is_picked_up(self, db, settings):
+        """A new version stamp in the shared cache reloads the names after the check interval."""
+        from django.core.cache import caches
+        settings.AI_MODEL_REGISTRY_CHECK_INTERVAL = 0
+        AIModel.objects.update(is_active=False)
+        AIModel.objects.create(model_name='primary', display_name='Primary', priority=1)
+        assert client.active_model_names() == ['primary']
+
+        # Another worker's change: the row and the stamp, but no signal here
+        AIModel.objects.filter(model_name='primary').update(is_active=False)
+        caches[settings.AI_CACHE_ALIAS].set(client.MODELS_VERSION_KEY, 'elsewhere', None)
+
+        assert client.active_model_names() == []
+
+    def test_version_checked_at_most_every_interval(self, db, settings, django_assert_num_queries):
+        """Within the interval neither the stamp nor the names are read again."""
+        settings.AI_MODEL_REGISTRY_CHECK_INTERVAL = 60
+        client.active_model_names()
+
+        with django_assert_num_queries(0):
+            client.active_model_names()
@@ -0,0 +1,130 @@
+"""
+Tests for concurrent explanation generation.
+"""
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+from django.urls import reverse
+from apps.ai_agent.services import QuizGenerator
+from apps.quizzes.models import ExplanationMemo, UserAnswer
+
+
+def explanation_items(count):
+    return [
+        {'question_text': f'Q{i}', 'user_answer': 'A', 'correct_answer': 'B'}
+        for i in range(count)
+    ]
+
+
+class TestGenerateExplanations:
+    """Tests for QuizGenerator.generate_explanations."""
+
+    def test_runs_concurrently_with_cap(self, mock_gemini):
+        """Calls overlap but never exceed the concurrency cap."""
+        lock = threading.Lock()
+        state = {'active': 0, 'peak': 0}
+
+        def slow_call(prompt, **kwargs):
+            with lock:
+                state['active'] += 1
+                state['peak'] = max(state['peak'], state['active'])
+            time.sleep(0.05)
+            with lock:
+                state['active'] -= 1
+            return SimpleNamespace(text='Explained.')
+
+        mock_gemini.generate_content.side_effect = slow_call
+        generator = QuizGenerator(model_name='gemini-flash-latest')
+
+        results = generator.generate_explanations(explanation_items(6), max_concurrency=3, timeout=5)
+
+        assert results == ['Explained.'] * 6
+        assert state['peak'] == 3
+
+    def test_timeouts_return_none(self, mock_gemini):
+        """Calls that exceed the timeout come back as None."""
+        def hanging_call(prompt, **kwargs):
+            time.sleep(0.5)
+            return SimpleNamespace(text='Too late.')
+
+        mock_gemini.generate_content.side_effect = hanging_call
+        generator = QuizGenerator(model_name='gemini-flash-latest')
+
+        assert generator.generate_explanations(explanation_items(2), timeout=0.1) == [None, None]
+
+
+class TestExplainAllView:
+    """Tests for the explain-all view."""
+
+    def test_saves_all_explanations(self, authenticated_client, quiz, mock_gemini):
+        """Every wrong/skipped answer gets an explanation."""
+        mock_gemini.generate_content.return_value = SimpleNamespace(text='Explained.')
+        for question in quiz.questions.all():
+            UserAnswer.objects.create(quiz=quiz, question=question, selected_option=None)
+
+        response = authenticated_client.post(reverse('generate_all_explanations', args=[quiz.id]))
+
+        assert response.status_code == 200
+        assert set(UserAnswer.objects.filter(quiz=quiz).values_list('error_explanation', flat=True)) == {'Explained.'}
+
+
+class TestExplanationMemo:
+    """Tests for memoized explanations."""
+
+    def answer_all_skipped(self, quiz):
+        for question in quiz.questions.all():
+            UserAnswer.objects.create(quiz=quiz, question=question, selected_option=None)
+
+    def test_retry_reuses_explanations_without_llm_calls(self, authenticated_client, quiz, mock_gemini):
+        """Explaining the same mistakes after a retry costs zero model calls."""
+        mock_gemini.generate_content.return_value = SimpleNamespace(text='Explained.')
+        url = reverse('generate_all_explanations', args=[quiz.id])
+        self.answer_all_skipped(quiz)
+        authenticated_client.post(url)
+        calls = mock_gemini.generate_content.call_count
+        assert ExplanationMemo.objects.count() == 2
+
+        authenticated_client.post(reverse('retry_quiz', args=[quiz.id]))
+        self.answer_all_skipped(quiz)
+        authenticated_client.post(url)
+
+        assert mock_gemini.generate_content.call_count == calls
+        assert set(UserAnswer.objects.filter(quiz=quiz).values_list('error_explanation', flat=True)) == {'Explained.'}
+
+    def test_failed_explanations_are_not_memoized(self, authenticated_client, quiz, mock_gemini):
+        """Error placeholders are shown but retried on the next request."""
+        mock_gemini.generate_content.side_effect = Exception('boom')
+        self.answer_all_skipped(quiz)
+
+        authenticated_client.post(reverse('generate_all_explanations', args=[quiz.id]))
+
+        assert not ExplanationMemo.objects.exists()
+        assert UserAnswer.objects.filter(quiz=quiz, error_explanation='').count() == 0
+
+
+class TestBatchExplanations:
+    """Tests for QuizGenerator.generate_explanations_batch."""
+
+    def test_single_call_for_all_items(self, mock_gemini):
+        """A complete batch response needs exactly one model call."""
+        mock_gemini.generate_content.return_value = SimpleNamespace(text=json.dumps({
+            'explanations': [{'id': 1, 'explanation': 'One.'}, {'id': 2, 'explanation': 'Two.'}]
+        }))
+        items = [dict(item, id=index + 1) for index, item in enumerate(explanation_items(2))]
+        generator = QuizGenerator(model_name='gemini-flash-latest')
+
+        assert generator.generate_explanations_batch(items) == ['One.', 'Two.']
+        assert mock_gemini.generate_content.call_count == 1
+
+    def test_partial_batch_falls_back_per_item(self, mock_gemini):
+        """Items missing from the batch response are explained individually."""
+        batch = SimpleNamespace(text=json.dumps({'explanations': [{'id': '1', 'explanation': 'One.'}]}))
+        single = SimpleNamespace(text='Fallback.')
+        mock_gemini.generate_content.side_effect = [batch, single]
+        items = [dict(item, id=index + 1) for index, item in enumerate(explanation_items(2))]
+        generator = QuizGenerator(model_name='gemini-flash-latest')
+
+        assert generator.generate_explanations_batch(items) == ['One.', 'Fallback.']
+        assert mock_gemini.generate_content.call_count == 2
@@ -0,0 +1,85 @@
+"""
+Tests for the offline fake AI backend (AI_BACKEND='fake').
+"""
+import pytest
+from apps.ai_agent import breaker, client, fake_backend
+from apps.ai_agent.services import QuizGenerator, AIError, FailedExplanation
+
+
+@pytest.fixture
+def fake(db, settings, monkeypatch):
+    """A QuizGenerator on the fake backend with no simulated latency."""
+    settings.AI_BACKEND = 'fake'
+    settings.AI_FAKE_LATENCY = 0
+    settings.AI_FAKE_TOKENS_PER_SECOND = 0
+    settings.AI_FAKE_ERROR_RATE = 0
+    settings.AI_FALLBACK_ENABLED = False
+    monkeypatch.setattr(client, '_models', {})
+    breaker.reset()
+    fake_backend.reset()
+    yield QuizGenerator(model_name='gemini-flash-latest')
+    breaker.reset()
+
+
+class TestFakeBackend:
+    """Tests for canned responses through the real QuizGenerator."""
+
+    def test_selected_by_setting(self, fake):
+        assert isinstance(fake.model, fake_backend.FakeGenerativeModel)
+
+    def test_quiz_is_valid_and_deterministic(self, fake):
+        questions = fake.generate_quiz('Python', 'Decorators', 'Expert', 3, include_code=True, use_cache=False)
+
+        assert len(questions) == 3
+        for question in questions:
+            assert len(question['options']) == 4
+            assert question['correct_answer'] in question['options']
+            assert question['code_snippet']
+        assert questions == fake.generate_quiz('Python', 'Decorators', 'Expert', 3, include_code=True, use_cache=False)
+
+    def test_chat_quiz_reads_the_message(self, fake):
+        params, questions = fake.generate_chat_quiz('4 hard questions about history', num_questions=4, use_cache=False)
+
+        assert params['subject'] == 'History'
+        assert params['level'] == 'Expert'
+        assert len(questions) == 4
+
+    def test_batch_explanations_cover_every_item(self, fake):
+        items = [
+            {'id': 1, 'question_text': 'Q1', 'user_answer': 'a', 'correct_answer': 'b'},
+            {'id': 2, 'question_text': 'Q2', 'user_answer': 'c', 'correct_answer': 'd'},
+        ]
+
+        explanations = fake.generate_explanations_batch(items)
+
+        assert all(explanations)
+        assert "'d'" in explanations[1]
+
+    def test_reports_token_usage(self, fake, settings):
+        settings.AI_FAKE_TOKENS_PER_QUESTION = 100
+        prompt = fake._build_quiz_prompt('Python', 'Lists', 'Beginner', 5, False)
+
+        response = fake.model.generate_content(prompt)
+
+        assert response.usage_metadata.candidates_token_count == 500
+
+
+class TestFailureInjection:
+    """Tests for simulated errors and latency."""
+
+    def test_error_rate(self, fake, settings):
+        settings.AI_FAKE_ERROR_RATE = 1.0
+        settings.AI_FAKE_ERROR_TYPES = ['quota']
+
+        result = fake.generate_quiz('Python', 'Lists', 'Beginner', 2, use_cache=False)
+
+        assert isinstance(result, AIError)
+        assert result.error_type == 'quota'
+
+    def test_slow_call_hits_request_timeout(self, fake, settings):
+        settings.AI_FAKE_LATENCY = 0.05
+        settings.AI_FAKE_LATENCY_SIGMA = 0
+
+        explanation = fake.generate_explanation('Q', 'a', 'b', timeout=0.01)
+
+        assert isinstance(explanation, FailedExplanation)
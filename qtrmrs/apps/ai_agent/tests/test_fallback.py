@@ -0,0 +1,98 @@
+"""
+Tests for per-model circuit breakers and the AIModel fallback chain.
+"""
+import json
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+from google.api_core.exceptions import ResourceExhausted
+from apps.ai_agent import breaker
+from apps.ai_agent.services import QuizGenerator, classify_error
+from apps.quizzes.models import AIModel
+
+QUIZ_JSON = json.dumps({'questions': [{
+    'text': 'Q?', 'options': ['a', 'b', 'c', 'd'], 'correct_answer': 'a', 'explanation': ''
+}]})
+
+
+@pytest.fixture
+def models(db, settings):
+    """A failing primary model and a healthy fallback, one mock per model name."""
+    settings.AI_BREAKER_FAILURE_THRESHOLD = 2
+    settings.AI_BREAKER_COOLDOWN = 60
+    breaker.reset()
+    AIModel.objects.update(is_active=False)
+    AIModel.objects.create(model_name='primary', display_name='Primary', priority=1)
+    AIModel.objects.create(model_name='backup', display_name='Backup', priority=2)
+
+    primary = MagicMock()
+    primary.generate_content.side_effect = Exception('429 quota exceeded')
+    backup = MagicMock()
+    backup.generate_content.return_value = SimpleNamespace(text=QUIZ_JSON)
+    by_name = {'primary': primary, 'backup': backup}
+
+    with patch('apps.ai_agent.services.get_generative_model', side_effect=by_name.__getitem__):
+        yield SimpleNamespace(primary=primary, backup=backup)
+
+
+class TestModelFallback:
+    """Tests for QuizGenerator._generate."""
+
+    def test_quota_error_retried_on_next_model(self, models):
+        """The user gets a quiz from the backup instead of an error."""
+        questions = QuizGenerator(model_name='primary').generate_quiz('Python', 'Lists', 'Beginner', 1, use_cache=False)
+
+        assert len(questions) == 1
+        assert models.backup.generate_content.call_count == 1
+
+    def test_open_breaker_skips_model(self, models):
+        """After the failure threshold the primary isn't called at all."""
+        generator = QuizGenerator(model_name='primary')
+        for _ in range(3):
+            generator.generate_quiz('Python', 'Lists', 'Beginner', 1, use_cache=False)
+
+        assert models.primary.generate_content.call_count == 2
+        assert breaker.get_breaker('primary').state == breaker.OPEN
+
+    def test_half_open_probe_closes_on_success(self, models, settings):
+        """After the cooldown one probe goes through and closes the breaker."""
+        generator = QuizGenerator(model_name='primary')
+        for _ in range(2):
+            generator.generate_quiz('Python', 'Lists', 'Beginner', 1, use_cache=False)
+        settings.AI_BREAKER_COOLDOWN = 0
+        models.primary.generate_content.side_effect = None
+        models.primary.generate_content.return_value = SimpleNamespace(text=QUIZ_JSON)
+
+        generator.generate_quiz('Python', 'Lists', 'Beginner', 1, use_cache=False)
+
+        assert models.primary.generate_content.call_count == 3
+        assert breaker.get_breaker('primary').state == breaker.CLOSED
+
+    def test_auth_errors_are_not_retried(self, models):
+        """Errors that every model would hit return an AIError straight away."""
+        models.primary.generate_content.side_effect = Exception('403 API key not valid')
+
+        result = QuizGenerator(model_name='primary').generate_quiz('Python', 'Lists', 'Beginner', 1, use_cache=False)
+
+        assert result.error_type == 'auth'
+        models.backup.generate_content.assert_not_called()
+
+
+class TestClassifyError:
+    """Tests for which errors count as quota failures."""
+
+    @pytest.mark.parametrize('error', [
+        Exception('429 Too Many Requests'),
+        Exception('Rate limit reached for requests'),
+        Exception('RESOURCE_EXHAUSTED: out of capacity'),
+        ResourceExhausted('try later'),
+    ])
+    def test_quota(self, error):
+        assert classify_error(error) == 'quota'
+
+    @pytest.mark.parametrize('message', [
+        'Failed to generate content', 'Response was not accurate', 'moderate load, try again',
+    ])
+    def test_words_containing_rate_are_not_quota(self, message):
+        assert classify_error(Exception(message)) == 'unknown'
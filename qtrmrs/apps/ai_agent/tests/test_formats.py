@@ -0,0 +1,87 @@
+"""
+Tests for the compact and verbose quiz output formats.
+"""
+import json
+
+from apps.ai_agent import client, fake_backend, formats, telemetry
+from apps.ai_agent.services import QuizGenerator
+from apps.quizzes.models import AICallLog
+
+QUESTION = {
+    'text': 'What does len([1, 2]) return?',
+    'code_snippet': 'len([1, 2])',
+    'options': ['1', '2', '3', 'Error'],
+    'correct_answer': '2',
+    'explanation': 'len() counts the items in the list.',
+}
+
+
+class TestParsing:
+    """Tests for converting between the formats."""
+
+    def test_compact_round_trip(self):
+        compact = formats.compact_question(QUESTION)
+
+        assert compact['a'] == 1
+        assert formats.expand_question(compact) == QUESTION
+
+    def test_bad_answer_index_is_dropped(self):
+        items = [{'t': 'Q', 'o': ['a', 'b'], 'a': 4, 'e': ''}, formats.compact_question(QUESTION)]
+
+        assert formats.parse_questions({'q': items}) == [QUESTION]
+
+    def test_answer_outside_options_is_not_compacted(self):
+        """No index is invented for an answer that isn't an option."""
+        assert formats.compact_question({**QUESTION, 'correct_answer': '4'}) is None
+
+    def test_verbose_questions_pass_through(self):
+        assert formats.parse_questions({'questions': [QUESTION]}) == [QUESTION]
+
+
+class TestGeneration:
+    """Tests for the format QuizGenerator asks for."""
+
+    def test_compact_sends_schema(self, mock_gemini, settings):
+        settings.AI_QUIZ_OUTPUT_FORMAT = 'compact'
+        mock_gemini.generate_content.return_value.text = json.dumps({'q': [formats.compact_question(QUESTION)]})
+
+        questions = QuizGenerator(model_name='gemini-flash-latest').generate_quiz('Python', 'Lists', 'Beginner', 1)
+
+        assert questions == [QUESTION]
+        config = mock_gemini.generate_content.call_args.kwargs['generation_config']
+        assert config['response_schema'] == formats.QUIZ_SCHEMA
+
+    def test_verbose_sends_no_schema(self, mock_gemini, settings):
+        settings.AI_QUIZ_OUTPUT_FORMAT = 'verbose'
+
+        questions = QuizGenerator(model_name='gemini-flash-latest').generate_quiz('Python', 'Lists', 'Beginner', 1)
+
+        assert questions[0]['correct_answer'] == '2'
+        config = mock_gemini.generate_content.call_args.kwargs['generation_config']
+        assert 'response_schema' not in config
+
+    def test_version_is_recorded(self, mock_gemini, settings):
+        settings.AI_QUIZ_OUTPUT_FORMAT = 'verbose'
+        QuizGenerator(model_name='gemini-flash-latest').generate_quiz('Python', 'Lists', 'Beginner', 1)
+
+        telemetry.flush()
+
+        assert AICallLog.objects.get().prompt_version == 'verbose-1'
+        assert telemetry.format_stats()['verbose-1']['calls'] == 1
+
+    def test_fake_backend_answers_compact_with_fewer_tokens(self, db, settings, monkeypatch):
+        settings.AI_BACKEND = 'fake'
+        settings.AI_FAKE_LATENCY = 0
+        settings.AI_FAKE_TOKENS_PER_SECOND = 0
+        monkeypatch.setattr(client, '_models', {})
+        generator = QuizGenerator(model_name='gemini-flash-latest')
+        prompt = generator._build_quiz_prompt('Python', 'Lists', 'Beginner', 3, False, formats.COMPACT)
+
+        verbose = generator.model.generate_content(prompt)
+        compact = generator.model.generate_content(prompt, generation_config=formats.generation_config(formats.COMPACT))
+
+        expanded = formats.parse_questions(json.loads(compact.text))
+        original = json.loads(verbose.text)['questions']
+        assert [(q['text'], q['correct_answer']) for q in expanded] == [(q['text'], q['correct_answer']) for q in original]
+        assert compact.usage_metadata.candidates_token_count < verbose.usage_metadata.candidates_token_count
+        fake_backend.reset()
@@ -0,0 +1,79 @@
+"""
+Tests for the rule-based intent parser.
+"""
+import pytest
+
+from apps.ai_agent import intent
+from apps.ai_agent.intent import parse_message
+from apps.ai_agent.services import QuizGenerator
+
+
+class TestParseMessage:
+    """Tests for parse_message."""
+
+    def test_count_level_and_topic(self):
+        """Counts, difficulty keywords and 'on <topic>' are read locally."""
+        parsed = parse_message('10 expert questions on ancient rome')
+
+        assert (parsed.topic, parsed.level, parsed.count) == ('Ancient Rome', 'Expert', 10)
+        assert parsed.confidence >= 0.6
+
+    def test_known_language(self):
+        """Languages from the languages page are recognized as subjects."""
+        parsed = parse_message('give me five easy c++ questions on templates')
+
+        assert (parsed.subject, parsed.topic, parsed.level, parsed.count) == ('C++', 'Templates', 'Beginner', 5)
+
+    def test_numbers_inside_topic_are_kept(self):
+        """Only the question count is stripped, not numbers in the topic."""
+        parsed = parse_message('3 questions about world war 2')
+
+        assert (parsed.topic, parsed.count) == ('World War 2', 3)
+
+    def test_count_is_the_number_before_questions(self):
+        """A number inside the topic is neither the count nor removed."""
+        parsed = parse_message('quiz me on world war 2 please, 3 questions, beginner')
+
+        assert (parsed.topic, parsed.count, parsed.level) == ('World War 2', 3, 'Beginner')
+
+    @pytest.mark.parametrize('message', [
+        '5 questions about python, not too easy',
+        'quiz me on the french revolution but not too hard, 5 questions',
+        '20 easy questions about the history of java island',
+    ])
+    def test_messages_the_rules_would_misread_go_to_the_llm(self, message):
+        """Qualifiers and subjects inside the topic aren't guessed at."""
+        assert parse_message(message) is None
+        assert intent.confident_intent(message) is None
+
+    def test_vague_message_has_low_confidence(self):
+        """Rambling requests are left for the LLM."""
+        parsed = parse_message('I want questions about the thing my teacher said yesterday about cells in class')
+
+        assert parsed.confidence < 0.6
+
+
+class TestLocalIntentFastPath:
+    """Tests for QuizGenerator's use of the local parser."""
+
+    def test_confident_message_skips_llm(self, mock_gemini):
+        """A clear message is parsed without a Gemini call."""
+        generator = QuizGenerator(model_name='gemini-flash-latest')
+
+        params = generator.parse_general_intent('10 expert history questions on ancient rome')
+
+        assert params == {'subject': 'History', 'topic': 'Ancient Rome', 'level': 'Expert', 'count': 10}
+        mock_gemini.generate_content.assert_not_called()
+        assert intent.stats()['hit_rate'] == 1.0
+
+    def test_low_confidence_falls_back_to_llm(self, mock_gemini, settings):
+        """Below the threshold, the LLM intent prompt is used."""
+        settings.AI_INTENT_CONFIDENCE_THRESHOLD = 1.1
+        mock_gemini.generate_content.return_value.text = (
+            '{"language": "Python", "topic": "Lists", "level": "Beginner", "count": 5}'
+        )
+        generator = QuizGenerator(model_name='gemini-flash-latest')
+
+        assert generator.parse_intent('python lists')['topic'] == 'Lists'
+        assert mock_gemini.generate_content.call_count == 1
+        assert intent.stats() == {'local_hits': 0, 'llm_fallbacks': 1, 'hit_rate': 0.0}
@@ -0,0 +1,101 @@
+"""
+Tests for the default-model router.
+"""
+import pytest
+from django.urls import reverse
+from apps.ai_agent import breaker
+from apps.ai_agent.router import choose_model, resolve_model
+from apps.quizzes.models import AIModel, Quiz
+
+
+@pytest.fixture
+def models(db, settings):
+    """Three active models: 'slow' is the default and the priciest."""
+    settings.AI_ROUTER_OVERRIDE = ''
+    settings.AI_ROUTER_EXPLORE_RATE = 0
+    breaker.reset()
+    AIModel.objects.update(is_active=False)
+    AIModel.objects.create(model_name='slow', display_name='Slow', is_default=True, relative_cost=30)
+    AIModel.objects.create(model_name='fast', display_name='Fast', relative_cost=20)
+    AIModel.objects.create(model_name='cheap', display_name='Cheap', relative_cost=1)
+    breaker.get_breaker('slow').record_success(4.0)
+    breaker.get_breaker('fast').record_success(1.0)
+    breaker.get_breaker('cheap').record_success(2.0)
+    yield
+    breaker.reset()
+
+
+class TestPolicies:
+    """Tests for the built-in routing policies."""
+
+    def test_fastest(self, models, settings):
+        settings.AI_ROUTER_POLICY = 'fastest'
+        assert choose_model()[1] == 'fast'
+
+    def test_unmeasured_model_is_tried_first(self, models, settings):
+        """A new model gets a latency reading instead of being ranked last forever."""
+        settings.AI_ROUTER_POLICY = 'fastest'
+        AIModel.objects.create(model_name='new', display_name='New', priority=200)
+
+        assert choose_model()[1] == 'new'
+
+    def test_close_latencies_go_to_the_default(self, models, settings):
+        settings.AI_ROUTER_POLICY = 'fastest'
+        breaker.get_breaker('slow').latency_ewma = 1.1  # within 20% of 'fast'
+
+        assert choose_model()[1] == 'slow'
+
+    def test_exploration_reaches_slower_models(self, models, settings):
+        settings.AI_ROUTER_POLICY = 'fastest'
+        settings.AI_ROUTER_EXPLORE_RATE = 1
+
+        assert {choose_model()[1] for _ in range(50)} == {'slow', 'fast', 'cheap'}
+
+    def test_unhealthy_models_are_skipped(self, models, settings):
+        """An open breaker takes a model out of the running."""
+        settings.AI_ROUTER_POLICY = 'fastest'
+        settings.AI_BREAKER_FAILURE_THRESHOLD = 1
+        breaker.get_breaker('fast').record_failure()
+
+        assert choose_model()[1] == 'cheap'
+
+    def test_cheapest(self, models, settings):
+        settings.AI_ROUTER_POLICY = 'cheapest'
+        assert choose_model()[1] == 'cheap'
+
+    def test_round_robin_visits_every_model(self, models, settings):
+        settings.AI_ROUTER_POLICY = 'round_robin'
+        assert {choose_model()[1] for _ in range(3)} == {'slow', 'fast', 'cheap'}
+
+    def test_default_policy(self, models, settings):
+        settings.AI_ROUTER_POLICY = 'default'
+        ai_model, model_name = choose_model()
+        assert ai_model.is_default and model_name == 'slow'
+
+
+class TestRouterInViews:
+    """Tests for routing when the user leaves the model on Auto."""
+
+    def test_override_is_deterministic(self, authenticated_client, mock_gemini, models, settings):
+        settings.AI_ROUTER_OVERRIDE = 'cheap'
+
+        authenticated_client.post(reverse('create_quiz'), {
+            'topic': 'Lists', 'language_select': 'Python', 'level': 'Beginner', 'num_questions': '1', 'ai_model': ''
+        })
+
+        quiz = Quiz.objects.get()
+        assert quiz.model_used == 'cheap'
+        assert quiz.ai_model.model_name == 'cheap'
+
+    def test_explicit_choice_beats_router(self, authenticated_client, mock_gemini, models, settings):
+        """Both the setup form and the chat honour a selected model over the router."""
+        settings.AI_ROUTER_OVERRIDE = 'cheap'
+        slow = AIModel.objects.get(model_name='slow')
+
+        assert resolve_model(str(slow.id)) == (slow, 'slow')
+        assert resolve_model('not-an-id')[1] == 'cheap'
+        authenticated_client.post(reverse('chat_process'), {
+            'message': 'Quiz me on the Roman Empire', 'num_questions': '1', 'ai_model': slow.id
+        })
+        assert mock_gemini.generate_content.called
+        assert Quiz.objects.get().model_used == 'slow'
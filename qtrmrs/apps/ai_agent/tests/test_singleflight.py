@@ -0,0 +1,107 @@
+"""
+Tests for single-flight coalescing of identical generations.
+"""
+import asyncio
+import threading
+
+import pytest
+from asgiref.sync import async_to_sync
+from apps.ai_agent import singleflight
+from apps.ai_agent.cache import get_generation_cache
+
+
+def run_concurrently(count, target):
+    results = [None] * count
+
+    def worker(index):
+        results[index] = target()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+    return results
+
+
+class TestSingleFlight:
+    """Tests for singleflight.do."""
+
+    def test_concurrent_callers_share_one_call(self):
+        """Only the leader runs; followers get their own copy of its result."""
+        calls = []
+        release = threading.Event()
+
+        def generate():
+            calls.append(1)
+            release.wait(timeout=5)
+            return [{'text': 'Q?'}]
+
+        def request():
+            return singleflight.do('quizgen:same', generate)
+
+        timer = threading.Timer(0.2, release.set)
+        timer.start()
+        results = run_concurrently(4, request)
+
+        assert len(calls) == 1
+        assert all(result == [{'text': 'Q?'}] for result in results)
+        assert len({id(result) for result in results}) == 4
+
+    def test_leader_errors_reach_followers(self):
+        release = threading.Event()
+
+        def generate():
+            release.wait(timeout=5)
+            raise RuntimeError('boom')
+
+        def request():
+            try:
+                singleflight.do('quizgen:fails', generate)
+            except RuntimeError as e:
+                return str(e)
+
+        threading.Timer(0.2, release.set).start()
+        assert run_concurrently(2, request) == ['boom', 'boom']
+
+    def test_async_callers_share_one_call(self):
+        calls = []
+
+        async def generate():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return [{'text': 'Q?'}]
+
+        async def burst():
+            return await asyncio.gather(*[singleflight.ado('quizgen:async', generate) for _ in range(3)])
+
+        results = async_to_sync(burst)()
+
+        assert len(calls) == 1
+        assert results == [[{'text': 'Q?'}]] * 3
+
+
+class TestCrossProcess:
+    """Tests for the cache-backend lock shared by workers."""
+
+    @pytest.fixture
+    def backend(self, db, settings, monkeypatch):
+        settings.AI_SINGLEFLIGHT_CROSS_PROCESS = True
+        monkeypatch.setattr(singleflight, 'POLL_INTERVAL', 0)
+        backend = get_generation_cache().backend
+        backend.clear()
+        yield backend
+        backend.clear()
+
+    def test_waits_for_other_worker_result(self, backend):
+        """If another worker holds the lock, its cached result is reused."""
+        backend.add('quizgen:remote:inflight', 1)
+        backend.set('quizgen:remote', [{'text': 'From another worker'}])
+
+        result = singleflight.do('quizgen:remote', lambda: pytest.fail('should not generate'))
+
+        assert result == [{'text': 'From another worker'}]
+
+    def test_lock_released_after_generation(self, backend):
+        assert singleflight.do('quizgen:free', lambda: ['ok']) == ['ok']
+        assert backend.get('quizgen:free:inflight') is None
@@ -0,0 +1,127 @@
+"""
+Tests for streamed quiz generation.
+"""
+import json
+from types import SimpleNamespace
+from apps.ai_agent import metrics, telemetry
+from apps.ai_agent.breaker import get_breaker
+from apps.ai_agent.services import AIError, QuizGenerator
+from apps.ai_agent.streaming import QuestionStreamParser
+
+
+QUESTIONS = [
+    {'text': 'What does {} create in Python?', 'options': ['dict', 'set', 'list', 'tuple'],
+     'correct_answer': 'dict', 'explanation': 'Empty braces make a dict, not a set.'},
+    {'text': 'Escaped "quotes" and \\ backslashes', 'code_snippet': 'print("}")',
+     'options': ['a', 'b', 'c', 'd'], 'correct_answer': 'a', 'explanation': ''},
+]
+
+
+def chunked(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class TestQuestionStreamParser:
+    """Tests for the incremental JSON parser."""
+
+    def test_yields_each_question_when_complete(self):
+        """Questions come out one at a time regardless of chunk boundaries."""
+        document = json.dumps({'questions': QUESTIONS}, indent=2)
+        parser = QuestionStreamParser()
+
+        emitted = []
+        for chunk in chunked(document, 7):
+            emitted.extend(parser.feed(chunk))
+
+        assert emitted == QUESTIONS
+
+    def test_first_question_before_document_ends(self):
+        """The first question is available before the array closes."""
+        document = json.dumps({'questions': QUESTIONS})
+        cut = document.index('{"text": "Escaped')  # Start of the 2nd question
+        parser = QuestionStreamParser()
+
+        assert parser.feed(document[:cut]) == QUESTIONS[:1]
+
+    def test_bare_array(self):
+        """A top-level array of questions is also accepted."""
+        parser = QuestionStreamParser()
+        assert parser.feed(json.dumps(QUESTIONS)) == QUESTIONS
+
+
+class TestStreamQuiz:
+    """Tests for QuizGenerator.stream_quiz."""
+
+    def test_stream_and_time_to_first_question(self, mock_gemini):
+        """Questions are yielded from streamed chunks and TTFQ is recorded."""
+        document = json.dumps({'questions': QUESTIONS})
+        mock_gemini.generate_content.return_value = [
+            SimpleNamespace(text=chunk) for chunk in chunked(document, 20)
+        ]
+
+        generator = QuizGenerator(model_name='gemini-flash-latest')
+        streamed = list(generator.stream_quiz('Python', 'Dicts', 'beginner', 2))
+
+        assert streamed == QUESTIONS
+        assert metrics.timing_summary('quiz.time_to_first_question')['count'] == 1
+
+    def test_stream_error_yields_ai_error(self, mock_gemini):
+        """Failures end the stream with an AIError."""
+        mock_gemini.generate_content.side_effect = Exception('429 quota exceeded')
+
+        generator = QuizGenerator(model_name='gemini-flash-latest')
+        streamed = list(generator.stream_quiz('Python', 'Dicts', 'beginner', 2))
+
+        assert len(streamed) == 1
+        assert isinstance(streamed[0], AIError)
+        assert streamed[0].error_type == 'quota'
+
+    def test_call_recorded_when_drained(self, mock_gemini):
+        """The breaker and telemetry only see the call once the stream ends."""
+        document = json.dumps({'questions': QUESTIONS})
+        mock_gemini.generate_content.return_value = [
+            SimpleNamespace(text=chunk) for chunk in chunked(document, 20)
+        ]
+
+        stream = QuizGenerator(model_name='gemini-flash-latest').stream_quiz('Python', 'Dicts', 'beginner', 2)
+        assert next(stream) == QUESTIONS[0]
+        assert get_breaker('gemini-flash-latest').latency_ewma is None
+        assert telemetry._take_buffer() == []
+
+        assert list(stream) == QUESTIONS[1:]
+        assert get_breaker('gemini-flash-latest').latency_ewma is not None
+        assert [entry.operation for entry in telemetry._take_buffer()] == ['quiz_stream']
+
+    def test_broken_stream_records_failure(self, mock_gemini):
+        """An error mid-stream counts against the model."""
+        def chunks():
+            yield SimpleNamespace(text=json.dumps({'questions': QUESTIONS})[:40])
+            raise Exception('504 Deadline Exceeded')
+        mock_gemini.generate_content.return_value = chunks()
+
+        streamed = list(QuizGenerator(model_name='gemini-flash-latest').stream_quiz('Python', 'Dicts', 'beginner', 2))
+
+        assert isinstance(streamed[-1], AIError)
+        breaker = get_breaker('gemini-flash-latest')
+        assert (breaker.failures, breaker.latency_ewma) == (1, None)
+        assert telemetry._take_buffer()[0].error_type == 'timeout'
+
+
+class TestPersistStream:
+    """Tests for saving streamed questions."""
+
+    def test_persist_marks_quiz_done(self, user, db):
+        """Remaining questions are saved and the quiz stops generating."""
+        from apps.quizzes.models import Quiz
+        from apps.quizzes.streaming import persist_stream
+
+        quiz = Quiz.objects.create(
+            user=user, language='Python', topic_description='Python: Dicts',
+            difficulty='beginner', total_questions=5, is_generating=True
+        )
+        persist_stream(quiz, iter(QUESTIONS))
+
+        quiz.refresh_from_db()
+        assert quiz.is_generating is False
+        assert quiz.total_questions == 2
+        assert quiz.questions.first().options.filter(is_correct=True).get().text == 'dict'
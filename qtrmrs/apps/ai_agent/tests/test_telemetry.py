@@ -0,0 +1,69 @@
+"""
+Tests for persisted per-call AI telemetry.
+"""
+from types import SimpleNamespace
+
+from django.urls import reverse
+from apps.ai_agent import telemetry
+from apps.ai_agent.services import QuizGenerator
+from apps.quizzes.models import AICallLog
+
+
+class TestCallRecording:
+    """Tests for telemetry.record and flush."""
+
+    def test_generation_is_recorded(self, mock_gemini):
+        """A quiz call is stored with its operation, tokens and question count."""
+        mock_gemini.generate_content.return_value.usage_metadata = SimpleNamespace(
+            prompt_token_count=120, candidates_token_count=480
+        )
+        QuizGenerator(model_name='gemini-flash-latest').generate_quiz('Python', 'Lists', 'Beginner', 1)
+
+        assert telemetry.flush() == 1
+        log = AICallLog.objects.get()
+        assert (log.model_name, log.operation, log.question_count) == ('gemini-flash-latest', 'quiz', 1)
+        assert (log.prompt_tokens, log.response_tokens) == (120, 480)
+        assert log.succeeded
+
+    def test_failures_record_error_type(self, mock_gemini, settings):
+        """Failed calls are stored with the classified error."""
+        settings.AI_FALLBACK_ENABLED = False
+        mock_gemini.generate_content.side_effect = Exception('429 quota exceeded')
+        QuizGenerator(model_name='gemini-flash-latest').generate_quiz('Python', 'Lists', 'Beginner', 1)
+
+        telemetry.flush()
+        assert AICallLog.objects.get().error_type == 'quota'
+
+    def test_table_is_a_rolling_window(self, db, settings):
+        """Only the newest AI_TELEMETRY_MAX_ROWS rows are kept."""
+        settings.AI_TELEMETRY_MAX_ROWS = 3
+        for latency in range(5):
+            telemetry.record('m', 'quiz', latency=latency)
+
+        telemetry.flush()
+
+        assert list(AICallLog.objects.order_by('id').values_list('latency_ms', flat=True)) == [2000, 3000, 4000]
+
+
+class TestModelStats:
+    """Tests for the per-model percentiles."""
+
+    def test_percentiles_over_successful_calls(self, db):
+        for latency_ms in range(1, 101):
+            AICallLog.objects.create(model_name='m', operation='quiz', latency_ms=latency_ms)
+        AICallLog.objects.create(model_name='m', operation='quiz', latency_ms=5, error_type='timeout')
+
+        stats = telemetry.model_stats()['m']
+
+        assert (stats['p50'], stats['p95'], stats['p99']) == (51, 95, 99)
+        assert stats['calls'] == 101
+
+    def test_admin_shows_percentiles(self, authenticated_client, user, ai_model):
+        user.is_staff = user.is_superuser = True
+        user.save()
+        AICallLog.objects.create(model_name=ai_model.model_name, operation='quiz', latency_ms=1234)
+
+        response = authenticated_client.get(reverse('admin:quizzes_aimodel_changelist'))
+
+        assert b'P95 (ms)' in response.content
+        assert b'1234' in response.content
@@ -1,7 +1,12 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+# Under ASGI, the AI-bound views can run natively async
+ASYNC = getattr(settings, 'ASYNC_VIEWS_ENABLED', False)
+
 urlpatterns = [
     path('', views.chat_interface, name='chat_interface'),
-    path('send/', views.process_chat_message, name='chat_process'),
+    path('send/', views.process_chat_message_async if ASYNC else views.process_chat_message, name='chat_process'),
+    path('metrics/', views.ai_metrics, name='ai_metrics'),
 ]
\ No newline at end of file
@@ -1,12 +1,20 @@
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_http_methods, require_GET
-from django.db import transaction
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse
+from django.contrib.admin.views.decorators import staff_member_required
 from django.conf import settings
 from django_ratelimit.decorators import ratelimit
-from .services import QuizGenerator
-from apps.quizzes.models import Quiz, Question, Option, AIModel
+from asgiref.sync import sync_to_async
+from apps.core.decorators import async_ratelimit
+from . import breaker, intent, metrics, telemetry
+from .cache import get_generation_cache
+from .router import resolve_model, aresolve_model
+from .services import QuizGenerator, AIError
+from apps.quizzes.builder import InvalidQuizData
+from apps.quizzes.models import AIModel
+from apps.quizzes.jobs import enqueue, aenqueue
+from apps.quizzes.services import generate_chat_quiz, agenerate_chat_quiz, save_general_quiz
 
 
 @login_required
@@ -23,6 +31,47 @@ def chat_interface(request):
     })
 
 
+def _read_chat_form(post):
+    """Returns (message, num_questions, use_cache) from the chat form."""
+    user_message = post.get('message', '')[:500]  # Limit message length
+
+    # Validate num_questions
+    try:
+        num_questions = int(post.get('num_questions', 5))
+        num_questions = min(max(num_questions, 1), 20)  # Clamp between 1-20
+    except (ValueError, TypeError):
+        num_questions = 5
+
+    # "Always fresh" opt-out of the generation cache
+    use_cache = post.get('fresh') != 'on'
+
+    return user_message, num_questions, use_cache
+
+
+def _chat_error(request, questions_data):
+    """Render the chat error bubble for a failed or empty generation."""
+    if isinstance(questions_data, AIError):
+        return render(request, 'ai_agent/partials/chat_error.html', {
+            'message': questions_data.message,
+            'suggestion': questions_data.suggestion
+        })
+    return render(request, 'ai_agent/partials/chat_error.html', {
+        'message': "I couldn't generate a quiz for that.",
+        'suggestion': "Try being more specific or select a different AI model."
+    })
+
+
+def _job_params(user_message, num_questions, use_cache):
+    """GenerationJob.params for a chat message, as read back by apps.quizzes.jobs."""
+    return {'message': user_message, 'num_questions': num_questions, 'use_cache': use_cache}
+
+
+def _redirect_to_player(quiz):
+    response = HttpResponse()
+    response['HX-Redirect'] = f"/quiz/play/{quiz.id}/"
+    return response
+
+
 @login_required
 @ratelimit(key='user', rate='10/m', method='POST', block=True)
 @require_http_methods(["POST"])
@@ -30,102 +79,97 @@ def process_chat_message(request):
     """
     General-purpose quiz generation from chat:
     1. Receives user message + settings
-    2. Parses intent (Subject/Topic/Level)
-    3. Generates general quiz
-    4. Redirects to Player
+    2. Parses intent (Subject/Topic/Level) and generates the general quiz,
+       in a single Gemini call unless AI_CHAT_MODE='two_step'
+    3. Redirects to Player
     """
-    user_message = request.POST.get('message', '')[:500]  # Limit message length
+    user_message, num_questions, use_cache = _read_chat_form(request.POST)
     
     if not user_message.strip():
         return HttpResponse("Please type something.", status=400)
 
-    # Validate num_questions
-    try:
-        num_questions = int(request.POST.get('num_questions', 5))
-        num_questions = min(max(num_questions, 1), 20)  # Clamp between 1-20
-    except (ValueError, TypeError):
-        num_questions = 5
-
     # --- Handle Model Selection ---
-    model_id = request.POST.get('ai_model')
-    ai_model = None
-    model_name = getattr(settings, 'DEFAULT_AI_MODEL', 'gemini-flash-lite-latest')
+    # No (valid) selection means "Auto": the router picks a model
+    ai_model, model_name = resolve_model(request.POST.get('ai_model'))
     
-    if model_id:
-        try:
-            ai_model = AIModel.objects.get(id=model_id, is_active=True)
-            model_name = ai_model.model_name
-        except (AIModel.DoesNotExist, ValueError):
-            pass
+    # Queue mode: a generation worker does the AI call; the chat polls the job
+    if getattr(settings, 'AI_JOB_QUEUE_ENABLED', False):
+        job = enqueue(request.user, 'general', _job_params(user_message, num_questions, use_cache), ai_model, model_name)
+        return render(request, 'quizzes/partials/generation_pending.html', {'job': job})
     
     generator = QuizGenerator(model_name=model_name)
     
-    # 1. Parse Intent for general quiz
-    params = generator.parse_general_intent(user_message)
-    
-    # Override with user's question count selection
-    question_count = num_questions if num_questions else params.get('count', 5)
-    
-    # 2. Generate general-purpose quiz
-    questions_data = generator.generate_general_quiz(
-        subject=params.get('subject', 'General Knowledge')[:100],
-        topic=params.get('topic', 'Trivia')[:200],
-        level=params.get('level', 'Intermediate'),
-        num_questions=question_count
-    )
+    # 1. Parse intent and generate the general-purpose quiz
+    params, questions_data = generate_chat_quiz(generator, user_message, num_questions, use_cache)
 
     # Handle errors with specific messages
     if not questions_data:
-        from .services import AIError
-        if isinstance(questions_data, AIError):
-            return render(request, 'ai_agent/partials/chat_error.html', {
-                'message': questions_data.message,
-                'suggestion': questions_data.suggestion
-            })
-        return render(request, 'ai_agent/partials/chat_error.html', {
-            'message': "I couldn't generate a quiz for that.",
-            'suggestion': "Try being more specific or select a different AI model."
-        })
+        return _chat_error(request, questions_data)
 
-    # 3. Save to DB
-    with transaction.atomic():
-        # Normalize difficulty to lowercase
-        difficulty = params.get('level', 'Intermediate').lower()
-        if difficulty not in ['beginner', 'intermediate', 'expert']:
-            difficulty = 'intermediate'
-        
-        quiz = Quiz.objects.create(
-            user=request.user,
-            quiz_type='general',
-            language=params.get('subject', 'General')[:50],
-            topic_description=f"{params.get('subject')}: {params.get('topic')}"[:255],
-            difficulty=difficulty,
-            total_questions=len(questions_data),
-            ai_model=ai_model,
-            model_used=model_name
-        )
-
-        options_to_create = []
-        for q_data in questions_data:
-            question = Question.objects.create(
-                quiz=quiz,
-                text=q_data.get('text', '')[:2000],
-                code_snippet='',  # No code for general quizzes
-                explanation=q_data.get('explanation', '')
-            )
-            
-            for opt_text in q_data.get('options', []):
-                options_to_create.append(Option(
-                    question=question,
-                    text=str(opt_text)[:255],
-                    is_correct=(str(opt_text) == str(q_data.get('correct_answer', '')))
-                ))
-        
-        # Bulk create options
-        if options_to_create:
-            Option.objects.bulk_create(options_to_create)
-
-    # 4. Redirect to Player
-    response = HttpResponse()
-    response['HX-Redirect'] = f"/quiz/play/{quiz.id}/"
-    return response
+    # 2. Save to DB
+    try:
+        quiz = save_general_quiz(request.user, params, ai_model, model_name, questions_data)
+    except InvalidQuizData:
+        return _chat_error(request, None)
+
+    # 3. Redirect to Player
+    return _redirect_to_player(quiz)
+
+
+@login_required
+@async_ratelimit(key='user', rate='10/m', method='POST', block=True)
+@require_http_methods(["POST"])
+async def process_chat_message_async(request):
+    """
+    Async version of process_chat_message for ASGI deployments
+    (ASYNC_VIEWS_ENABLED). Gemini calls are awaited on the event loop.
+    """
+    user_message, num_questions, use_cache = _read_chat_form(request.POST)
+
+    if not user_message.strip():
+        return HttpResponse("Please type something.", status=400)
+
+    ai_model, model_name = await aresolve_model(request.POST.get('ai_model'))
+
+    if getattr(settings, 'AI_JOB_QUEUE_ENABLED', False):
+        params = _job_params(user_message, num_questions, use_cache)
+        job = await aenqueue(await request.auser(), 'general', params, ai_model, model_name)
+        return render(request, 'quizzes/partials/generation_pending.html', {'job': job})
+
+    generator = QuizGenerator(model_name=model_name)
+
+    params, questions_data = await agenerate_chat_quiz(generator, user_message, num_questions, use_cache)
+
+    if not questions_data:
+        return _chat_error(request, questions_data)
+
+    user = await request.auser()
+    try:
+        quiz = await sync_to_async(save_general_quiz)(user, params, ai_model, model_name, questions_data)
+    except InvalidQuizData:
+        return _chat_error(request, None)
+    return _redirect_to_player(quiz)
+
+
+def _chat_latency_summary():
+    """Single-call vs two-step chat latency, with the median saving when both have samples."""
+    single_call = metrics.timing_summary('chat.single_call')
+    two_step = metrics.timing_summary('chat.two_step')
+    summary = {'single_call': single_call, 'two_step': two_step}
+    if single_call and two_step:
+        summary['p50_saved'] = round(two_step['p50'] - single_call['p50'], 3)
+    return summary
+
+
+@staff_member_required
+@require_GET
+def ai_metrics(request):
+    """Staff-only JSON snapshot of this worker's AI service metrics."""
+    data = metrics.snapshot()
+    data['generation_cache'] = get_generation_cache().stats()
+    data['chat_latency'] = _chat_latency_summary()
+    data['intent_parser'] = intent.stats()
+    data['breakers'] = breaker.snapshot()
+    data['models'] = telemetry.model_stats()
+    data['output_formats'] = telemetry.format_stats()
+    return JsonResponse(data)
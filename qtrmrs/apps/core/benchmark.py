@@ -0,0 +1,247 @@
+"""
+End-to-end benchmark of the main user flows.
+
+Drives the real views through the Django test client with the fake AI
+backend (AI_BACKEND='fake'), so the whole request path - views, ORM,
+templates, generation cache and AI service layer - is measured with
+realistic but offline AI timing:
+
+    quiz         setup -> create -> play every question -> results -> explain-all
+    quick_quiz   guest Quick Quiz -> demo player -> answers -> demo results
+    dashboard    the logged-in dashboard
+
+Each request is timed and its SQL queries counted. run() returns a report
+dict (throughput per flow, p50/p95 and queries per step, peak RSS, commit)
+that `manage.py run_benchmark` prints and saves as JSON for comparing
+commits. Use it inside a test database: it creates users and quizzes.
+"""
+import re
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.ai_agent import breaker, fake_backend
+from apps.ai_agent.metrics import percentile
+from apps.quizzes.models import Question
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+FLOWS = ('quiz', 'quick_quiz', 'dashboard')
+
+# Settings every run uses: offline AI, no rate limits, generation in-request
+BENCHMARK_SETTINGS = {
+    'AI_BACKEND': 'fake',
+    'RATELIMIT_ENABLE': False,
+    'AI_JOB_QUEUE_ENABLED': False,
+    'AI_STREAMING_ENABLED': False,
+    'AI_TELEMETRY_ENABLED': False,
+}
+
+_PLAYER_URL_RE = re.compile(r'/quiz/play/(\d+)/')
+
+
+class Recorder:
+    """Thread-safe collection of per-step timings and query counts."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.steps = {}
+
+    def record(self, step: str, seconds: float, queries: int, ok: bool) -> None:
+        with self._lock:
+            entry = self.steps.setdefault(step, {'latencies': [], 'queries': [], 'errors': 0})
+            entry['latencies'].append(seconds)
+            entry['queries'].append(queries)
+            if not ok:
+                entry['errors'] += 1
+
+    def summary(self) -> dict:
+        with self._lock:
+            steps = dict(self.steps)
+        report = {}
+        for step, entry in steps.items():
+            latencies = sorted(entry['latencies'])
+            report[step] = {
+                'count': len(latencies),
+                'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+                'p95_ms': round(percentile(latencies, 95) * 1000, 1),
+                'mean_queries': round(sum(entry['queries']) / len(entry['queries']), 1),
+                'max_queries': max(entry['queries']),
+                'errors': entry['errors'],
+            }
+        return report
+
+
+def _request(recorder: Recorder, client: Client, step: str, method: str, path: str, data=None):
+    with CaptureQueriesContext(connection) as queries:
+        start = time.perf_counter()
+        response = getattr(client, method)(path, data or {})
+        elapsed = time.perf_counter() - start
+    recorder.record(step, elapsed, len(queries), response.status_code < 400)
+    return response
+
+
+# ==========================================
+# FLOWS
+# ==========================================
+
+def quiz_flow(recorder: Recorder, client: Client, index: int, num_questions: int) -> None:
+    _request(recorder, client, 'quiz_setup', 'get', reverse('quiz_setup'))
+    response = _request(recorder, client, 'create_quiz', 'post', reverse('create_quiz'), {
+        'topic': f'Benchmark topic {index}',
+        'language_select': 'Python',
+        'level': 'Intermediate',
+        'num_questions': str(num_questions),
+        'ai_model': '',
+    })
+    match = _PLAYER_URL_RE.search(response.get('HX-Redirect', ''))
+    if not match:
+        raise RuntimeError(f"create_quiz did not redirect to the player (status {response.status_code})")
+    quiz_id = int(match.group(1))
+
+    _request(recorder, client, 'quiz_player', 'get', reverse('quiz_player', args=[quiz_id]))
+    # Looked up outside the timed requests; the browser already has these ids
+    questions = Question.objects.filter(quiz_id=quiz_id).prefetch_related('options').order_by('position')
+    for number, question in enumerate(questions):
+        options = list(question.options.all())
+        # Alternate first/last option so some answers are wrong and need explaining
+        option = options[0] if number % 2 else options[-1]
+        _request(recorder, client, 'submit_answer', 'post', reverse('submit_answer', args=[quiz_id, question.id]), {
+            'option': option.id, 'time_taken': 10,
+        })
+
+    _request(recorder, client, 'quiz_results', 'get', reverse('quiz_results', args=[quiz_id]))
+    _request(recorder, client, 'explain_all', 'post', reverse('generate_all_explanations', args=[quiz_id]))
+
+
+def quick_quiz_flow(recorder: Recorder, client: Client, index: int, num_questions: int) -> None:
+    anonymous = Client()
+    _request(recorder, anonymous, 'quick_quiz', 'get', reverse('quick_quiz'))
+    while True:
+        demo_quiz = anonymous.session.get('demo_quiz')
+        if not demo_quiz or demo_quiz['current_index'] >= len(demo_quiz['questions']):
+            break
+        _request(recorder, anonymous, 'demo_player', 'get', reverse('demo_player'))
+        question = demo_quiz['questions'][demo_quiz['current_index']]
+        _request(recorder, anonymous, 'demo_submit', 'post', reverse('demo_submit'), {
+            'option': question['options'][0],
+        })
+    _request(recorder, anonymous, 'demo_results', 'get', reverse('demo_results'))
+
+
+def dashboard_flow(recorder: Recorder, client: Client, index: int, num_questions: int) -> None:
+    _request(recorder, client, 'dashboard', 'get', reverse('dashboard'))
+
+
+FLOW_FUNCTIONS = {
+    'quiz': quiz_flow,
+    'quick_quiz': quick_quiz_flow,
+    'dashboard': dashboard_flow,
+}
+
+
+# ==========================================
+# RUNNER
+# ==========================================
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB, or None where unavailable."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KB on Linux, bytes on macOS
+    divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return round(peak / divisor, 1)
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, timeout=5,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _make_clients(concurrency: int) -> list:
+    """One logged-in client per concurrent virtual user."""
+    User = get_user_model()
+    clients = []
+    for number in range(concurrency):
+        user = User.objects.create_user(
+            username=f'bench{number}', email=f'bench{number}@example.com', password='benchmark-pass'
+        )
+        client = Client()
+        client.force_login(user)
+        clients.append(client)
+    return clients
+
+
+def run(flows=FLOWS, iterations: int = 10, concurrency: int = 1, num_questions: int = 5, **fake_settings) -> dict:
+    """
+    Run every flow `iterations` times with `concurrency` virtual users and
+    return the report. Keyword arguments override settings for the run,
+    e.g. AI_FAKE_LATENCY=0.2. concurrency > 1 needs a database that handles
+    concurrent writes (Postgres); SQLite will report locked-table errors.
+    """
+    recorder = Recorder()
+    report = {
+        'commit': git_commit(),
+        'started_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'database': connection.vendor,
+        'iterations': iterations,
+        'concurrency': concurrency,
+        'num_questions': num_questions,
+        'flows': {},
+    }
+
+    with override_settings(**BENCHMARK_SETTINGS, **fake_settings):
+        report['ai_fake_latency'] = settings.AI_FAKE_LATENCY
+        report['ai_fake_tokens_per_second'] = settings.AI_FAKE_TOKENS_PER_SECOND
+        breaker.reset()
+        fake_backend.reset()
+        clients = _make_clients(concurrency)
+
+        for name in flows:
+            flow = FLOW_FUNCTIONS[name]
+            failures = []
+
+            def task(index):
+                try:
+                    flow(recorder, clients[index % concurrency], index, num_questions)
+                except Exception as e:
+                    failures.append(f"{type(e).__name__}: {e}")
+
+            start = time.perf_counter()
+            if concurrency == 1:
+                for index in range(iterations):
+                    task(index)
+            else:
+                with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                    list(pool.map(task, range(iterations)))
+            elapsed = time.perf_counter() - start
+
+            report['flows'][name] = {
+                'seconds': round(elapsed, 3),
+                'throughput_per_s': round(iterations / elapsed, 2) if elapsed else None,
+                'failures': len(failures),
+                'first_failure': failures[0] if failures else None,
+            }
+
+    report['steps'] = recorder.summary()
+    report['peak_rss_mb'] = peak_rss_mb()
+    return report
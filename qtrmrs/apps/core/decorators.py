@@ -0,0 +1,35 @@
+"""
+Shared view decorators.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.module_loading import import_string
+from django_ratelimit import ALL
+from django_ratelimit.core import is_ratelimited
+from django_ratelimit.exceptions import Ratelimited
+
+
+def async_ratelimit(group=None, key=None, rate=None, method=ALL, block=True):
+    """
+    Async-view counterpart of django_ratelimit's @ratelimit, which only wraps
+    sync views. The limit check (cache + request.user lookups) runs in a
+    thread; the view itself stays a coroutine.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        async def _wrapped(request, *args, **kw):
+            old_limited = getattr(request, 'limited', False)
+            ratelimited = await sync_to_async(is_ratelimited)(
+                request=request, group=group, fn=fn,
+                key=key, rate=rate, method=method,
+                increment=True
+            )
+            request.limited = ratelimited or old_limited
+            if ratelimited and block:
+                cls = getattr(settings, 'RATELIMIT_EXCEPTION_CLASS', Ratelimited)
+                raise (import_string(cls) if isinstance(cls, str) else cls)()
+            return await fn(request, *args, **kw)
+        return _wrapped
+    return decorator
@@ -0,0 +1,89 @@
+"""
+Management command to benchmark the quiz flows end to end, offline.
+
+Usage:
+    python manage.py run_benchmark                         # All flows, 10 iterations
+    python manage.py run_benchmark --flows quiz --iterations 50 --questions 10
+    python manage.py run_benchmark --ai-latency 0 --ai-tokens-per-second 0  # The app alone
+    python manage.py run_benchmark --output bench.json --compare previous.json
+
+Runs in a throwaway test database with the fake AI backend, so it needs no
+API key and leaves your data alone. See apps/core/benchmark.py.
+"""
+import json
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+from apps.core import benchmark
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the quiz, Quick Quiz and dashboard flows against the fake AI backend'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--flows', default=','.join(benchmark.FLOWS), help='Comma-separated flows to run')
+        parser.add_argument('--iterations', type=int, default=10, help='Runs of each flow')
+        parser.add_argument('--concurrency', type=int, default=1, help='Concurrent virtual users (use Postgres above 1)')
+        parser.add_argument('--questions', type=int, default=5, help='Questions per generated quiz')
+        parser.add_argument('--ai-latency', type=float, default=None, help='Override AI_FAKE_LATENCY (seconds)')
+        parser.add_argument('--ai-tokens-per-second', type=float, default=None, help='Override AI_FAKE_TOKENS_PER_SECOND (0 = instant)')
+        parser.add_argument('--ai-error-rate', type=float, default=None, help='Override AI_FAKE_ERROR_RATE (0-1)')
+        parser.add_argument('--output', default=None, help='Write the JSON report to this file')
+        parser.add_argument('--compare', default=None, help='Earlier JSON report to show p95 changes against')
+
+    def handle(self, *args, **options):
+        flows = [name.strip() for name in options['flows'].split(',') if name.strip()]
+        unknown = set(flows) - set(benchmark.FLOWS)
+        if unknown:
+            raise CommandError(f"Unknown flows: {', '.join(sorted(unknown))}")
+
+        overrides = {}
+        if options['ai_latency'] is not None:
+            overrides['AI_FAKE_LATENCY'] = options['ai_latency']
+        if options['ai_tokens_per_second'] is not None:
+            overrides['AI_FAKE_TOKENS_PER_SECOND'] = options['ai_tokens_per_second']
+        if options['ai_error_rate'] is not None:
+            overrides['AI_FAKE_ERROR_RATE'] = options['ai_error_rate']
+
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            report = benchmark.run(
+                flows,
+                iterations=options['iterations'],
+                concurrency=options['concurrency'],
+                num_questions=options['questions'],
+                **overrides
+            )
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        previous = None
+        if options['compare']:
+            with open(options['compare']) as f:
+                previous = json.load(f)
+        self._print_report(report, previous)
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"✅ Report written to {options['output']}"))
+
+    def _print_report(self, report, previous):
+        self.stdout.write(f"Commit {report['commit'] or '?'} on {report['database']}, "
+                          f"AI latency {report['ai_fake_latency']}s, peak RSS {report['peak_rss_mb']} MB")
+
+        for name, flow in report['flows'].items():
+            line = f"  {name:<12} {flow['throughput_per_s']}/s over {flow['seconds']}s"
+            if flow['failures']:
+                line += self.style.ERROR(f"  {flow['failures']} failed: {flow['first_failure']}")
+            self.stdout.write(line)
+
+        previous_steps = (previous or {}).get('steps', {})
+        self.stdout.write(f"  {'step':<16}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'queries':>9}{'errors':>8}")
+        for step, stats in report['steps'].items():
+            line = (f"  {step:<16}{stats['count']:>6}{stats['p50_ms']:>10}{stats['p95_ms']:>10}"
+                    f"{stats['mean_queries']:>9}{stats['errors']:>8}")
+            if step in previous_steps:
+                line += f"  (p95 {stats['p95_ms'] - previous_steps[step]['p95_ms']:+.1f} ms)"
+            self.stdout.write(line)
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import AIModel, Quiz, Question, Option, UserAnswer
+from apps.ai_agent.telemetry import model_stats
+from .models import AIModel, Quiz, Question, Option, UserAnswer, PooledQuiz, ExplanationMemo, AICallLog, GenerationJob
 
 
 class OptionInline(admin.TabularInline):
@@ -35,8 +36,71 @@ class QuizAdmin(admin.ModelAdmin):
 
 @admin.register(AIModel)
 class AIModelAdmin(admin.ModelAdmin):
-    list_display = ('display_name', 'model_name', 'is_active', 'is_default')
+    list_display = (
+        'display_name', 'model_name', 'is_active', 'is_default', 'priority',
+        'calls', 'p50_ms', 'p95_ms', 'p99_ms', 'error_rate',
+    )
     list_filter = ('is_active', 'is_default')
+    list_editable = ('priority',)
+
+    def changelist_view(self, request, extra_context=None):
+        # One pass over the call log for the whole page, not one per row
+        self._stats = model_stats()
+        return super().changelist_view(request, extra_context)
+
+    def _stat(self, obj, key):
+        value = getattr(self, '_stats', {}).get(obj.model_name, {}).get(key)
+        return '-' if value is None else value
+
+    @admin.display(description='Calls')
+    def calls(self, obj):
+        return self._stat(obj, 'calls')
+
+    @admin.display(description='p50 (ms)')
+    def p50_ms(self, obj):
+        return self._stat(obj, 'p50')
+
+    @admin.display(description='p95 (ms)')
+    def p95_ms(self, obj):
+        return self._stat(obj, 'p95')
+
+    @admin.display(description='p99 (ms)')
+    def p99_ms(self, obj):
+        return self._stat(obj, 'p99')
+
+    @admin.display(description='Error rate')
+    def error_rate(self, obj):
+        return self._stat(obj, 'error_rate')
+
+
+@admin.register(PooledQuiz)
+class PooledQuizAdmin(admin.ModelAdmin):
+    list_display = ('id', 'language', 'topic', 'model_used', 'created_at')
+    list_filter = ('language', 'topic')
+
+
+@admin.register(AICallLog)
+class AICallLogAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'model_name', 'operation', 'latency_ms', 'prompt_tokens', 'response_tokens', 'error_type', 'question_count', 'prompt_version')
+    list_filter = ('model_name', 'operation', 'error_type', 'prompt_version')
+    date_hierarchy = 'created_at'
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(ExplanationMemo)
+class ExplanationMemoAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'key', 'created_at')
+    search_fields = ('explanation',)
+
+
+@admin.register(GenerationJob)
+class GenerationJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'quiz_type', 'status', 'user', 'model_used', 'attempts', 'worker', 'created_at', 'finished_at')
+    list_filter = ('status', 'quiz_type')
+    readonly_fields = ('quiz', 'worker', 'started_at', 'finished_at')
+    date_hierarchy = 'created_at'
 
 
 admin.site.register(Question, QuestionAdmin)
@@ -0,0 +1,200 @@
+"""
+Write-behind buffer for per-question answers (QUIZ_ANSWER_BUFFER_ENABLED).
+
+Instead of an INSERT and a cursor UPDATE per answer, submit_answer puts
+each answer in the cache under its own (quiz, position) key. The answers
+reach the database in one bulk_create when the buffer is flushed: when the
+quiz completes, when the user logs out, or from
+`manage.py flush_answer_buffers` for sessions that simply went away.
+
+Recovery relies on what isn't buffered. The Quiz cursor only moves when
+answers are flushed, in the same transaction as their insert, and only
+over an unbroken run of positions, so the database always holds a
+consistent prefix of the quiz. Losing the cache (restart, eviction, TTL)
+loses only unflushed answers and the player resumes at the first of them.
+A flush that dies after committing leaves its keys behind; they sit below
+the cursor and are dropped by the next flush.
+
+Quiz.answers_buffered_at marks quizzes with a buffer (one UPDATE per
+flush cycle, on its first answer) so the sweeper knows where to look. The
+cache (QUIZ_ANSWER_BUFFER_CACHE) must be one every web process shares: a
+LocMemCache is refused unless DEBUG or QUIZ_ANSWER_BUFFER_ALLOW_LOCMEM is on.
+"""
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Quiz, UserAnswer
+
+logger = logging.getLogger(__name__)
+
+
+def enabled() -> bool:
+    return getattr(settings, 'QUIZ_ANSWER_BUFFER_ENABLED', False)
+
+
+def _cache():
+    alias = getattr(settings, 'QUIZ_ANSWER_BUFFER_CACHE', 'default')
+    cache = caches[alias]
+    if (isinstance(cache, LocMemCache) and enabled() and not settings.DEBUG
+            and not getattr(settings, 'QUIZ_ANSWER_BUFFER_ALLOW_LOCMEM', False)):
+        # Each worker would keep its own answers: the player would ask them
+        # again on another worker and flush_answer_buffers would never see them
+        raise ImproperlyConfigured(
+            f"QUIZ_ANSWER_BUFFER_CACHE '{alias}' is a per-process LocMemCache; "
+            "point it at a cache every web process shares."
+        )
+    return cache
+
+
+def _key(quiz_id: int, position: int) -> str:
+    return f"answer-buffer:{quiz_id}:{position}"
+
+
+def _buffered(quiz: Quiz) -> dict:
+    """position -> buffered answer, for the whole quiz in one cache read."""
+    keys = {_key(quiz.id, position): position for position in range(quiz.total_questions)}
+    return {keys[key]: entry for key, entry in _cache().get_many(list(keys)).items()}
+
+
+def apply(quiz: Quiz) -> Quiz:
+    """
+    Move `quiz`'s cursor past its buffered answers, in memory only, so the
+    player sees the progress it would if they had been written. Call once
+    per Quiz instance; a no-op when buffering is off.
+    """
+    if not enabled():
+        return quiz
+    # Anything below the cursor is already in the database
+    quiz.buffered_positions = {p for p in _buffered(quiz) if p >= quiz.current_position}
+    quiz.answered_count += len(quiz.buffered_positions)
+    _skip_buffered(quiz)
+    return quiz
+
+
+def _skip_buffered(quiz: Quiz) -> None:
+    while quiz.current_position in quiz.buffered_positions:
+        quiz.current_position += 1
+
+
+def add(quiz: Quiz, question, option, time_taken: int) -> bool:
+    """
+    Buffer an answer to `question` and advance `quiz`'s cursor in memory
+    (apply() it first). Returns False if the question already has a
+    buffered answer: cache.add() is atomic, so of two racing submissions
+    only the first is kept.
+    """
+    entry = {
+        'question': question.id,
+        'option': option.id if option else None,
+        'is_correct': bool(option and option.is_correct),
+        'time_taken': time_taken,
+        'at': time.time(),
+    }
+    ttl = getattr(settings, 'QUIZ_ANSWER_BUFFER_TTL', 86400)
+    if not _cache().add(_key(quiz.id, question.position), entry, ttl):
+        return False
+    if quiz.answers_buffered_at is None:
+        quiz.answers_buffered_at = timezone.now()
+        Quiz.objects.filter(id=quiz.id).update(answers_buffered_at=quiz.answers_buffered_at)
+    quiz.answered_count += 1
+    quiz.buffered_positions.add(question.position)
+    _skip_buffered(quiz)
+    return True
+
+
+def flush(quiz: Quiz) -> int:
+    """
+    Write `quiz`'s buffered answers and move its cursor over them. Returns
+    the number written; `quiz` is refreshed from the database.
+    """
+    if not (enabled() or quiz.answers_buffered_at):
+        return 0
+    buffered = _buffered(quiz)
+    if not (buffered or quiz.answers_buffered_at):
+        return 0
+    return _write(quiz, buffered)
+
+
+def _write(quiz: Quiz, buffered: dict) -> int:
+    with transaction.atomic():
+        # The row lock serialises flushes of the same quiz
+        position = Quiz.objects.select_for_update().values_list('current_position', flat=True).get(id=quiz.id)
+        stale = [p for p in buffered if p < position]
+        run = []
+        while position in buffered:
+            run.append(position)
+            position += 1
+
+        if run:
+            UserAnswer.objects.bulk_create([
+                UserAnswer(
+                    quiz_id=quiz.id,
+                    question_id=buffered[p]['question'],
+                    selected_option_id=buffered[p]['option'],
+                    is_correct=buffered[p]['is_correct'],
+                    time_taken=buffered[p]['time_taken'],
+                )
+                for p in run
+            ], ignore_conflicts=True)
+
+        # Answers after a gap (the ones before it were lost) stay buffered
+        # until the gap is answered again
+        remaining = len(buffered) - len(run) - len(stale)
+        Quiz.objects.filter(id=quiz.id).update(
+            answered_count=Coalesce(Subquery(
+                UserAnswer.objects.filter(quiz_id=OuterRef('pk')).order_by()
+                .values('quiz_id').annotate(n=Count('id')).values('n')
+            ), 0),
+            current_position=position,
+            answers_buffered_at=Coalesce(F('answers_buffered_at'), timezone.now()) if remaining else None,
+        )
+        written = [_key(quiz.id, p) for p in stale + run]
+        # Only forget the answers once they're safely committed
+        transaction.on_commit(lambda: _cache().delete_many(written))
+
+    quiz.refresh_from_db(fields=['answered_count', 'current_position', 'answers_buffered_at'])
+    if remaining:
+        logger.warning(f"Quiz {quiz.id}: {remaining} buffered answers wait behind a lost one at position {position}")
+    return len(run)
+
+
+def discard(quiz: Quiz) -> None:
+    """Forget `quiz`'s buffered answers (retry/delete). Clearing the marker is the caller's job."""
+    if enabled() or quiz.answers_buffered_at:
+        _cache().delete_many([_key(quiz.id, position) for position in range(quiz.total_questions)])
+
+
+def flush_user(user) -> int:
+    """Flush every quiz of `user` with buffered answers (on logout)."""
+    return sum(flush(quiz) for quiz in Quiz.objects.filter(user=user, answers_buffered_at__isnull=False))
+
+
+def sweep(idle: int = None) -> int:
+    """
+    Flush every buffer whose newest answer is at least `idle` seconds old
+    (default QUIZ_ANSWER_BUFFER_IDLE). Quizzes still being played are left
+    for their own completion flush. Returns the number of answers written.
+    """
+    if idle is None:
+        idle = getattr(settings, 'QUIZ_ANSWER_BUFFER_IDLE', 900)
+    cutoff = time.time() - idle
+    written = 0
+    quizzes = Quiz.objects.filter(
+        answers_buffered_at__lte=timezone.now() - timedelta(seconds=idle)
+    ).only('id', 'total_questions', 'answered_count', 'current_position', 'answers_buffered_at')
+    for quiz in quizzes:
+        buffered = _buffered(quiz)
+        if any(entry['at'] > cutoff for entry in buffered.values()):
+            continue
+        written += _write(quiz, buffered)
+    return written
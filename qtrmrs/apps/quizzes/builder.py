@@ -0,0 +1,126 @@
+"""
+Persistence of AI-generated quizzes.
+
+Every creation path (setup form, chat, Quick Quiz, generation jobs, the
+streamed player) hands its question dicts to QuizBuilder, which validates
+them and writes the quiz in three statements whatever its size: the Quiz
+row, every Question in one bulk_create, and every Option in one more.
+Question primary keys come back from the bulk insert on Postgres and
+SQLite; on backends that can't return them they are read back with one
+extra query. Questions are numbered by `position` in the order given,
+which is the order the player serves them in.
+"""
+import logging
+from typing import Optional
+
+from django.db import connection, transaction
+from django.db.models import Max
+
+from .models import Quiz, Question, Option
+
+logger = logging.getLogger(__name__)
+
+MAX_QUESTION_LENGTH = 2000
+MAX_OPTION_LENGTH = 255
+
+
+class InvalidQuizData(ValueError):
+    """None of the generated questions could be saved."""
+
+
+def _option_text(option) -> str:
+    # Handle both string and dict options from AI
+    if isinstance(option, dict):
+        option = option.get('text', '')
+    return str(option).strip()
+
+
+def clean_question(q_data) -> Optional[dict]:
+    """
+    A generated question normalised for saving, or None if it can't be
+    played: no text, fewer than two distinct options, or a correct_answer
+    that isn't one of the options.
+    """
+    if not isinstance(q_data, dict):
+        return None
+    text = str(q_data.get('text') or '').strip()
+    options = []
+    for option in q_data.get('options') or []:
+        option = _option_text(option)
+        if option and option not in options:
+            options.append(option)
+    correct = str(q_data.get('correct_answer') or '').strip()
+    if not text or len(options) < 2 or correct not in options:
+        return None
+    return {
+        'text': text[:MAX_QUESTION_LENGTH],
+        'code_snippet': str(q_data.get('code_snippet') or ''),
+        'explanation': str(q_data.get('explanation') or ''),
+        'options': options,
+        'correct_index': options.index(correct),
+    }
+
+
+class QuizBuilder:
+    """
+    Validates generated questions and saves them:
+
+        quiz = QuizBuilder(questions_data).save(user=user, quiz_type='tech', ...)
+
+    Unplayable questions are dropped (and logged); save() raises
+    InvalidQuizData if none are left.
+    """
+
+    def __init__(self, questions_data: list[dict]):
+        questions_data = list(questions_data or [])
+        self.questions = [q for q in map(clean_question, questions_data) if q is not None]
+        self.dropped = len(questions_data) - len(self.questions)
+        if self.dropped:
+            logger.warning(f"Dropped {self.dropped} of {len(questions_data)} generated questions that failed validation")
+
+    def save(self, **quiz_fields) -> Quiz:
+        """Create the Quiz (total_questions is set here) with all its questions."""
+        if not self.questions:
+            raise InvalidQuizData("No valid questions to save")
+        with transaction.atomic():
+            quiz = Quiz.objects.create(total_questions=len(self.questions), **quiz_fields)
+            self._insert(quiz, start=0)
+        return quiz
+
+    def add_to(self, quiz: Quiz, start: Optional[int] = None) -> list[Question]:
+        """
+        Insert the questions and their options into an existing quiz,
+        numbered from `start` (default: after the quiz's last question).
+        """
+        if not self.questions:
+            return []
+        with transaction.atomic():
+            if start is None:
+                last = quiz.questions.aggregate(last=Max('position'))['last']
+                start = 0 if last is None else last + 1
+            return self._insert(quiz, start)
+
+    def _insert(self, quiz: Quiz, start: int) -> list[Question]:
+        questions = Question.objects.bulk_create([
+            Question(
+                quiz=quiz,
+                text=q['text'],
+                code_snippet=q['code_snippet'],
+                explanation=q['explanation'],
+                position=start + offset,
+            )
+            for offset, q in enumerate(self.questions)
+        ])
+        if not connection.features.can_return_rows_from_bulk_insert:
+            questions = list(quiz.questions.filter(position__gte=start).order_by('position'))
+
+        Option.objects.bulk_create([
+            Option(
+                question=question,
+                text=option[:MAX_OPTION_LENGTH],
+                is_correct=(index == q['correct_index'])
+            )
+            for question, q in zip(questions, self.questions)
+            for index, option in enumerate(q['options'])
+        ])
+        return questions
@@ -0,0 +1,132 @@
+"""
+Memoized AI explanations for wrong/skipped answers.
+
+Explanations are looked up in ExplanationMemo by a hash of the prompt inputs
+(question text, user answer, correct answer) before anything is sent to
+Gemini. Retrying a quiz and making the same mistake again, or explaining a
+cached/pooled quiz someone else already reviewed, costs zero LLM calls.
+"""
+import logging
+
+from django.conf import settings
+
+from apps.ai_agent import metrics
+from apps.ai_agent.services import FailedExplanation
+from .models import ExplanationMemo, UserAnswer
+
+logger = logging.getLogger(__name__)
+
+
+def explanation_request(ans):
+    """Explanation prompt inputs for a wrong/skipped answer (needs prefetched options)."""
+    # Use Python filtering instead of DB query to leverage prefetch
+    correct_opt = next((o for o in ans.question.options.all() if o.is_correct), None)
+    return {
+        'id': ans.question_id,
+        'question_text': ans.question.text,
+        'user_answer': ans.selected_option.text if ans.selected_option else "Skipped",
+        'correct_answer': correct_opt.text if correct_opt else "Unknown",
+    }
+
+
+def apply_explanations(answers, explanations, save=True):
+    """
+    Copy generated explanations onto their answers and write them in one
+    bulk_update. Answers whose call timed out (None) are left for a retry.
+    Returns the updated answers.
+    """
+    updated = []
+    for ans, explanation in zip(answers, explanations):
+        if explanation:
+            ans.error_explanation = explanation
+            updated.append(ans)
+    if save and updated:
+        UserAnswer.objects.bulk_update(updated, ['error_explanation'])
+    return updated
+
+
+def _memo_key(request):
+    return ExplanationMemo.make_key(
+        request['question_text'], request['user_answer'], request['correct_answer']
+    )
+
+
+def _use_batch():
+    return getattr(settings, 'AI_EXPLANATION_MODE', 'batch') == 'batch'
+
+
+def _merge_memos(keys, memos):
+    """Fill results from memo hits; return them with the indexes still missing."""
+    results = [memos.get(key) for key in keys]
+    missing = [index for index, text in enumerate(results) if text is None]
+    metrics.incr('explanations.memo_hit', len(keys) - len(missing))
+    metrics.incr('explanations.memo_miss', len(missing))
+    return results, missing
+
+
+def _collect_new_memos(keys, results, missing, generated):
+    """Slot generated text into results and build memo rows for the real ones."""
+    new_memos = {}
+    for index, text in zip(missing, generated):
+        results[index] = text
+        # Error placeholders and timeouts must stay retryable
+        if text and not isinstance(text, FailedExplanation):
+            new_memos[keys[index]] = ExplanationMemo(key=keys[index], explanation=text)
+    return list(new_memos.values())
+
+
+def explain_answers(generator, answers):
+    """
+    Explain the given answers, calling Gemini only for memo misses.
+    Saves the answers with one bulk_update and returns the updated ones.
+    """
+    requests = [explanation_request(ans) for ans in answers]
+    if not requests:
+        return []
+
+    keys = [_memo_key(request) for request in requests]
+    memos = dict(ExplanationMemo.objects.filter(key__in=keys).values_list('key', 'explanation'))
+    results, missing = _merge_memos(keys, memos)
+
+    if missing:
+        pending = [requests[index] for index in missing]
+        if _use_batch():
+            generated = generator.generate_explanations_batch(pending)
+        else:
+            generated = generator.generate_explanations(pending)
+        new_memos = _collect_new_memos(keys, results, missing, generated)
+        if new_memos:
+            ExplanationMemo.objects.bulk_create(new_memos, ignore_conflicts=True)
+
+    logger.info(f"Explained {len(requests)} answers ({len(requests) - len(missing)} from memo)")
+    return apply_explanations(answers, results)
+
+
+async def aexplain_answers(generator, answers):
+    """Async version of explain_answers for ASGI views."""
+    requests = [explanation_request(ans) for ans in answers]
+    if not requests:
+        return []
+
+    keys = [_memo_key(request) for request in requests]
+    memos = {
+        key: text async for key, text in
+        ExplanationMemo.objects.filter(key__in=keys).values_list('key', 'explanation')
+    }
+    results, missing = _merge_memos(keys, memos)
+
+    if missing:
+        pending = [requests[index] for index in missing]
+        if _use_batch():
+            generated = await generator.generate_explanations_batch_async(pending)
+        else:
+            generated = await generator.generate_explanations_async(pending)
+        new_memos = _collect_new_memos(keys, results, missing, generated)
+        if new_memos:
+            await ExplanationMemo.objects.abulk_create(new_memos, ignore_conflicts=True)
+
+    logger.info(f"Explained {len(requests)} answers ({len(requests) - len(missing)} from memo)")
+    updated = apply_explanations(answers, results, save=False)
+    if updated:
+        await UserAnswer.objects.abulk_update(updated, ['error_explanation'])
+    return updated
@@ -0,0 +1,188 @@
+"""
+Database-backed queue for quiz generation.
+
+With AI_JOB_QUEUE_ENABLED, create_quiz and process_chat_message only insert
+a GenerationJob and return a polling partial, so a web worker is never held
+for the length of a Gemini call. `manage.py run_generation_worker` claims
+pending jobs with SELECT ... FOR UPDATE SKIP LOCKED and runs them on a thread
+pool; any number of worker processes, on any number of hosts, can share the
+queue. Workers touch heartbeat_at on their running jobs every
+AI_JOB_HEARTBEAT_INTERVAL seconds; jobs whose heartbeat is older than
+AI_JOB_STALE_AFTER (their worker died) are requeued, up to
+AI_JOB_MAX_ATTEMPTS tries. A worker only records its result if the job is
+still its own, so a job requeued under it can't end up with two quizzes.
+"""
+import logging
+import os
+import socket
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .builder import InvalidQuizData
+from .models import GenerationJob
+from .services import generate_chat_quiz, generate_tech_quiz, save_general_quiz, save_tech_quiz
+from apps.ai_agent.services import QuizGenerator, AIError
+
+logger = logging.getLogger(__name__)
+
+
+def worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"[:100]
+
+
+def enqueue(user, quiz_type, params, ai_model, model_name) -> GenerationJob:
+    return GenerationJob.objects.create(
+        user=user,
+        quiz_type=quiz_type,
+        params=params,
+        ai_model=ai_model,
+        model_used=model_name,
+    )
+
+
+async def aenqueue(user, quiz_type, params, ai_model, model_name) -> GenerationJob:
+    """Async version of enqueue."""
+    return await GenerationJob.objects.acreate(
+        user=user,
+        quiz_type=quiz_type,
+        params=params,
+        ai_model=ai_model,
+        model_used=model_name,
+    )
+
+
+def claim_jobs(limit: int, worker: str) -> list:
+    """
+    Mark up to `limit` pending jobs as running for this worker and return them.
+    Rows locked by another worker's claim are skipped rather than waited on.
+    """
+    if limit <= 0:
+        return []
+
+    claimed = []
+    with transaction.atomic():
+        candidates = list(
+            GenerationJob.objects.select_for_update(skip_locked=True)
+            .filter(status=GenerationJob.STATUS_PENDING)
+            .order_by('created_at')[:limit]
+        )
+        now = timezone.now()
+        for job in candidates:
+            # The status check keeps claims exclusive on databases without row locks (SQLite)
+            updated = GenerationJob.objects.filter(pk=job.pk, status=GenerationJob.STATUS_PENDING).update(
+                status=GenerationJob.STATUS_RUNNING,
+                started_at=now,
+                heartbeat_at=now,
+                worker=worker,
+                attempts=F('attempts') + 1,
+            )
+            if updated:
+                job.status = GenerationJob.STATUS_RUNNING
+                job.started_at = job.heartbeat_at = now
+                job.worker = worker
+                job.attempts += 1
+                claimed.append(job)
+    return claimed
+
+
+def heartbeat(worker: str, job_ids: list) -> int:
+    """Mark this worker's running jobs as alive. Returns the number still its own."""
+    if not job_ids:
+        return 0
+    return GenerationJob.objects.filter(
+        pk__in=job_ids, worker=worker, status=GenerationJob.STATUS_RUNNING
+    ).update(heartbeat_at=timezone.now())
+
+
+def requeue_stale_jobs() -> int:
+    """
+    Put jobs whose worker stopped sending heartbeats back in the queue, or
+    fail them once they've used up their attempts. Returns the number requeued.
+    """
+    cutoff = timezone.now() - timedelta(seconds=getattr(settings, 'AI_JOB_STALE_AFTER', 300))
+    max_attempts = getattr(settings, 'AI_JOB_MAX_ATTEMPTS', 3)
+    stale = GenerationJob.objects.filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff),
+        status=GenerationJob.STATUS_RUNNING,
+    )
+
+    stale.filter(attempts__gte=max_attempts).update(
+        status=GenerationJob.STATUS_FAILED,
+        error_message="Quiz generation took too long.",
+        error_suggestion="Try again in a moment.",
+        finished_at=timezone.now(),
+    )
+    requeued = stale.filter(attempts__lt=max_attempts).update(status=GenerationJob.STATUS_PENDING, worker='')
+    if requeued:
+        logger.warning(f"Requeued {requeued} stale generation jobs")
+    return requeued
+
+
+def _generate(job):
+    """Returns (quiz or None, questions_data) for a claimed job."""
+    generator = QuizGenerator(model_name=job.model_used)
+    params = job.params
+
+    if job.quiz_type == 'general':
+        intent, questions_data = generate_chat_quiz(
+            generator, params['message'], params['num_questions'], params['use_cache']
+        )
+        if not questions_data:
+            return None, questions_data
+        return save_general_quiz(job.user, intent, job.ai_model, job.model_used, questions_data), questions_data
+
+    questions_data = generate_tech_quiz(generator, params)
+    if not questions_data:
+        return None, questions_data
+    return save_tech_quiz(job.user, params, job.ai_model, job.model_used, questions_data), questions_data
+
+
+def run_job(job) -> GenerationJob:
+    """
+    Generate and save the quiz for a claimed job, recording the outcome on
+    the job. If the job was requeued meanwhile (this worker was presumed
+    dead) the outcome is dropped and the quiz deleted; the new claim wins.
+    """
+    try:
+        quiz, questions_data = _generate(job)
+    except InvalidQuizData:
+        logger.warning(f"Generation job {job.pk} produced no valid questions")
+        quiz, questions_data = None, None
+    except Exception as e:
+        logger.exception(f"Generation job {job.pk} crashed: {e}")
+        quiz, questions_data = None, None
+
+    job.finished_at = timezone.now()
+    if quiz is not None:
+        job.status = GenerationJob.STATUS_DONE
+        job.quiz = quiz
+    else:
+        job.status = GenerationJob.STATUS_FAILED
+        if isinstance(questions_data, AIError):
+            job.error_type = questions_data.error_type
+            job.error_message = questions_data.message[:255]
+            job.error_suggestion = (questions_data.suggestion or '')[:255]
+        else:
+            job.error_message = "AI failed to generate quiz."
+            job.error_suggestion = "Try again or select a different AI model."
+
+    recorded = GenerationJob.objects.filter(
+        pk=job.pk, worker=job.worker, attempts=job.attempts, status=GenerationJob.STATUS_RUNNING
+    ).update(
+        status=job.status,
+        quiz=job.quiz,
+        finished_at=job.finished_at,
+        error_type=job.error_type,
+        error_message=job.error_message,
+        error_suggestion=job.error_suggestion,
+    )
+    if not recorded:
+        logger.warning(f"Generation job {job.pk} was reclaimed while {job.worker} ran it; discarding its result")
+        if quiz is not None:
+            quiz.delete()
+            job.quiz = None
+    return job
@@ -0,0 +1,43 @@
+"""
+Management command that writes idle answers from the write-behind buffer
+(QUIZ_ANSWER_BUFFER_ENABLED) to the database.
+
+Usage:
+    python manage.py flush_answer_buffers                 # Sweep every minute until interrupted
+    python manage.py flush_answer_buffers --interval 30
+    python manage.py flush_answer_buffers --once          # One sweep, e.g. from cron
+
+Completed quizzes and logouts flush their own answers; this catches the
+sessions that were simply abandoned. Running several is harmless: flushes
+of the same quiz are serialised by a row lock.
+"""
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from apps.quizzes.answer_buffer import sweep
+
+
+class Command(BaseCommand):
+    help = 'Flush answers idle in the write-behind buffer to the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--idle', type=int, default=getattr(settings, 'QUIZ_ANSWER_BUFFER_IDLE', 900),
+            help='Only flush quizzes with no new answer for this many seconds'
+        )
+        parser.add_argument('--interval', type=float, default=60.0, help='Seconds between sweeps')
+        parser.add_argument('--once', action='store_true', help='Sweep once, then exit')
+
+    def handle(self, *args, **options):
+        self.stdout.write("🧹 Answer buffer sweeper started")
+        written = 0
+        while True:
+            flushed = sweep(options['idle'])
+            if flushed:
+                self.stdout.write(f"  Flushed {flushed} answers")
+            written += flushed
+            if options['once']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Flushed {written} answers.'))
@@ -0,0 +1,35 @@
+"""
+Management command to keep the Quick Quiz pool topped up.
+
+Usage:
+    python manage.py refill_quiz_pool                 # One pass
+    python manage.py refill_quiz_pool --loop          # Run as a worker
+    python manage.py refill_quiz_pool --size 10 --interval 120
+"""
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from apps.quizzes.pool import refill_pool
+
+
+class Command(BaseCommand):
+    help = 'Top up the pre-generated Quick Quiz pool for every demo topic'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--size', type=int, default=getattr(settings, 'QUICK_QUIZ_POOL_SIZE', 5),
+            help='High-water mark: ready quizzes to keep per demo topic'
+        )
+        parser.add_argument('--model', default=None, help='AI model name to generate with')
+        parser.add_argument('--loop', action='store_true', help='Keep refilling until interrupted')
+        parser.add_argument('--interval', type=int, default=60, help='Seconds between passes with --loop')
+
+    def handle(self, *args, **options):
+        while True:
+            self.stdout.write(f"🔄 Refilling Quick Quiz pool to {options['size']} per topic...")
+            added = refill_pool(options['size'], model_name=options['model'], stdout=self.stdout)
+            self.stdout.write(self.style.SUCCESS(f'✅ Added {added} quizzes to the pool.'))
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,73 @@
+"""
+Management command that processes queued quiz generations (AI_JOB_QUEUE_ENABLED).
+
+Usage:
+    python manage.py run_generation_worker                # Run until interrupted
+    python manage.py run_generation_worker --threads 8
+    python manage.py run_generation_worker --once         # Drain the queue, then exit
+
+Start as many of these as you like, on one host or many: jobs are claimed
+with SKIP LOCKED, so workers never pick up the same job. Running jobs get a
+heartbeat every AI_JOB_HEARTBEAT_INTERVAL seconds so slow generations aren't
+mistaken for ones whose worker died.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from apps.quizzes.jobs import claim_jobs, heartbeat, requeue_stale_jobs, run_job, worker_id
+
+
+def _run_in_thread(job):
+    try:
+        return run_job(job)
+    finally:
+        # Each pool thread has its own connection; don't leave it open between jobs
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = 'Process queued quiz generation jobs on a thread pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads', type=int, default=getattr(settings, 'AI_JOB_WORKER_THREADS', 4),
+            help='Jobs to run at once in this process'
+        )
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty')
+
+    def handle(self, *args, **options):
+        threads = max(options['threads'], 1)
+        worker = worker_id()
+        self.stdout.write(f"⚙️  Generation worker {worker} started with {threads} threads")
+
+        heartbeat_interval = getattr(settings, 'AI_JOB_HEARTBEAT_INTERVAL', 30)
+        last_heartbeat = time.monotonic()
+        processed = 0
+        running = {}  # future -> job id
+        with ThreadPoolExecutor(max_workers=threads, thread_name_prefix='generation-job') as pool:
+            while True:
+                for future in [f for f in running if f.done()]:
+                    del running[future]
+                    job = future.result()
+                    processed += 1
+                    self.stdout.write(f"  {job} in {(job.finished_at - job.started_at).total_seconds():.1f}s")
+
+                if running and time.monotonic() - last_heartbeat >= heartbeat_interval:
+                    heartbeat(worker, list(running.values()))
+                    last_heartbeat = time.monotonic()
+
+                jobs = claim_jobs(threads - len(running), worker)
+                for job in jobs:
+                    running[pool.submit(_run_in_thread, job)] = job.pk
+
+                if jobs:
+                    continue
+                if options['once'] and not running:
+                    break
+                requeue_stale_jobs()
+                time.sleep(options['poll_interval'])
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Processed {processed} jobs.'))
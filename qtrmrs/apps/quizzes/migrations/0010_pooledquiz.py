@@ -0,0 +1,30 @@
+# Generated by Django 5.2.8 on 2026-10-16 22:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0009_add_xp_awarded_and_useranswer_ordering'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PooledQuiz',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('language', models.CharField(max_length=50)),
+                ('topic', models.CharField(max_length=255)),
+                ('questions', models.JSONField()),
+                ('model_used', models.CharField(blank=True, max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Pooled Quiz',
+                'verbose_name_plural': 'Pooled Quizzes',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['language', 'topic'], name='quizzes_poo_languag_636400_idx')],
+            },
+        ),
+    ]
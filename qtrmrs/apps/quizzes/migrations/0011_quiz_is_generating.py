@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-16 22:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0010_pooledquiz'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quiz',
+            name='is_generating',
+            field=models.BooleanField(default=False, help_text='Questions are still being streamed in from the AI'),
+        ),
+    ]
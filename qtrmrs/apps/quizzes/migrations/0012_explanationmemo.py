@@ -0,0 +1,25 @@
+# Generated by Django 5.2.8 on 2026-10-16 22:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0011_quiz_is_generating'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExplanationMemo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(help_text='SHA-256 of the explanation inputs', max_length=64, unique=True)),
+                ('explanation', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Explanation Memo',
+            },
+        ),
+    ]
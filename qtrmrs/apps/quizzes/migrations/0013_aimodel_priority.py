@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-16 22:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0012_explanationmemo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aimodel',
+            name='priority',
+            field=models.PositiveIntegerField(default=100, help_text='Fallback order when a model is failing; lower is tried first'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-16 22:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0013_aimodel_priority'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AICallLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_name', models.CharField(max_length=100)),
+                ('operation', models.CharField(choices=[('quiz', 'Quiz'), ('quiz_stream', 'Quiz (streamed)'), ('general_quiz', 'General Quiz'), ('chat_quiz', 'Chat Quiz'), ('intent', 'Intent'), ('general_intent', 'General Intent'), ('explanation', 'Explanation'), ('explanation_batch', 'Explanation Batch')], max_length=30)),
+                ('latency_ms', models.PositiveIntegerField()),
+                ('prompt_tokens', models.PositiveIntegerField(blank=True, null=True)),
+                ('response_tokens', models.PositiveIntegerField(blank=True, null=True)),
+                ('error_type', models.CharField(blank=True, help_text='Empty on success', max_length=30)),
+                ('question_count', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'AI Call Log',
+                'indexes': [models.Index(fields=['model_name', 'created_at'], name='quizzes_aic_model_n_2034a8_idx')],
+            },
+        ),
+    ]
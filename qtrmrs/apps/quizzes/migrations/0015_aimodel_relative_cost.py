@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-16 22:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0014_aicalllog'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aimodel',
+            name='relative_cost',
+            field=models.PositiveIntegerField(default=100, help_text="Relative price per token, used by the 'cheapest' routing policy"),
+        ),
+    ]
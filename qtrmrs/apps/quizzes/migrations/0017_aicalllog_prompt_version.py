@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-16 23:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0016_generationjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aicalllog',
+            name='prompt_version',
+            field=models.CharField(blank=True, help_text='Quiz output format version, e.g. compact-1', max_length=20),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.8 on 2026-10-16 23:28
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_positions(apps, schema_editor):
+    """Number existing questions by id within each quiz and set each quiz's cursor."""
+    Quiz = apps.get_model('quizzes', 'Quiz')
+    Question = apps.get_model('quizzes', 'Question')
+    UserAnswer = apps.get_model('quizzes', 'UserAnswer')
+
+    batch = []
+    quiz_id, position = None, 0
+    for question in Question.objects.order_by('quiz_id', 'id').only('id', 'quiz_id').iterator(chunk_size=2000):
+        if question.quiz_id != quiz_id:
+            quiz_id, position = question.quiz_id, 0
+        question.position = position
+        position += 1
+        batch.append(question)
+        if len(batch) >= 1000:
+            Question.objects.bulk_update(batch, ['position'])
+            batch = []
+    if batch:
+        Question.objects.bulk_update(batch, ['position'])
+
+    # Questions were always answered in id order, so the cursor is the answer count
+    answered = Subquery(
+        UserAnswer.objects.filter(quiz=OuterRef('pk')).values('quiz').annotate(n=Count('id')).values('n')
+    )
+    Quiz.objects.update(answered_count=Coalesce(answered, 0), current_position=Coalesce(answered, 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0017_aicalllog_prompt_version'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='question',
+            name='quizzes_que_quiz_id_ffb3fb_idx',
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='position',
+            field=models.PositiveIntegerField(default=0, help_text='0-based order within the quiz'),
+        ),
+        migrations.AddField(
+            model_name='quiz',
+            name='answered_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='quiz',
+            name='current_position',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_positions, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='question',
+            constraint=models.UniqueConstraint(fields=('quiz', 'position'), name='unique_question_position'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-16 23:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0018_question_position'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quiz',
+            name='answers_buffered_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -1,5 +1,8 @@
+import hashlib
 from django.db import models
 from django.conf import settings
+from django.contrib.auth.signals import user_logged_out
+from django.dispatch import receiver
 
 
 class AIModel(models.Model):
@@ -8,6 +11,8 @@ class AIModel(models.Model):
     model_name = models.CharField(max_length=100, help_text="The API string, e.g., 'gemini-1.5-flash'")
     is_active = models.BooleanField(default=True)
     is_default = models.BooleanField(default=False)
+    priority = models.PositiveIntegerField(default=100, help_text="Fallback order when a model is failing; lower is tried first")
+    relative_cost = models.PositiveIntegerField(default=100, help_text="Relative price per token, used by the 'cheapest' routing policy")
 
     def __str__(self):
         return self.display_name
@@ -23,6 +28,47 @@ class AIModel(models.Model):
         verbose_name_plural = "AI Models"
 
 
+class AICallLog(models.Model):
+    """
+    One Gemini call (or fallback attempt), kept in a rolling window of the
+    most recent AI_TELEMETRY_MAX_ROWS rows. Feeds the per-model latency
+    percentiles shown on the AI Model admin.
+    """
+    OPERATION_CHOICES = [
+        ('quiz', 'Quiz'),
+        ('quiz_stream', 'Quiz (streamed)'),
+        ('general_quiz', 'General Quiz'),
+        ('chat_quiz', 'Chat Quiz'),
+        ('intent', 'Intent'),
+        ('general_intent', 'General Intent'),
+        ('explanation', 'Explanation'),
+        ('explanation_batch', 'Explanation Batch'),
+    ]
+
+    model_name = models.CharField(max_length=100)
+    operation = models.CharField(max_length=30, choices=OPERATION_CHOICES)
+    latency_ms = models.PositiveIntegerField()
+    prompt_tokens = models.PositiveIntegerField(null=True, blank=True)
+    response_tokens = models.PositiveIntegerField(null=True, blank=True)
+    error_type = models.CharField(max_length=30, blank=True, help_text="Empty on success")
+    question_count = models.PositiveSmallIntegerField(null=True, blank=True)
+    prompt_version = models.CharField(max_length=20, blank=True, help_text="Quiz output format version, e.g. compact-1")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "AI Call Log"
+        indexes = [
+            models.Index(fields=['model_name', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.model_name} {self.operation} ({self.latency_ms}ms)"
+
+    @property
+    def succeeded(self):
+        return not self.error_type
+
+
 class Quiz(models.Model):
     """Represents a generated quiz session"""
     DIFFICULTY_CHOICES = [
@@ -50,6 +96,14 @@ class Quiz(models.Model):
     score = models.IntegerField(default=0, help_text="Score percentage")
     completed_at = models.DateTimeField(null=True, blank=True)
     xp_awarded = models.BooleanField(default=False, help_text="Whether XP was already awarded for this quiz")
+    is_generating = models.BooleanField(default=False, help_text="Questions are still being streamed in from the AI")
+    # Player cursor, kept up to date by submit_answer so the player never has to
+    # scan the answers: the next question is the one at current_position
+    answered_count = models.PositiveIntegerField(default=0)
+    current_position = models.PositiveIntegerField(default=0)
+    # Set while answers wait in the write-behind buffer (see answer_buffer);
+    # the cursor above only counts answers already in the database
+    answers_buffered_at = models.DateTimeField(null=True, blank=True, db_index=True)
     
 
 
@@ -69,11 +123,6 @@ class Quiz(models.Model):
         """Check if quiz is completed (all questions answered)"""
         return self.completed_at is not None
     
-    @property
-    def answered_count(self):
-        """Number of questions answered so far"""
-        return self.answers.count()
-    
     @property
     def progress_percent(self):
         """Progress percentage for resume display"""
@@ -88,10 +137,12 @@ class Question(models.Model):
     # Stores the code block (optional)
     code_snippet = models.TextField(blank=True, null=True, help_text="Code context for the question")
     explanation = models.TextField(blank=True, help_text="AI explanation for the correct answer")
+    position = models.PositiveIntegerField(default=0, help_text="0-based order within the quiz")
     
     class Meta:
-        indexes = [
-            models.Index(fields=['quiz']),
+        constraints = [
+            # Also the index behind the player's (quiz, position) lookup
+            models.UniqueConstraint(fields=['quiz', 'position'], name='unique_question_position'),
         ]
     
     def __str__(self):
@@ -136,3 +187,112 @@ class UserAnswer(models.Model):
     def __str__(self):
         status = "✓" if self.is_correct else "✗"
         return f"{status} Q{self.question_id} - {self.quiz.topic_description[:20]}"
+
+
+class PooledQuiz(models.Model):
+    """
+    A ready-made Quick Quiz waiting to be served.
+    Filled by the `refill_quiz_pool` command and consumed by `quick_quiz`,
+    so the demo path doesn't have to wait on the AI.
+    """
+    language = models.CharField(max_length=50)
+    topic = models.CharField(max_length=255)
+    # Same shape as QuizGenerator output: list of question dicts
+    questions = models.JSONField()
+    model_used = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['language', 'topic']),
+        ]
+        ordering = ['created_at']
+        verbose_name = "Pooled Quiz"
+        verbose_name_plural = "Pooled Quizzes"
+
+    def __str__(self):
+        return f"{self.language} - {self.topic} ({len(self.questions)} Qs)"
+
+
+class ExplanationMemo(models.Model):
+    """
+    Remembered AI explanation for a (question, user answer, correct answer)
+    triple, so retries and repeated mistakes don't pay for the same call twice.
+    Keyed on a content hash rather than row ids, so it survives retry_quiz
+    deleting the UserAnswer rows and also covers identical cached/pooled quizzes.
+    """
+    key = models.CharField(max_length=64, unique=True, help_text="SHA-256 of the explanation inputs")
+    explanation = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Explanation Memo"
+
+    def __str__(self):
+        return self.explanation[:50]
+
+    @staticmethod
+    def make_key(question_text: str, user_answer: str, correct_answer: str) -> str:
+        payload = '\x1f'.join([question_text, user_answer, correct_answer])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class GenerationJob(models.Model):
+    """
+    A quiz generation queued by create_quiz / process_chat_message when
+    AI_JOB_QUEUE_ENABLED is on. Web workers return straight away and the
+    page polls the job; `run_generation_worker` processes the queue.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='generation_jobs')
+    quiz_type = models.CharField(max_length=20, choices=Quiz.QUIZ_TYPE_CHOICES, default='tech')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    # Setup form values (tech) or the chat message and settings (general)
+    params = models.JSONField()
+    ai_model = models.ForeignKey(AIModel, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    model_used = models.CharField(max_length=100, blank=True)
+    quiz = models.ForeignKey(Quiz, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+
+    # Shown to the user when the job fails (same fields as AIError)
+    error_type = models.CharField(max_length=20, blank=True)
+    error_message = models.CharField(max_length=255, blank=True)
+    error_suggestion = models.CharField(max_length=255, blank=True)
+
+    attempts = models.PositiveSmallIntegerField(default=0)
+    worker = models.CharField(max_length=100, blank=True, help_text="host:pid of the worker that claimed the job")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True, help_text="Last time the worker reported the job alive")
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+        ordering = ['created_at']
+        verbose_name = "Generation Job"
+
+    def __str__(self):
+        return f"Job {self.pk} ({self.quiz_type}, {self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.STATUS_DONE, self.STATUS_FAILED)
+
+
+@receiver(user_logged_out)
+def flush_answer_buffers_on_logout(sender, request, user, **kwargs):
+    """The session is ending: write any answers still in the write-behind buffer."""
+    if user is not None:
+        from .answer_buffer import flush_user
+        flush_user(user)
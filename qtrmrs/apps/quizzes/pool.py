@@ -0,0 +1,114 @@
+"""
+Pre-generated Quick Quiz pool.
+
+`quick_quiz` takes a ready quiz from here instead of blocking on Gemini.
+The `refill_quiz_pool` management command keeps every demo topic topped up.
+"""
+import logging
+from typing import Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection, transaction
+
+from .models import PooledQuiz, AIModel
+from apps.ai_agent.services import QuizGenerator
+
+logger = logging.getLogger(__name__)
+
+DEMO_TOPICS = [
+    ('Python', 'Variables and Data Types'),
+    ('Python', 'Functions and Arguments'),
+    ('JavaScript', 'ES6 Arrow Functions'),
+    ('JavaScript', 'Async/Await Basics'),
+    ('SQL', 'SELECT Queries'),
+    ('Git', 'Basic Commands'),
+    ('CSS', 'Flexbox Basics'),
+    ('HTML', 'Semantic Elements'),
+]
+
+# Parameters used for every Quick Quiz, pooled or live
+DEMO_LEVEL = 'Easy'
+DEMO_NUM_QUESTIONS = 5
+
+
+def _claim_sql() -> str:
+    """DELETE ... RETURNING the oldest quiz no other claim has locked."""
+    quote = connection.ops.quote_name
+    table, pk = quote(PooledQuiz._meta.db_table), quote(PooledQuiz._meta.pk.column)
+    lock = ' FOR UPDATE SKIP LOCKED' if connection.features.has_select_for_update_skip_locked else ''
+    return (
+        f"DELETE FROM {table} WHERE {pk} = "
+        f"(SELECT {pk} FROM {table} ORDER BY {pk} LIMIT 1{lock}) RETURNING *"
+    )
+
+
+def take_pooled_quiz() -> Optional[PooledQuiz]:
+    """
+    Claim the oldest ready-made quiz from the pool, or None when it's empty.
+
+    The claim is one DELETE ... RETURNING statement whose subquery skips
+    rows locked by concurrent claims, so simultaneous requests each get a
+    different quiz without waiting on one another or finding the pool
+    empty when it isn't. Databases without DELETE ... RETURNING lock and
+    delete the row in two statements instead.
+    """
+    if connection.vendor in ('postgresql', 'sqlite'):
+        return next(iter(PooledQuiz.objects.raw(_claim_sql())), None)
+
+    with transaction.atomic():
+        pooled = PooledQuiz.objects.select_for_update(skip_locked=True).order_by('pk').first()
+        if pooled is not None:
+            pooled.delete()
+        return pooled
+
+
+async def atake_pooled_quiz() -> Optional[PooledQuiz]:
+    """Async version of take_pooled_quiz."""
+    return await sync_to_async(take_pooled_quiz)()
+
+
+def get_pool_model_name() -> str:
+    """Model used to fill the pool: the default active model, else the setting."""
+    default_model = AIModel.objects.filter(is_active=True, is_default=True).first()
+    if default_model:
+        return default_model.model_name
+    return getattr(settings, 'DEFAULT_AI_MODEL', 'gemini-flash-latest')
+
+
+def refill_pool(target: int, model_name: Optional[str] = None, stdout=None) -> int:
+    """
+    Top up every DEMO_TOPICS entry to `target` ready quizzes.
+    Returns the number of quizzes added.
+    """
+    model_name = model_name or get_pool_model_name()
+    generator = QuizGenerator(model_name=model_name)
+    added = 0
+
+    for language, topic in DEMO_TOPICS:
+        missing = target - PooledQuiz.objects.filter(language=language, topic=topic).count()
+        for _ in range(max(missing, 0)):
+            # Bypass the generation cache so the pool holds distinct quizzes
+            questions = generator.generate_quiz(
+                language=language,
+                topic=topic,
+                level=DEMO_LEVEL,
+                num_questions=DEMO_NUM_QUESTIONS,
+                include_code=False,
+                use_cache=False
+            )
+            if not questions:
+                error = getattr(questions, 'message', 'no questions returned')
+                logger.warning(f"Pool refill failed for {language} - {topic}: {error}")
+                break
+            PooledQuiz.objects.create(
+                language=language,
+                topic=topic,
+                questions=questions,
+                model_used=model_name,
+            )
+            added += 1
+            if stdout:
+                stdout.write(f"  + {language} - {topic}")
+
+    return added
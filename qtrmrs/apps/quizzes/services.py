@@ -0,0 +1,123 @@
+"""
+Generating and saving quizzes, shared by the views and the generation
+worker (apps.quizzes.jobs).
+
+`params` is the setup form as read by the quiz views (tech quizzes) or the
+intent parsed from a chat message (general quizzes); both are stored as
+GenerationJob.params when generation is queued.
+"""
+import time
+
+from django.conf import settings
+
+from .builder import QuizBuilder
+from apps.ai_agent import metrics
+
+
+def generate_tech_quiz(generator, params):
+    """Questions (or an AIError) for a programming quiz from the setup form."""
+    return generator.generate_quiz(
+        language=params['language'],
+        topic=params['topic'],
+        level=params['level'],
+        num_questions=params['num_questions'],
+        include_code=params['include_code'],
+        use_cache=params['use_cache']
+    )
+
+
+async def agenerate_tech_quiz(generator, params):
+    """Async version of generate_tech_quiz."""
+    return await generator.generate_quiz_async(
+        language=params['language'],
+        topic=params['topic'],
+        level=params['level'],
+        num_questions=params['num_questions'],
+        include_code=params['include_code'],
+        use_cache=params['use_cache']
+    )
+
+
+def save_tech_quiz(user, params, ai_model, model_name, questions_data):
+    """Persist a generated programming quiz with its questions and options."""
+    return QuizBuilder(questions_data).save(
+        user=user,
+        quiz_type='tech',
+        language=params['language'],
+        topic_description=f"{params['language']}: {params['topic']}"[:255],
+        difficulty=params['level'],
+        ai_model=ai_model,
+        model_used=model_name
+    )
+
+
+def _single_call_chat():
+    return getattr(settings, 'AI_CHAT_MODE', 'combined') == 'combined'
+
+
+def generate_chat_quiz(generator, user_message, num_questions, use_cache):
+    """
+    Returns (params, questions_data) for a chat message, using one combined
+    Gemini call (AI_CHAT_MODE='combined') or intent parsing followed by
+    generation ('two_step'). Each path records its own latency timing so
+    ai_metrics can show what the single call saves.
+    """
+    start_time = time.time()
+    if _single_call_chat():
+        params, questions_data = generator.generate_chat_quiz(user_message, num_questions, use_cache)
+        metrics.observe('chat.single_call', time.time() - start_time)
+        return params, questions_data
+
+    params = generator.parse_general_intent(user_message)
+    # Override with user's question count selection
+    question_count = num_questions if num_questions else params.get('count', 5)
+    questions_data = generator.generate_general_quiz(
+        subject=params.get('subject', 'General Knowledge')[:100],
+        topic=params.get('topic', 'Trivia')[:200],
+        level=params.get('level', 'Intermediate'),
+        num_questions=question_count,
+        use_cache=use_cache
+    )
+    metrics.observe('chat.two_step', time.time() - start_time)
+    return params, questions_data
+
+
+async def agenerate_chat_quiz(generator, user_message, num_questions, use_cache):
+    """Async version of generate_chat_quiz."""
+    start_time = time.time()
+    if _single_call_chat():
+        params, questions_data = await generator.generate_chat_quiz_async(user_message, num_questions, use_cache)
+        metrics.observe('chat.single_call', time.time() - start_time)
+        return params, questions_data
+
+    params = await generator.parse_general_intent_async(user_message)
+    question_count = num_questions if num_questions else params.get('count', 5)
+    questions_data = await generator.generate_general_quiz_async(
+        subject=params.get('subject', 'General Knowledge')[:100],
+        topic=params.get('topic', 'Trivia')[:200],
+        level=params.get('level', 'Intermediate'),
+        num_questions=question_count,
+        use_cache=use_cache
+    )
+    metrics.observe('chat.two_step', time.time() - start_time)
+    return params, questions_data
+
+
+def save_general_quiz(user, params, ai_model, model_name, questions_data):
+    """Persist a generated general-knowledge quiz with its questions and options."""
+    # Normalize difficulty to lowercase
+    difficulty = params.get('level', 'Intermediate').lower()
+    if difficulty not in ['beginner', 'intermediate', 'expert']:
+        difficulty = 'intermediate'
+
+    # No code for general quizzes
+    questions_data = [{**q_data, 'code_snippet': ''} for q_data in questions_data]
+    return QuizBuilder(questions_data).save(
+        user=user,
+        quiz_type='general',
+        language=params.get('subject', 'General')[:50],
+        topic_description=f"{params.get('subject')}: {params.get('topic')}"[:255],
+        difficulty=difficulty,
+        ai_model=ai_model,
+        model_used=model_name
+    )
@@ -0,0 +1,95 @@
+"""
+Persistence for streamed quiz generation.
+
+The first question is saved inside the request so the player can open
+immediately; the rest of the stream is drained into the database by a
+background thread while the user answers. The model call is recorded
+(breaker and telemetry) only when that thread has drained the stream, so
+its latency covers the whole generation.
+"""
+import logging
+import threading
+from datetime import timedelta
+from typing import Iterator, Optional, Union
+
+from django.db import close_old_connections, connection
+from django.utils import timezone
+
+from .builder import QuizBuilder
+from .models import Quiz, Question
+from apps.ai_agent.services import AIError
+
+logger = logging.getLogger(__name__)
+
+# A quiz stuck in is_generating longer than this is treated as finished
+# (e.g. the worker running the stream was restarted).
+STALE_GENERATION_AFTER = timedelta(minutes=5)
+
+
+def save_question(quiz: Quiz, q_data: dict, position: int) -> Optional[Question]:
+    """Insert one AI question dict and its options (None if it failed validation)."""
+    questions = QuizBuilder([q_data]).add_to(quiz, start=position)
+    return questions[0] if questions else None
+
+
+def persist_stream(quiz: Quiz, stream: Iterator[Union[dict, AIError]], saved: int = 0) -> int:
+    """
+    Save every remaining question from the stream after the `saved` already
+    in the quiz, then mark the quiz done and set total_questions to what
+    actually arrived.
+    """
+    try:
+        for item in stream:
+            if isinstance(item, AIError):
+                logger.warning(f"Stream for quiz {quiz.id} ended early: {item.message}")
+                break
+            if save_question(quiz, item, position=saved):
+                saved += 1
+    except Exception as e:
+        logger.error(f"Persisting streamed quiz {quiz.id} failed: {e}")
+    finally:
+        Quiz.objects.filter(id=quiz.id).update(total_questions=saved, is_generating=False)
+    return saved
+
+
+def _persist_in_background(quiz: Quiz, stream) -> None:
+    close_old_connections()
+    try:
+        # The first question was saved in the request
+        persist_stream(quiz, stream, saved=1)
+    finally:
+        connection.close()
+
+
+def start_streamed_quiz(quiz: Quiz, stream: Iterator[Union[dict, AIError]]) -> Optional[AIError]:
+    """
+    Save the first question synchronously and hand the rest of the stream to
+    a background thread. Returns an AIError (and deletes the quiz) if not even
+    one question could be generated.
+    """
+    first = next(stream, None)
+    if first is None or isinstance(first, AIError) or not save_question(quiz, first, position=0):
+        quiz.delete()
+        return first if isinstance(first, AIError) else AIError(
+            error_type='unknown',
+            message="AI failed to generate quiz.",
+            suggestion="Try again or select a different AI model."
+        )
+
+    threading.Thread(
+        target=_persist_in_background, args=(quiz, stream), daemon=True
+    ).start()
+    return None
+
+
+def refresh_generation_state(quiz: Quiz) -> bool:
+    """
+    Reload is_generating from the database, clearing it if the stream has
+    been running for too long. Returns True if questions are still coming.
+    """
+    quiz.refresh_from_db(fields=['is_generating', 'total_questions'])
+    if quiz.is_generating and quiz.created_at < timezone.now() - STALE_GENERATION_AFTER:
+        quiz.total_questions = quiz.questions.count()
+        quiz.is_generating = False
+        quiz.save(update_fields=['total_questions', 'is_generating'])
+    return quiz.is_generating
@@ -0,0 +1,135 @@
+"""
+Tests for the write-behind answer buffer.
+"""
+from io import StringIO
+
+import pytest
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.urls import reverse
+
+from apps.quizzes import answer_buffer
+from apps.quizzes.models import Option, Question, Quiz, UserAnswer
+
+
+@pytest.fixture(autouse=True)
+def buffering(settings):
+    settings.QUIZ_ANSWER_BUFFER_ENABLED = True
+    # The test cache is locmem; one process shares it fine
+    settings.QUIZ_ANSWER_BUFFER_ALLOW_LOCMEM = True
+    caches['default'].clear()
+    yield
+    caches['default'].clear()
+
+
+def _answer(client, quiz, position, correct=True):
+    question = quiz.questions.get(position=position)
+    return client.post(
+        reverse('submit_answer', args=[quiz.id, question.id]),
+        {'option': question.options.filter(is_correct=correct).first().id, 'action': 'next', 'time_taken': '10'}
+    )
+
+
+class TestBuffering:
+    """Tests for answers held in the cache until the quiz completes."""
+
+    def test_answer_is_buffered_not_written(self, authenticated_client, quiz):
+        response = _answer(authenticated_client, quiz, 0)
+
+        assert b'print(type(5))' in response.content
+        assert not UserAnswer.objects.filter(quiz=quiz).exists()
+        quiz.refresh_from_db()
+        assert quiz.current_position == 0
+        assert quiz.answers_buffered_at is not None
+        # The player still resumes after the buffered answer
+        assert b'print(type(5))' in authenticated_client.get(reverse('quiz_player', args=[quiz.id])).content
+
+    def test_completion_flushes_in_one_insert(self, authenticated_client, quiz, django_capture_on_commit_callbacks):
+        _answer(authenticated_client, quiz, 0)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = _answer(authenticated_client, quiz, 1, correct=False)
+
+        assert response['HX-Redirect'] == f"/quiz/results/{quiz.id}/"
+        quiz.refresh_from_db()
+        assert (quiz.score, quiz.answered_count, quiz.current_position) == (50, 2, 2)
+        assert quiz.answers_buffered_at is None
+        assert UserAnswer.objects.filter(quiz=quiz, time_taken=10).count() == 2
+        assert answer_buffer._buffered(quiz) == {}
+
+    def test_duplicate_submission_is_buffered_once(self, authenticated_client, quiz):
+        _answer(authenticated_client, quiz, 0)
+        _answer(authenticated_client, quiz, 0, correct=False)
+
+        assert answer_buffer._buffered(quiz)[0]['is_correct'] is True
+
+    def test_per_process_cache_refused(self, quiz, settings):
+        """A locmem cache would split answers across workers outside DEBUG."""
+        settings.QUIZ_ANSWER_BUFFER_ALLOW_LOCMEM = False
+        settings.DEBUG = False
+
+        with pytest.raises(ImproperlyConfigured):
+            answer_buffer.apply(quiz)
+
+    def test_retry_discards_buffer(self, authenticated_client, quiz):
+        _answer(authenticated_client, quiz, 0)
+
+        authenticated_client.post(reverse('retry_quiz', args=[quiz.id]))
+
+        quiz.refresh_from_db()
+        assert answer_buffer._buffered(quiz) == {}
+        assert quiz.answers_buffered_at is None
+
+
+class TestRecovery:
+    """Tests for flushing and for answers lost from the cache."""
+
+    def test_lost_buffer_resumes_at_last_flush(self, authenticated_client, quiz):
+        _answer(authenticated_client, quiz, 0)
+        caches['default'].clear()
+        quiz.refresh_from_db()
+
+        assert answer_buffer.flush(quiz) == 0
+
+        assert quiz.answers_buffered_at is None
+        assert b'No keyword needed' in authenticated_client.get(reverse('quiz_player', args=[quiz.id])).content
+
+    def test_answers_after_a_gap_wait_for_it(self, authenticated_client, quiz):
+        third = Question.objects.create(quiz=quiz, text='What does len("ab") return?', position=2)
+        Option.objects.create(question=third, text='2', is_correct=True)
+        Quiz.objects.filter(id=quiz.id).update(total_questions=3)
+        _answer(authenticated_client, quiz, 0)
+        _answer(authenticated_client, quiz, 1)
+        caches['default'].delete(answer_buffer._key(quiz.id, 0))
+        quiz.refresh_from_db()
+
+        assert answer_buffer.flush(quiz) == 0
+        assert quiz.current_position == 0
+        assert quiz.answers_buffered_at is not None
+
+        # The gap is asked again, then play continues after the buffered answer
+        assert b'No keyword needed' in authenticated_client.get(reverse('quiz_player', args=[quiz.id])).content
+        assert b'len(&quot;ab&quot;)' in _answer(authenticated_client, quiz, 0).content
+        response = _answer(authenticated_client, quiz, 2)
+
+        assert response['HX-Redirect'] == f"/quiz/results/{quiz.id}/"
+        assert UserAnswer.objects.filter(quiz=quiz).count() == 3
+
+    def test_sweeper_flushes_idle_buffers_only(self, authenticated_client, quiz):
+        _answer(authenticated_client, quiz, 0)
+
+        call_command('flush_answer_buffers', once=True, stdout=StringIO())
+        assert not UserAnswer.objects.filter(quiz=quiz).exists()
+
+        call_command('flush_answer_buffers', once=True, idle=0, stdout=StringIO())
+        quiz.refresh_from_db()
+        assert UserAnswer.objects.filter(quiz=quiz).count() == 1
+        assert (quiz.answered_count, quiz.current_position) == (1, 1)
+
+    def test_logout_flushes(self, authenticated_client, quiz):
+        _answer(authenticated_client, quiz, 0)
+
+        authenticated_client.post(reverse('logout'))
+
+        assert Quiz.objects.get(id=quiz.id).answered_count == 1
@@ -0,0 +1,84 @@
+"""
+Tests for the native async views used under ASGI.
+"""
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+from asgiref.sync import async_to_sync
+from django.test import AsyncRequestFactory
+from apps.quizzes.models import Quiz, UserAnswer
+from apps.quizzes.views import create_quiz_async, generate_all_explanations_async
+
+
+def async_request(path, user, data):
+    request = AsyncRequestFactory().post(path, data)
+    request.user = user
+
+    async def auser():
+        return user
+
+    request.auser = auser
+    return request
+
+
+class TestCreateQuizAsync:
+    """Tests for create_quiz_async."""
+
+    def test_creates_quiz(self, user, mock_gemini):
+        """The async view awaits the SDK's async client and saves the quiz."""
+        mock_gemini.generate_content_async = AsyncMock(
+            return_value=SimpleNamespace(text=mock_gemini.generate_content.return_value.text)
+        )
+        request = async_request('/quiz/create/', user, {
+            'topic': 'Lists', 'language_select': 'Python', 'level': 'Beginner', 'num_questions': '1'
+        })
+
+        response = async_to_sync(create_quiz_async)(request)
+
+        quiz = Quiz.objects.get(user=user)
+        assert response['HX-Redirect'] == f"/quiz/play/{quiz.id}/"
+        assert quiz.questions.count() == 1
+        mock_gemini.generate_content_async.assert_awaited_once()
+        mock_gemini.generate_content.assert_not_called()
+
+    def test_streaming(self, user, mock_gemini, settings, monkeypatch):
+        """With AI_STREAMING_ENABLED the async view streams like the sync one."""
+        from apps.quizzes import streaming
+        settings.AI_STREAMING_ENABLED = True
+        # Drain the rest of the stream inline instead of in a thread
+        monkeypatch.setattr(streaming, 'threading', SimpleNamespace(
+            Thread=lambda target, args, **kw: SimpleNamespace(
+                start=lambda: streaming.persist_stream(args[0], args[1], saved=1)
+            )
+        ))
+        mock_gemini.generate_content.return_value = [mock_gemini.generate_content.return_value]
+        request = async_request('/quiz/create/', user, {
+            'topic': 'Lists', 'language_select': 'Python', 'level': 'Beginner', 'num_questions': '1'
+        })
+
+        response = async_to_sync(create_quiz_async)(request)
+
+        quiz = Quiz.objects.get(user=user)
+        assert response['HX-Redirect'] == f"/quiz/play/{quiz.id}/"
+        assert quiz.questions.get().position == 0
+        assert quiz.is_generating is False
+        assert mock_gemini.generate_content.call_args.kwargs['stream'] is True
+
+
+class TestExplanationsAsync:
+    """Tests for generate_all_explanations_async."""
+
+    def test_explains_wrong_answers(self, user, quiz, mock_gemini):
+        """Wrong and skipped answers get explanations saved."""
+        mock_gemini.generate_content_async = AsyncMock(
+            return_value=SimpleNamespace(text='Because assignment creates variables.')
+        )
+        for question in quiz.questions.all():
+            UserAnswer.objects.create(quiz=quiz, question=question, selected_option=None)
+
+        request = async_request(f'/quiz/results/{quiz.id}/explain-all/', user, {})
+        response = async_to_sync(generate_all_explanations_async)(request, quiz_id=quiz.id)
+
+        assert response.status_code == 200
+        assert b'Because assignment creates variables.' in response.content
+        assert not UserAnswer.objects.filter(quiz=quiz, error_explanation='').exists()
@@ -0,0 +1,33 @@
+"""
+End-to-end flow benchmark, also run as a smoke test of every flow.
+
+    pytest -m benchmark
+    BENCHMARK_ITERATIONS=50 BENCHMARK_OUTPUT=bench.json pytest -m benchmark
+"""
+import json
+import os
+
+import pytest
+from apps.core import benchmark
+
+
+@pytest.mark.benchmark
+def test_flows_benchmark(db):
+    """Every flow completes against the fake backend and is measured."""
+    iterations = int(os.getenv('BENCHMARK_ITERATIONS', 1))
+
+    report = benchmark.run(
+        iterations=iterations,
+        # Realistic AI timing only when asked for a real run
+        AI_FAKE_LATENCY=0.8 if iterations > 1 else 0,
+        AI_FAKE_TOKENS_PER_SECOND=200 if iterations > 1 else 0,
+    )
+
+    if os.getenv('BENCHMARK_OUTPUT'):
+        with open(os.environ['BENCHMARK_OUTPUT'], 'w') as f:
+            json.dump(report, f, indent=2)
+
+    assert set(report['flows']) == set(benchmark.FLOWS)
+    assert not any(flow['failures'] for flow in report['flows'].values())
+    assert report['steps']['submit_answer']['count'] == 5 * iterations
+    assert report['steps']['create_quiz']['mean_queries'] > 0
@@ -0,0 +1,66 @@
+"""
+Tests for QuizBuilder, the shared quiz persistence service.
+"""
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from apps.quizzes.builder import QuizBuilder, InvalidQuizData, clean_question
+from apps.quizzes.models import Option
+
+
+def _question(number):
+    return {
+        'text': f'Question {number}?',
+        'code_snippet': '',
+        'options': ['a', 'b', 'c', 'd'],
+        'correct_answer': 'c',
+        'explanation': f'Because {number}.',
+    }
+
+
+def _statements(queries):
+    # Savepoints come from the test's own transaction, not the builder
+    return [q['sql'] for q in queries.captured_queries if 'SAVEPOINT' not in q['sql']]
+
+
+class TestValidation:
+    """Tests for clean_question."""
+
+    def test_unplayable_questions_are_rejected(self):
+        assert clean_question({**_question(1), 'text': ' '}) is None
+        assert clean_question({**_question(1), 'options': ['a', 'a']}) is None
+        assert clean_question({**_question(1), 'correct_answer': 'z'}) is None
+
+    def test_dict_options_and_whitespace_are_normalised(self):
+        question = clean_question({**_question(1), 'options': [{'text': 'a'}, ' b '], 'correct_answer': 'b'})
+
+        assert question['options'] == ['a', 'b']
+        assert question['correct_index'] == 1
+
+
+class TestSave:
+    """Tests for QuizBuilder.save."""
+
+    @pytest.mark.parametrize('count', [1, 20])
+    def test_three_statements_whatever_the_size(self, user, count):
+        with CaptureQueriesContext(connection) as queries:
+            quiz = QuizBuilder([_question(n) for n in range(count)]).save(
+                user=user, language='Python', topic_description='Python: Lists', difficulty='beginner'
+            )
+
+        assert len(_statements(queries)) == 3
+        assert quiz.total_questions == count
+        assert Option.objects.filter(question__quiz=quiz).count() == count * 4
+        assert Option.objects.filter(question__quiz=quiz, is_correct=True).values_list('text', flat=True).distinct().get() == 'c'
+
+    def test_invalid_questions_are_dropped(self, user):
+        builder = QuizBuilder([_question(1), {**_question(2), 'correct_answer': 'z'}])
+
+        quiz = builder.save(user=user, language='Python', topic_description='x', difficulty='beginner')
+
+        assert builder.dropped == 1
+        assert list(quiz.questions.values_list('text', flat=True)) == ['Question 1?']
+
+    def test_nothing_valid_raises(self, user):
+        with pytest.raises(InvalidQuizData):
+            QuizBuilder([{'text': 'No options'}]).save(user=user, language='Python', topic_description='x', difficulty='beginner')
@@ -0,0 +1,135 @@
+"""
+Tests for the queued quiz generation (GenerationJob) flow.
+"""
+from datetime import timedelta
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from apps.quizzes.jobs import claim_jobs, heartbeat, requeue_stale_jobs, run_job
+from apps.quizzes.models import GenerationJob, Quiz
+
+
+SETUP_FORM = {
+    'topic': 'Lists', 'language_select': 'Python', 'level': 'Beginner', 'num_questions': '1'
+}
+
+
+@pytest.fixture
+def queue_enabled(settings):
+    settings.AI_JOB_QUEUE_ENABLED = True
+
+
+class TestEnqueue:
+    """Tests for views enqueueing instead of generating."""
+
+    def test_create_quiz_enqueues(self, authenticated_client, mock_gemini, queue_enabled):
+        response = authenticated_client.post(reverse('create_quiz'), SETUP_FORM)
+
+        job = GenerationJob.objects.get()
+        assert job.status == GenerationJob.STATUS_PENDING
+        assert job.params['topic'] == 'Lists'
+        assert reverse('generation_status', args=[job.id]).encode() in response.content
+        assert not Quiz.objects.exists()
+        mock_gemini.generate_content.assert_not_called()
+
+    def test_chat_enqueues(self, authenticated_client, mock_gemini, queue_enabled):
+        authenticated_client.post(reverse('chat_process'), {'message': 'Quiz me on the Roman Empire', 'num_questions': '3'})
+
+        job = GenerationJob.objects.get()
+        assert job.quiz_type == 'general'
+        assert job.params == {'message': 'Quiz me on the Roman Empire', 'num_questions': 3, 'use_cache': True}
+        mock_gemini.generate_content.assert_not_called()
+
+
+class TestWorker:
+    """Tests for claiming and running jobs."""
+
+    def test_claim_marks_running(self, user):
+        first = GenerationJob.objects.create(user=user, params={})
+        GenerationJob.objects.create(user=user, params={})
+
+        claimed = claim_jobs(1, 'host:1')
+
+        assert [job.pk for job in claimed] == [first.pk]
+        first.refresh_from_db()
+        assert first.status == GenerationJob.STATUS_RUNNING
+        assert first.attempts == 1 and first.worker == 'host:1'
+        assert claim_jobs(5, 'host:2')[0].pk != first.pk
+
+    def test_run_job_saves_quiz(self, authenticated_client, mock_gemini, queue_enabled):
+        authenticated_client.post(reverse('create_quiz'), SETUP_FORM)
+        job, = claim_jobs(1, 'host:1')
+
+        run_job(job)
+
+        job.refresh_from_db()
+        assert job.status == GenerationJob.STATUS_DONE
+        assert job.quiz.questions.count() == 1
+        response = authenticated_client.get(reverse('generation_status', args=[job.id]))
+        assert response['HX-Redirect'] == f"/quiz/play/{job.quiz.id}/"
+
+    def test_failed_job_shows_error(self, authenticated_client, mock_gemini, queue_enabled, settings):
+        settings.AI_FALLBACK_ENABLED = False
+        mock_gemini.generate_content.side_effect = Exception("429 Resource exhausted")
+        authenticated_client.post(reverse('create_quiz'), SETUP_FORM)
+        job, = claim_jobs(1, 'host:1')
+
+        run_job(job)
+
+        assert job.status == GenerationJob.STATUS_FAILED
+        assert job.error_type == 'quota'
+        response = authenticated_client.get(reverse('generation_status', args=[job.id]))
+        assert b'Quota Exceeded' in response.content
+
+    def test_pending_job_keeps_polling(self, authenticated_client, user):
+        job = GenerationJob.objects.create(user=user, params={})
+
+        response = authenticated_client.get(reverse('generation_status', args=[job.id]))
+
+        assert 'HX-Redirect' not in response
+        assert b'hx-trigger="load delay:1s"' in response.content
+
+    def test_stale_jobs_requeued(self, user, settings):
+        settings.AI_JOB_MAX_ATTEMPTS = 2
+        long_ago = timezone.now() - timedelta(hours=1)
+        retry = GenerationJob.objects.create(user=user, params={}, status='running', attempts=1, started_at=long_ago)
+        give_up = GenerationJob.objects.create(user=user, params={}, status='running', attempts=2, started_at=long_ago)
+
+        assert requeue_stale_jobs() == 1
+
+        retry.refresh_from_db()
+        give_up.refresh_from_db()
+        assert retry.status == GenerationJob.STATUS_PENDING
+        assert give_up.status == GenerationJob.STATUS_FAILED
+
+    def test_heartbeat_keeps_slow_job(self, user, settings):
+        """A long-running job with a recent heartbeat isn't requeued."""
+        job = GenerationJob.objects.create(user=user, params={})
+        claim_jobs(1, 'host:1')
+        GenerationJob.objects.filter(pk=job.pk).update(
+            started_at=timezone.now() - timedelta(hours=1), heartbeat_at=timezone.now() - timedelta(hours=1)
+        )
+
+        assert heartbeat('host:1', [job.pk]) == 1
+        assert requeue_stale_jobs() == 0
+        assert heartbeat('host:2', [job.pk]) == 0
+
+    def test_reclaimed_job_discards_late_result(self, authenticated_client, mock_gemini, queue_enabled):
+        """A worker finishing a job that was requeued under it doesn't overwrite the new claim."""
+        authenticated_client.post(reverse('create_quiz'), SETUP_FORM)
+        late, = claim_jobs(1, 'host:1')
+        GenerationJob.objects.filter(pk=late.pk).update(status=GenerationJob.STATUS_PENDING)
+        current, = claim_jobs(1, 'host:2')
+
+        run_job(late)
+
+        current.refresh_from_db()
+        assert (current.status, current.worker, current.quiz) == (GenerationJob.STATUS_RUNNING, 'host:2', None)
+        assert not Quiz.objects.exists()
+
+        run_job(current)
+
+        current.refresh_from_db()
+        assert current.status == GenerationJob.STATUS_DONE
+        assert Quiz.objects.get() == current.quiz
@@ -0,0 +1,75 @@
+"""
+Tests for the pre-generated Quick Quiz pool.
+"""
+from io import StringIO
+from django.core.management import call_command
+from django.urls import reverse
+from apps.quizzes.models import PooledQuiz, Quiz
+from apps.quizzes.pool import DEMO_TOPICS, take_pooled_quiz
+
+
+POOLED_QUESTIONS = [{
+    'text': 'Which keyword defines a function in Python?',
+    'options': ['func', 'def', 'fn', 'lambda'],
+    'correct_answer': 'def',
+    'explanation': 'Functions are defined with def.',
+}]
+
+
+class TestQuickQuizPool:
+    """Tests for serving Quick Quiz from the pool."""
+
+    def test_guest_served_from_pool(self, client, mock_gemini):
+        """Guests get a pooled quiz without calling the AI."""
+        PooledQuiz.objects.create(language='Python', topic='Functions', questions=POOLED_QUESTIONS)
+
+        response = client.get(reverse('quick_quiz'))
+
+        assert response.status_code == 302
+        assert response.url == reverse('demo_player')
+        assert client.session['demo_quiz']['topic'] == 'Python - Functions'
+        assert not PooledQuiz.objects.exists()
+        mock_gemini.generate_content.assert_not_called()
+
+    def test_user_served_from_pool(self, authenticated_client, mock_gemini):
+        """Logged-in users get the pooled quiz saved to their account."""
+        PooledQuiz.objects.create(language='Python', topic='Functions', questions=POOLED_QUESTIONS)
+
+        response = authenticated_client.get(reverse('quick_quiz'))
+
+        quiz = Quiz.objects.get()
+        assert response.url == reverse('quiz_player', args=[quiz.id])
+        assert quiz.questions.count() == 1
+        mock_gemini.generate_content.assert_not_called()
+
+    def test_empty_pool_falls_back_to_live(self, client, mock_gemini):
+        """An empty pool generates the quiz live."""
+        response = client.get(reverse('quick_quiz'))
+
+        assert response.status_code == 302
+        assert mock_gemini.generate_content.call_count == 1
+
+    def test_claim_is_one_statement(self, db, django_assert_num_queries):
+        """Each claim deletes and returns the oldest quiz in a single query."""
+        created = [PooledQuiz.objects.create(language='Python', topic=f'T{n}', questions=POOLED_QUESTIONS).topic for n in range(3)]
+
+        claimed = []
+        for _ in range(3):
+            with django_assert_num_queries(1):
+                pooled = take_pooled_quiz()
+            assert pooled.questions == POOLED_QUESTIONS
+            claimed.append(pooled.topic)
+
+        assert claimed == created
+        assert take_pooled_quiz() is None
+
+    def test_refill_command_tops_up(self, mock_gemini):
+        """refill_quiz_pool fills every demo topic to the high-water mark."""
+        PooledQuiz.objects.create(
+            language=DEMO_TOPICS[0][0], topic=DEMO_TOPICS[0][1], questions=POOLED_QUESTIONS
+        )
+
+        call_command('refill_quiz_pool', size=2, stdout=StringIO())
+
+        assert PooledQuiz.objects.count() == 2 * len(DEMO_TOPICS)
+        assert mock_gemini.generate_content.call_count == 2 * len(DEMO_TOPICS) - 1
@@ -0,0 +1,47 @@
+"""
+Tests for the seed_scale_data management command.
+"""
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from apps.quizzes.models import Quiz, UserAnswer
+from apps.users.models import User, UserProfile, UserBadge
+
+
+def seed(**options):
+    call_command('seed_scale_data', stdout=StringIO(), **options)
+
+
+class TestSeedScaleData:
+    """Tests for synthetic scale-test data."""
+
+    def test_creates_consistent_history(self, db):
+        seed(users=30, quizzes_per_user=4, chunk_size=8)
+
+        assert User.objects.count() == 30
+        assert UserProfile.objects.count() == 30
+        assert Quiz.objects.exists() and UserAnswer.objects.exists()
+        for quiz in Quiz.objects.filter(completed_at__isnull=False)[:20]:
+            assert quiz.answers.count() == quiz.total_questions == quiz.questions.count()
+        for profile in UserProfile.objects.all():
+            correct = UserAnswer.objects.filter(quiz__user=profile.user, quiz__completed_at__isnull=False, is_correct=True).count()
+            assert profile.total_correct_answers == correct
+        assert not UserBadge.objects.exclude(badge__requirement_type__in=['level', 'streak', 'score', 'correct']).exists()
+
+    def test_reruns_add_users(self, db):
+        seed(users=5, quizzes_per_user=1)
+        seed(users=5, quizzes_per_user=1)
+
+        assert User.objects.filter(username__startswith='scale').count() == 10
+
+    def test_dates_spread_over_history(self, db):
+        seed(users=20, quizzes_per_user=5)
+
+        dates = {quiz.created_at.date() for quiz in Quiz.objects.all()}
+        assert len(dates) > 5
+
+    def test_sqlite_refuses_workers(self, db):
+        with pytest.raises(CommandError):
+            seed(users=5, workers=2)
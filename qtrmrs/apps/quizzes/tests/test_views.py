@@ -1,6 +1,8 @@
 """
 Tests for quiz views.
 """
+import json
+
 import pytest
 from django.urls import reverse
 
@@ -35,6 +37,37 @@ class TestQuizPlayer:
         assert response.status_code == 200
         assert quiz.topic_description.encode() in response.content
 
+    def test_player_serves_question_at_cursor(self, authenticated_client, quiz, django_assert_num_queries):
+        """The current question is one (quiz, position) lookup: session, user, quiz, question, options."""
+        quiz.current_position = 1
+        quiz.save(update_fields=['current_position'])
+
+        with django_assert_num_queries(5):
+            response = authenticated_client.get(reverse('quiz_player', args=[quiz.id]))
+
+        assert response.status_code == 200
+        assert b'print(type(5))' in response.content
+
+    def test_player_completes_unfinished_quiz(self, authenticated_client, quiz, user):
+        """A quiz whose last submission died before completing it is completed by the player."""
+        from apps.quizzes.models import UserAnswer
+        for question in quiz.questions.all():
+            UserAnswer.objects.create(
+                quiz=quiz, question=question, is_correct=True, time_taken=10,
+                selected_option=question.options.get(is_correct=True)
+            )
+        quiz.answered_count = quiz.current_position = 2
+        quiz.save(update_fields=['answered_count', 'current_position'])
+
+        response = authenticated_client.get(reverse('quiz_player', args=[quiz.id]))
+
+        assert response.url == reverse('quiz_results', args=[quiz.id])
+        quiz.refresh_from_db()
+        assert (quiz.score, quiz.xp_awarded) == (100, True)
+        assert quiz.completed_at is not None
+        user.profile.refresh_from_db()
+        assert user.profile.xp > 0
+
 
 class TestSubmitAnswer:
     """Tests for answer submission."""
@@ -69,6 +102,163 @@ class TestSubmitAnswer:
         assert answer.selected_option is None
         assert answer.is_correct is False
 
+    def test_answer_advances_cursor(self, authenticated_client, quiz, db):
+        """Answering moves the player's cursor to the next position."""
+        question = quiz.questions.get(position=0)
+
+        response = authenticated_client.post(
+            reverse('submit_answer', args=[quiz.id, question.id]),
+            {'action': 'skip', 'time_taken': '5'}
+        )
+
+        quiz.refresh_from_db()
+        assert (quiz.answered_count, quiz.current_position) == (1, 1)
+        assert b'print(type(5))' in response.content
+
+    def test_answer_ahead_of_cursor_is_rejected(self, authenticated_client, quiz, db):
+        """Posting a later question can't skip the current one."""
+        from apps.quizzes.models import UserAnswer
+        question = quiz.questions.get(position=1)
+
+        response = authenticated_client.post(
+            reverse('submit_answer', args=[quiz.id, question.id]),
+            {'action': 'skip', 'time_taken': '5'}
+        )
+
+        quiz.refresh_from_db()
+        assert (quiz.answered_count, quiz.current_position) == (0, 0)
+        assert not UserAnswer.objects.filter(quiz=quiz).exists()
+        assert b'define a variable' in response.content
+
+
+class TestSubmitAnswerQueries:
+    """
+    Query budgets for the answer hot path. Each count includes the session
+    and user lookups, and the SAVEPOINT/RELEASE pairs that atomic() issues
+    inside the test's transaction (a plain BEGIN/COMMIT in production).
+    """
+
+    def _submit(self, client, quiz, question, option):
+        return client.post(
+            reverse('submit_answer', args=[quiz.id, question.id]),
+            {'option': option.id, 'action': 'next', 'time_taken': '10'}
+        )
+
+    def _answers(self, quiz):
+        """(question, correct option) in play order."""
+        return [(q, q.options.get(is_correct=True)) for q in quiz.questions.order_by('position')]
+
+    def test_answer_budget(self, authenticated_client, quiz, django_assert_num_queries):
+        """Fetch, cursor update, insert, next question and its options."""
+        first, _ = self._answers(quiz)
+
+        with django_assert_num_queries(9):
+            self._submit(authenticated_client, quiz, *first)
+
+    def test_completion_budget(self, authenticated_client, quiz, django_assert_num_queries):
+        """The last answer adds one aggregate, the XP claim, the profile and badges, and the session save."""
+        first, last = self._answers(quiz)
+        self._submit(authenticated_client, quiz, *first)
+
+        with django_assert_num_queries(18):
+            response = self._submit(authenticated_client, quiz, *last)
+
+        assert response['HX-Redirect'] == f"/quiz/results/{quiz.id}/"
+
+    def test_duplicate_budget(self, authenticated_client, quiz, django_assert_num_queries):
+        """A repeated submission writes nothing and re-renders the next question."""
+        from apps.quizzes.models import UserAnswer
+        first, _ = self._answers(quiz)
+        self._submit(authenticated_client, quiz, *first)
+
+        with django_assert_num_queries(5):
+            self._submit(authenticated_client, quiz, *first)
+
+        assert UserAnswer.objects.filter(quiz=quiz).count() == 1
+        quiz.refresh_from_db()
+        assert quiz.answered_count == 1
+
+
+class TestExamMode:
+    """Tests for the whole-quiz exam player and its bulk submit endpoint."""
+
+    @pytest.fixture(autouse=True)
+    def exam_mode(self, settings):
+        settings.QUIZ_EXAM_MODE_ENABLED = True
+
+    def _submit(self, client, quiz, answers):
+        return client.post(
+            reverse('submit_exam', args=[quiz.id]),
+            json.dumps({'answers': answers}), content_type='application/json'
+        )
+
+    def _answers(self, quiz, correct=True):
+        return [
+            {'question': q.id, 'option': q.options.filter(is_correct=correct).first().id, 'time_taken': 10}
+            for q in quiz.questions.order_by('position')
+        ]
+
+    def test_payload_has_every_question_but_no_answers(self, authenticated_client, quiz, django_assert_num_queries):
+        """Session, user, quiz, questions, options."""
+        with django_assert_num_queries(5):
+            response = authenticated_client.get(reverse('quiz_player', args=[quiz.id]))
+
+        questions = response.context['questions']
+        assert [q['text'] for q in questions] == list(quiz.questions.order_by('position').values_list('text', flat=True))
+        assert all(set(o) == {'id', 'text'} for q in questions for o in q['options'])
+        assert b'is_correct' not in response.content
+
+    def test_bulk_submit_completes_quiz(self, authenticated_client, quiz):
+        from apps.quizzes.models import UserAnswer
+        response = self._submit(authenticated_client, quiz, self._answers(quiz))
+
+        assert response.json() == {'redirect': f"/quiz/results/{quiz.id}/"}
+        quiz.refresh_from_db()
+        assert quiz.score == 100
+        assert quiz.xp_awarded
+        assert (quiz.answered_count, quiz.current_position) == (2, 2)
+        assert UserAnswer.objects.filter(quiz=quiz, time_taken=10).count() == 2
+
+    def test_missing_answers_are_skipped(self, authenticated_client, quiz):
+        from apps.quizzes.models import UserAnswer
+        self._submit(authenticated_client, quiz, self._answers(quiz)[:1])
+
+        quiz.refresh_from_db()
+        assert quiz.score == 50
+        assert UserAnswer.objects.filter(quiz=quiz, selected_option__isnull=True).count() == 1
+
+    def test_foreign_option_is_rejected(self, authenticated_client, quiz):
+        from apps.quizzes.models import UserAnswer
+        first, second = self._answers(quiz)
+        first['option'] = second['option']
+
+        response = self._submit(authenticated_client, quiz, [first, second])
+
+        assert response.status_code == 400
+        assert not UserAnswer.objects.filter(quiz=quiz).exists()
+
+    def test_malformed_body_is_rejected(self, authenticated_client, quiz):
+        response = authenticated_client.post(reverse('submit_exam', args=[quiz.id]), 'answers', content_type='application/json')
+
+        assert response.status_code == 400
+
+    def test_budget_does_not_grow_with_quiz_size(self, authenticated_client, quiz, user):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from apps.quizzes.builder import QuizBuilder
+        big = QuizBuilder([
+            {'text': f'Question {n}?', 'options': ['a', 'b'], 'correct_answer': 'a'} for n in range(20)
+        ]).save(user=user, language='Python', topic_description='Python: Lists', difficulty='beginner')
+        answers = [self._answers(quiz, correct=False), self._answers(big, correct=False)]
+
+        counts = []
+        for target, payload in zip([quiz, big], answers):
+            with CaptureQueriesContext(connection) as queries:
+                assert self._submit(authenticated_client, target, payload).status_code == 200
+            counts.append(len(queries))
+
+        assert counts[0] == counts[1]
+
 
 class TestQuizResults:
     """Tests for results view."""
@@ -165,6 +355,8 @@ class TestQuizRetry:
         
         # Answers should be cleared
         assert not UserAnswer.objects.filter(quiz=quiz).exists()
+        quiz.refresh_from_db()
+        assert (quiz.answered_count, quiz.current_position) == (0, 0)
 
 
 class TestXPTracking:
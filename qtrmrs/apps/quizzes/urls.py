@@ -1,20 +1,27 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+# Under ASGI, the AI-bound views can run natively async
+ASYNC = getattr(settings, 'ASYNC_VIEWS_ENABLED', False)
+
 urlpatterns = [
     path('setup/', views.quiz_setup, name='quiz_setup'),
-    path('create/', views.create_quiz, name='create_quiz'),
+    path('create/', views.create_quiz_async if ASYNC else views.create_quiz, name='create_quiz'),
+    path('jobs/<int:job_id>/', views.generation_status, name='generation_status'),
     
     path('play/<int:quiz_id>/', views.quiz_player, name='quiz_player'),
     path('play/<int:quiz_id>/submit/<int:question_id>/', views.submit_answer, name='submit_answer'),
+    path('play/<int:quiz_id>/submit-all/', views.submit_exam, name='submit_exam'),
+    path('play/<int:quiz_id>/next/', views.next_question, name='next_question'),
     
     path('results/<int:quiz_id>/', views.quiz_results, name='quiz_results'),
-    path('results/<int:quiz_id>/explain-all/', views.generate_all_explanations, name='generate_all_explanations'),
+    path('results/<int:quiz_id>/explain-all/', views.generate_all_explanations_async if ASYNC else views.generate_all_explanations, name='generate_all_explanations'),
     path('<int:quiz_id>/retry/', views.retry_quiz, name='retry_quiz'),
     path('<int:quiz_id>/delete/', views.delete_quiz, name='delete_quiz'),
     
     # Quick Quiz (Demo Mode for guests)
-    path('quick/', views.quick_quiz, name='quick_quiz'),
+    path('quick/', views.quick_quiz_async if ASYNC else views.quick_quiz, name='quick_quiz'),
     path('demo/', views.demo_player, name='demo_player'),
     path('demo/submit/', views.demo_submit, name='demo_submit'),
     path('demo/results/', views.demo_results, name='demo_results'),
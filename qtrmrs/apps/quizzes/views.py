@@ -1,16 +1,30 @@
-from django.shortcuts import render, redirect, get_object_or_404, HttpResponse
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404, HttpResponse
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_http_methods, require_GET
 from django.contrib import messages
+from django.http import JsonResponse
 from django.db import transaction, IntegrityError
+from django.db.models import Count, Exists, F, OuterRef, Q, Sum
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from django.conf import settings
 from django_ratelimit.decorators import ratelimit
+from asgiref.sync import sync_to_async
+import json
 import logging
 import random
-from .models import Quiz, Question, Option, UserAnswer, AIModel
+from .models import Quiz, Question, Option, UserAnswer, AIModel, GenerationJob
+from . import answer_buffer
+from .builder import QuizBuilder, InvalidQuizData
 from .utils import format_duration
+from .pool import DEMO_TOPICS, DEMO_LEVEL, DEMO_NUM_QUESTIONS, take_pooled_quiz, atake_pooled_quiz
+from .streaming import start_streamed_quiz, refresh_generation_state
+from .explanations import explain_answers, aexplain_answers
+from .jobs import enqueue, aenqueue
+from .services import generate_tech_quiz, agenerate_tech_quiz, save_tech_quiz
+from apps.ai_agent.router import choose_model, achoose_model, resolve_model, aresolve_model
 from apps.ai_agent.services import QuizGenerator, AIError
+from apps.core.decorators import async_ratelimit
 from apps.users.gamification import (
     calculate_quiz_xp, calculate_level_from_xp,
     update_user_streak, check_and_award_badges
@@ -39,166 +53,416 @@ def quiz_setup(request):
         'default_model': default_model,
     })
 
-@login_required
-@ratelimit(key='user', rate='10/m', method='POST', block=True)
-@require_http_methods(["POST"])
-def create_quiz(request):
+def _read_quiz_form(post):
+    """
+    Validate and normalize the setup form.
+    Returns a dict of generation parameters, or None if the topic is missing.
+    """
     # --- Input Validation ---
-    topic = request.POST.get('topic', '')[:255]  # Limit length
+    topic = post.get('topic', '')[:255]  # Limit length
     if not topic.strip():
-        return render(request, 'quizzes/partials/error_alert.html', {
-            'message': "Please enter a topic."
-        })
+        return None
     
     # --- Handle Custom Language Logic ---
-    lang_select = request.POST.get('language_select', 'Python')
-    custom_lang = request.POST.get('custom_language', '')
+    lang_select = post.get('language_select', 'Python')
+    custom_lang = post.get('custom_language', '')
     
     # If custom_lang has text, USE IT. Else, use dropdown.
     language = custom_lang.strip()[:50] if custom_lang and custom_lang.strip() else lang_select[:50]
     
     # Normalize difficulty to lowercase
-    level = request.POST.get('level', 'intermediate').lower()
+    level = post.get('level', 'intermediate').lower()
     if level not in ['beginner', 'intermediate', 'expert']:
         level = 'intermediate'
     
     # Validate num_questions
     try:
-        num_questions = int(request.POST.get('num_questions', 5))
+        num_questions = int(post.get('num_questions', 5))
         num_questions = min(max(num_questions, 1), 20)  # Clamp between 1-20
     except (ValueError, TypeError):
         num_questions = 5
     
-    include_code = request.POST.get('include_code') == 'on'
+    return {
+        'language': language,
+        'topic': topic,
+        'level': level,
+        'num_questions': num_questions,
+        'include_code': post.get('include_code') == 'on',
+        # "Always fresh" opt-out of the generation cache
+        'use_cache': post.get('fresh') != 'on',
+    }
+
+
+def _generation_error(request, questions_data):
+    """Render the error partial for a failed or empty generation."""
+    if isinstance(questions_data, AIError):
+        return render(request, 'quizzes/partials/error_alert.html', {
+            'message': questions_data.message,
+            'suggestion': questions_data.suggestion,
+            'error_type': questions_data.error_type
+        })
+    return render(request, 'quizzes/partials/error_alert.html', {
+        'message': "AI failed to generate quiz.",
+        'suggestion': "Try again or select a different AI model."
+    })
+
+
+def _start_streamed_tech_quiz(user, form, ai_model, model_name, generator):
+    """
+    Create a programming quiz that is filled from generator.stream_quiz:
+    the first question is saved before returning, the rest in the
+    background. Returns (quiz, None) or (None, AIError).
+    """
+    quiz = Quiz.objects.create(
+        user=user,
+        quiz_type='tech',
+        language=form['language'],
+        topic_description=f"{form['language']}: {form['topic']}"[:255],
+        difficulty=form['level'],
+        total_questions=form['num_questions'],
+        ai_model=ai_model,
+        model_used=model_name,
+        is_generating=True
+    )
+    error = start_streamed_quiz(quiz, generator.stream_quiz(
+        language=form['language'],
+        topic=form['topic'],
+        level=form['level'],
+        num_questions=form['num_questions'],
+        include_code=form['include_code'],
+        use_cache=form['use_cache']
+    ))
+    return (None, error) if error else (quiz, None)
+
+
+def _redirect_to_player(quiz):
+    response = HttpResponse()
+    response['HX-Redirect'] = f"/quiz/play/{quiz.id}/"
+    return response
+
+
+def _job_queue_enabled():
+    return getattr(settings, 'AI_JOB_QUEUE_ENABLED', False)
+
+
+@login_required
+@ratelimit(key='user', rate='10/m', method='POST', block=True)
+@require_http_methods(["POST"])
+def create_quiz(request):
+    form = _read_quiz_form(request.POST)
+    if form is None:
+        return render(request, 'quizzes/partials/error_alert.html', {
+            'message': "Please enter a topic."
+        })
     
     # --- Handle Model Selection ---
-    model_id = request.POST.get('ai_model')
-    ai_model = None
-    model_name = getattr(settings, 'DEFAULT_AI_MODEL', 'gemini-flash-lite-latest')
+    ai_model, model_name = resolve_model(request.POST.get('ai_model'))
     
-    if model_id:
-        try:
-            ai_model = AIModel.objects.get(id=model_id, is_active=True)
-            model_name = ai_model.model_name
-        except (AIModel.DoesNotExist, ValueError):
-            pass
+    # Queue mode: a generation worker does the AI call; the page polls the job
+    if _job_queue_enabled():
+        job = enqueue(request.user, 'tech', form, ai_model, model_name)
+        return render(request, 'quizzes/partials/generation_pending.html', {'job': job})
     
     generator = QuizGenerator(model_name=model_name)
     
+    # Streaming mode: open the player as soon as the first question arrives
+    if getattr(settings, 'AI_STREAMING_ENABLED', False):
+        quiz, error = _start_streamed_tech_quiz(request.user, form, ai_model, model_name, generator)
+        if error:
+            return _generation_error(request, error)
+        return _redirect_to_player(quiz)
+
     # Generate the quiz
-    questions_data = generator.generate_quiz(
-        language=language, 
-        topic=topic, 
-        level=level, 
-        num_questions=num_questions,
-        include_code=include_code
-    )
+    questions_data = generate_tech_quiz(generator, form)
 
     # Handle errors with specific messages
     if not questions_data:
-        if isinstance(questions_data, AIError):
-            return render(request, 'quizzes/partials/error_alert.html', {
-                'message': questions_data.message,
-                'suggestion': questions_data.suggestion,
-                'error_type': questions_data.error_type
-            })
+        return _generation_error(request, questions_data)
+
+    try:
+        quiz = save_tech_quiz(request.user, form, ai_model, model_name, questions_data)
+    except InvalidQuizData:
+        return _generation_error(request, None)
+    return _redirect_to_player(quiz)
+
+
+@login_required
+@async_ratelimit(key='user', rate='10/m', method='POST', block=True)
+@require_http_methods(["POST"])
+async def create_quiz_async(request):
+    """
+    Async version of create_quiz for ASGI deployments (ASYNC_VIEWS_ENABLED).
+    The Gemini call is awaited on the event loop instead of pinning a thread.
+    """
+    form = _read_quiz_form(request.POST)
+    if form is None:
         return render(request, 'quizzes/partials/error_alert.html', {
-            'message': "AI failed to generate quiz.",
-            'suggestion': "Try again or select a different AI model."
+            'message': "Please enter a topic."
         })
 
-    with transaction.atomic():
-        quiz = Quiz.objects.create(
-            user=request.user,
-            quiz_type='tech',
-            language=language,
-            topic_description=f"{language}: {topic}"[:255],
-            difficulty=level,
-            total_questions=len(questions_data),
-            ai_model=ai_model,
-            model_used=model_name
+    ai_model, model_name = await aresolve_model(request.POST.get('ai_model'))
+
+    if _job_queue_enabled():
+        job = await aenqueue(await request.auser(), 'tech', form, ai_model, model_name)
+        return render(request, 'quizzes/partials/generation_pending.html', {'job': job})
+
+    generator = QuizGenerator(model_name=model_name)
+
+    # The SDK only streams synchronously: wait for the first question in a
+    # worker thread, the rest is drained by start_streamed_quiz's thread
+    if getattr(settings, 'AI_STREAMING_ENABLED', False):
+        quiz, error = await sync_to_async(_start_streamed_tech_quiz)(
+            await request.auser(), form, ai_model, model_name, generator
         )
+        if error:
+            return _generation_error(request, error)
+        return _redirect_to_player(quiz)
 
-        options_to_create = []
-        for q_data in questions_data:
-            question = Question.objects.create(
-                quiz=quiz,
-                text=q_data.get('text', '')[:2000],
-                code_snippet=q_data.get('code_snippet', ''),
-                explanation=q_data.get('explanation', '')
-            )
-            # Prepare options for bulk creation
-            for opt_text in q_data.get('options', []):
-                options_to_create.append(Option(
-                    question=question,
-                    text=str(opt_text)[:255],
-                    is_correct=(str(opt_text) == str(q_data.get('correct_answer', '')))
-                ))
-        
-        # Bulk create all options at once
-        if options_to_create:
-            Option.objects.bulk_create(options_to_create)
+    questions_data = await agenerate_tech_quiz(generator, form)
 
-    response = HttpResponse()
-    response['HX-Redirect'] = f"/quiz/play/{quiz.id}/"
-    return response
+    if not questions_data:
+        return _generation_error(request, questions_data)
+
+    user = await request.auser()
+    try:
+        quiz = await sync_to_async(save_tech_quiz)(user, form, ai_model, model_name, questions_data)
+    except InvalidQuizData:
+        return _generation_error(request, None)
+    return _redirect_to_player(quiz)
+
+
+@login_required
+@require_GET
+def generation_status(request, job_id):
+    """
+    Polled by the generation_pending partial while a queued job runs.
+    Redirects to the player once the quiz is saved, or shows the error.
+    """
+    job = get_object_or_404(GenerationJob, id=job_id, user=request.user)
+
+    if job.status == GenerationJob.STATUS_DONE and job.quiz_id:
+        return _redirect_to_player(job.quiz)
+
+    if job.status == GenerationJob.STATUS_FAILED:
+        template = 'ai_agent/partials/chat_error.html' if job.quiz_type == 'general' else 'quizzes/partials/error_alert.html'
+        return render(request, template, {
+            'message': job.error_message,
+            'suggestion': job.error_suggestion,
+            'error_type': job.error_type
+        })
+
+    return render(request, 'quizzes/partials/generation_pending.html', {'job': job})
 
 
 # ==========================================
 # 2. CLASSIC EXAM PLAYER
 # ==========================================
 
+def _current_question(quiz):
+    """The question at the quiz's cursor: one indexed (quiz, position) lookup."""
+    return Question.objects.filter(quiz=quiz, position=quiz.current_position).first()
+
+
+def _progress(quiz):
+    # total_questions is the requested count while a quiz is still streaming in
+    total = quiz.total_questions
+    return (quiz.answered_count / total * 100) if total > 0 else 0
+
+
+def _question_card(request, quiz, question):
+    return render(request, 'quizzes/partials/question_card.html', {
+        'quiz': quiz,
+        'question': question,
+        'progress': _progress(quiz),
+        'is_last': (quiz.current_position + 1 == quiz.total_questions)
+    })
+
+
+def _advance_cursor(quiz, position, answered=1):
+    """
+    Move the cursor from where `quiz` has it to `position` after `answered`
+    new answers, in the database and on `quiz`. Only one of several racing
+    submissions gets to move it: returns False, changing nothing, if the
+    cursor has moved since `quiz` was read.
+    """
+    moved = Quiz.objects.filter(id=quiz.id, current_position=quiz.current_position).update(
+        answered_count=F('answered_count') + answered,
+        current_position=position
+    )
+    if moved:
+        quiz.answered_count += answered
+        quiz.current_position = position
+    return bool(moved)
+
+
+def _exam_mode(quiz):
+    # A quiz that is still streaming in can't be sent whole
+    return getattr(settings, 'QUIZ_EXAM_MODE_ENABLED', False) and not quiz.is_generating
+
+
+def _exam_payload(quiz):
+    """
+    Every question still to answer, in play order, with its options but not
+    which one is correct. Two queries whatever the quiz size.
+    """
+    questions = (
+        quiz.questions.filter(position__gte=quiz.current_position)
+        .order_by('position').prefetch_related('options')
+    )
+    return [
+        {
+            'id': question.id,
+            'text': question.text,
+            'code': question.code_snippet,
+            'options': [{'id': option.id, 'text': option.text} for option in question.options.all()],
+        }
+        for question in questions
+    ]
+
+
 @login_required
 @require_GET
 def quiz_player(request, quiz_id):
-    quiz = get_object_or_404(Quiz, id=quiz_id, user=request.user)
-    
-    answered_ids = list(quiz.answers.values_list('question_id', flat=True))
-    current_question = quiz.questions.exclude(id__in=answered_ids).first()
+    quiz = answer_buffer.apply(get_object_or_404(Quiz, id=quiz_id, user=request.user))
+
+    if _exam_mode(quiz):
+        questions = _exam_payload(quiz)
+        if not questions:
+            return redirect('quiz_results', quiz_id=quiz.id)
+        return render(request, 'quizzes/exam_player.html', {
+            'quiz': quiz,
+            'questions': questions,
+            'progress': _progress(quiz),
+        })
+
+    current_question = _current_question(quiz)
 
     if not current_question:
-        return redirect('quiz_results', quiz_id=quiz.id)
+        if quiz.is_generating and refresh_generation_state(quiz):
+            # Streaming quiz: wait for the next question to arrive
+            return render(request, 'quizzes/player.html', {
+                'quiz': quiz,
+                'current_question': None,
+                'progress': _progress(quiz),
+            })
+        if quiz.completed_at is None:
+            # The submission with the last answer died before completing the
+            # quiz; completion is idempotent, so finish it now
+            answer_buffer.flush(quiz)
+            current_question = _current_question(quiz)
+            if not current_question:
+                _complete_quiz(request, quiz)
 
-    total_qs = quiz.questions.count()
-    # Avoid division by zero
-    progress = (len(answered_ids) / total_qs * 100) if total_qs > 0 else 0
+    if not current_question:
+        return redirect('quiz_results', quiz_id=quiz.id)
 
     return render(request, 'quizzes/player.html', {
         'quiz': quiz,
         'current_question': current_question,
-        'progress': progress,
-        'is_last': (len(answered_ids) + 1 == total_qs)
+        'progress': _progress(quiz),
+        'is_last': (quiz.current_position + 1 == quiz.total_questions)
     })
 
+def _answer_target(request, quiz_id, question_id, option_id):
+    """
+    (question, option) for an answer in one query: the question with its
+    quiz (owned by the user), the chosen option if any, and whether this
+    question already has an answer (question.already_answered). 404s if
+    any of them doesn't match.
+    """
+    if option_id is None:
+        question = get_object_or_404(
+            Question.objects.select_related('quiz').annotate(already_answered=Exists(
+                UserAnswer.objects.filter(quiz_id=OuterRef('quiz_id'), question_id=OuterRef('pk'))
+            )),
+            id=question_id, quiz_id=quiz_id, quiz__user=request.user
+        )
+        return question, None
+
+    option = get_object_or_404(
+        Option.objects.select_related('question__quiz').annotate(already_answered=Exists(
+            UserAnswer.objects.filter(quiz_id=OuterRef('question__quiz_id'), question_id=OuterRef('question_id'))
+        )),
+        id=option_id, question_id=question_id, question__quiz_id=quiz_id, question__quiz__user=request.user
+    )
+    option.question.already_answered = option.already_answered
+    return option.question, option
+
+
+def _complete_quiz(request, quiz):
+    """
+    Score a finished quiz and, the first time only, award XP, streak and
+    badges. Stores the XP summary in the session for the results page.
+    Safe to call again: the player calls it for a finished quiz that was
+    never completed (its last submission died after saving the answer).
+    """
+    stats = quiz.answers.aggregate(
+        correct=Count('id', filter=Q(is_correct=True)),
+        total_time=Coalesce(Sum('time_taken'), 0)
+    )
+    correct_count, total_time = stats['correct'], stats['total_time']
+    total_qs = quiz.total_questions
+    quiz.score = round((correct_count / total_qs * 100)) if total_qs > 0 else 0
+    quiz.completed_at = timezone.now()
+
+    # Initialize session variables for results page
+    xp_earned = None
+    leveled_up = False
+    new_level = None
+    new_badges = []
+
+    # === GAMIFICATION: Award XP only on first completion ===
+    with transaction.atomic():
+        # Save the result and claim the XP award in one conditional UPDATE:
+        # only the request that flips xp_awarded goes on to award XP
+        awarding = Quiz.objects.filter(id=quiz.id, xp_awarded=False).update(
+            score=quiz.score, completed_at=quiz.completed_at, xp_awarded=True
+        )
+        if not awarding:
+            Quiz.objects.filter(id=quiz.id).update(score=quiz.score, completed_at=quiz.completed_at)
+        else:
+            # Get user profile with lock
+            from apps.users.models import UserProfile
+            profile = UserProfile.objects.select_for_update().get(user=request.user)
+            old_level = profile.level
+
+            # Calculate and award XP
+            xp_earned = calculate_quiz_xp(correct_count, total_time, total_qs)
+            profile.xp += xp_earned
+
+            # Check for level up
+            new_level = calculate_level_from_xp(profile.xp)
+            leveled_up = new_level > old_level
+            profile.level = new_level
+
+            # Update streak
+            update_user_streak(profile)
+
+            # Update cached stats
+            profile.total_correct_answers += correct_count
+            profile.total_study_time += total_time
+            if quiz.score > profile.best_score:
+                profile.best_score = quiz.score
+
+            profile.save()
+
+            # Check and award badges
+            new_badges = check_and_award_badges(request.user, profile)
+
+    # Store XP info in session for display on results page
+    request.session['quiz_xp_earned'] = xp_earned
+    request.session['quiz_leveled_up'] = leveled_up
+    request.session['quiz_new_level'] = new_level if leveled_up else None
+    request.session['quiz_new_badges'] = [b.name for b in new_badges] if new_badges else []
+
+
 @login_required
 @require_http_methods(["POST"])
 def submit_answer(request, quiz_id, question_id):
-    quiz = get_object_or_404(Quiz, id=quiz_id, user=request.user)
-    question = get_object_or_404(Question, id=question_id, quiz=quiz)
-    
-    # Check if answer already exists (prevent duplicate submissions)
-    if UserAnswer.objects.filter(quiz=quiz, question=question).exists():
-        # Already answered, just get next question
-        answered_ids = list(quiz.answers.values_list('question_id', flat=True))
-        next_q = quiz.questions.exclude(id__in=answered_ids).first()
-        
-        if not next_q:
-            response = HttpResponse()
-            response['HX-Redirect'] = f"/quiz/results/{quiz.id}/"
-            return response
-        
-        total_qs = quiz.questions.count()
-        progress = (len(answered_ids) / total_qs * 100) if total_qs > 0 else 0
-        
-        return render(request, 'quizzes/partials/question_card.html', {
-            'quiz': quiz,
-            'question': next_q,
-            'progress': progress,
-            'is_last': (len(answered_ids) + 1 == total_qs)
-        })
-    
     selected_option_id = request.POST.get('option')
     action = request.POST.get('action')
+    if action == 'skip' or not selected_option_id:
+        selected_option_id = None
     
     # Get time taken (in seconds)
     try:
@@ -206,100 +470,148 @@ def submit_answer(request, quiz_id, question_id):
         time_taken = min(max(time_taken, 0), 3600)  # Clamp 0-1hr
     except (ValueError, TypeError):
         time_taken = 0
-    
-    # Create the answer
-    if action == 'skip' or not selected_option_id:
-        user_answer = UserAnswer.objects.create(
-            quiz=quiz, question=question, selected_option=None, 
-            is_correct=False, time_taken=time_taken
-        )
-    else:
-        selected_option = get_object_or_404(Option, id=selected_option_id, question=question)
-        is_correct = selected_option.is_correct
-        user_answer = UserAnswer.objects.create(
-            quiz=quiz, question=question, selected_option=selected_option, 
-            is_correct=is_correct, time_taken=time_taken
-        )
+
+    question, selected_option = _answer_target(request, quiz_id, question_id, selected_option_id)
+    quiz = question.quiz
+    if answer_buffer.enabled():
+        answer_buffer.apply(quiz)
+
+    # Only the question at the cursor can be answered. A replayed or
+    # out-of-order submission just gets the current question back.
+    accepted = not question.already_answered and question.position == quiz.current_position
+    if accepted and answer_buffer.enabled():
+        # Write-behind: the answer waits in the cache until the quiz completes
+        accepted = answer_buffer.add(quiz, question, selected_option, time_taken)
+    elif accepted:
+        # Move the player's cursor and create the answer together. The
+        # conditional cursor UPDATE lets only one of two racing submits in.
+        with transaction.atomic():
+            accepted = _advance_cursor(quiz, question.position + 1)
+            if accepted:
+                UserAnswer.objects.bulk_create([UserAnswer(
+                    quiz=quiz, question=question, selected_option=selected_option,
+                    is_correct=bool(selected_option and selected_option.is_correct), time_taken=time_taken
+                )], ignore_conflicts=True)
 
     # Get next question
-    answered_ids = list(quiz.answers.values_list('question_id', flat=True))
-    next_q = quiz.questions.exclude(id__in=answered_ids).first()
+    next_q = _current_question(quiz)
+
+    if not next_q and quiz.completed_at is None and answer_buffer.enabled():
+        # Last answer: write the buffer before scoring. If buffered answers
+        # were lost from the cache, the cursor stops at the first of them
+        # and that question is asked again.
+        answer_buffer.flush(quiz)
+        next_q = _current_question(quiz)
+
+    if not next_q and quiz.is_generating and refresh_generation_state(quiz):
+        return render(request, 'quizzes/partials/question_pending.html', {'quiz': quiz})
 
     if not next_q:
-        # Quiz completed - calculate final score properly
-        correct_count = quiz.answers.filter(is_correct=True).count()
-        total_qs = quiz.total_questions
-        quiz.score = round((correct_count / total_qs * 100)) if total_qs > 0 else 0
-        quiz.completed_at = timezone.now()
-        
-        # Initialize session variables for results page
-        xp_earned = None
-        leveled_up = False
-        new_level = None
-        new_badges = []
-        
-        # === GAMIFICATION: Award XP only on first completion ===
-        # Use transaction with row lock to prevent race conditions
-        with transaction.atomic():
-            # Re-fetch quiz with lock to prevent concurrent XP awards
-            locked_quiz = Quiz.objects.select_for_update().get(id=quiz.id)
-            
-            if not locked_quiz.xp_awarded:
-                # Get user profile with lock
-                from apps.users.models import UserProfile
-                profile = UserProfile.objects.select_for_update().get(user=request.user)
-                old_level = profile.level
-                
-                # Calculate and award XP
-                total_time = sum(a.time_taken for a in quiz.answers.all())
-                xp_earned = calculate_quiz_xp(correct_count, total_time, total_qs)
-                profile.xp += xp_earned
-                
-                # Check for level up
-                new_level = calculate_level_from_xp(profile.xp)
-                leveled_up = new_level > old_level
-                profile.level = new_level
-                
-                # Update streak
-                update_user_streak(profile)
-                
-                # Update cached stats
-                profile.total_correct_answers += correct_count
-                profile.total_study_time += total_time
-                if quiz.score > profile.best_score:
-                    profile.best_score = quiz.score
-                
-                profile.save()
-                
-                # Check and award badges
-                new_badges = check_and_award_badges(request.user, profile)
-                
-                # Mark XP as awarded for this quiz
-                locked_quiz.xp_awarded = True
-                locked_quiz.save(update_fields=['xp_awarded'])
-        
-        # Save score and completed_at (use update_fields to not overwrite xp_awarded)
-        quiz.save(update_fields=['score', 'completed_at'])
-        
-        # Store XP info in session for display on results page
-        request.session['quiz_xp_earned'] = xp_earned
-        request.session['quiz_leveled_up'] = leveled_up
-        request.session['quiz_new_level'] = new_level if leveled_up else None
-        request.session['quiz_new_badges'] = [b.name for b in new_badges] if new_badges else []
-        
+        # A repeated final submission completes the quiz only if the first
+        # one didn't get that far
+        if quiz.completed_at is None:
+            _complete_quiz(request, quiz)
         response = HttpResponse()
         response['HX-Redirect'] = f"/quiz/results/{quiz.id}/"
         return response
 
-    total_qs = quiz.questions.count()
-    progress = (len(answered_ids) / total_qs * 100) if total_qs > 0 else 0
-    
-    return render(request, 'quizzes/partials/question_card.html', {
-        'quiz': quiz,
-        'question': next_q,
-        'progress': progress,
-        'is_last': (len(answered_ids) + 1 == total_qs)
-    })
+    return _question_card(request, quiz, next_q)
+
+def _read_exam_answers(body):
+    """
+    {question_id: (option_id or None, time_taken)} from the exam player's
+    JSON body, {"answers": [{"question": 1, "option": 3, "time_taken": 12}, ...]}.
+    The first answer to a question wins. Raises ValueError if malformed.
+    """
+    try:
+        answers = {}
+        for item in json.loads(body)['answers']:
+            option_id = item.get('option')
+            answers.setdefault(int(item['question']), (
+                None if option_id in (None, '') else int(option_id),
+                min(max(int(item.get('time_taken') or 0), 0), 3600),  # Clamp 0-1hr
+            ))
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        raise ValueError(f"Malformed exam answers: {e}") from e
+    return answers
+
+
+@login_required
+@require_http_methods(["POST"])
+def submit_exam(request, quiz_id):
+    """
+    Bulk endpoint for the exam player: every remaining answer in one POST.
+    Questions left out are recorded as skipped, then the quiz is completed
+    once. Responds with JSON: the results URL, or an error and a 4xx status.
+    """
+    quiz = get_object_or_404(Quiz, id=quiz_id, user=request.user)
+    if quiz.is_generating:
+        return JsonResponse({'error': 'This quiz is still being generated.'}, status=409)
+    try:
+        answers = _read_exam_answers(request.body)
+    except ValueError as e:
+        logger.warning(f"Rejected exam submission for quiz {quiz.id}: {e}")
+        return JsonResponse({'error': 'Your answers could not be read.'}, status=400)
+    # Answers given in the per-question player before switching modes
+    answer_buffer.flush(quiz)
+
+    # Everything needed to validate and mark, in one query: the options of
+    # every question still to answer
+    options = {}
+    positions = {}
+    for option_id, question_id, position, is_correct in Option.objects.filter(
+        question__quiz=quiz, question__position__gte=quiz.current_position
+    ).values_list('id', 'question_id', 'question__position', 'is_correct'):
+        options[option_id] = (question_id, is_correct)
+        positions[question_id] = position
+
+    results_url = f"/quiz/results/{quiz.id}/"
+    if not positions:
+        # Nothing left to answer: a repeated submission, which completes the
+        # quiz only if the first one didn't get that far
+        if quiz.completed_at is None:
+            _complete_quiz(request, quiz)
+        return JsonResponse({'redirect': results_url})
+
+    for question_id, (option_id, _) in answers.items():
+        if question_id not in positions or (option_id is not None and options.get(option_id, (None,))[0] != question_id):
+            return JsonResponse({'error': "Your answers don't match this quiz."}, status=400)
+
+    new_answers = []
+    for question_id in sorted(positions, key=positions.get):
+        option_id, time_taken = answers.get(question_id, (None, 0))
+        new_answers.append(UserAnswer(
+            quiz=quiz, question_id=question_id, selected_option_id=option_id,
+            is_correct=bool(option_id and options[option_id][1]), time_taken=time_taken
+        ))
+
+    with transaction.atomic():
+        if not _advance_cursor(quiz, max(positions.values()) + 1, answered=len(new_answers)):
+            # Another submission answered some of these questions first
+            return JsonResponse({'error': 'This quiz was answered elsewhere.'}, status=409)
+        UserAnswer.objects.bulk_create(new_answers, ignore_conflicts=True)
+    _complete_quiz(request, quiz)
+    return JsonResponse({'redirect': results_url})
+
+@login_required
+@require_GET
+def next_question(request, quiz_id):
+    """
+    HTMX polling target while a streamed quiz is still generating.
+    Returns the next question card once it exists, otherwise keeps polling.
+    """
+    quiz = answer_buffer.apply(get_object_or_404(Quiz, id=quiz_id, user=request.user))
+    next_q = _current_question(quiz)
+
+    if not next_q:
+        if refresh_generation_state(quiz):
+            return render(request, 'quizzes/partials/question_pending.html', {'quiz': quiz})
+        # Stream finished without more questions - results (or completion) via the player
+        response = HttpResponse()
+        response['HX-Redirect'] = f"/quiz/play/{quiz.id}/"
+        return response
+
+    return _question_card(request, quiz, next_q)
 
 @login_required
 @require_GET
@@ -352,14 +664,17 @@ def quiz_results(request, quiz_id):
         'profile': request.user.profile,
     })
 
+
 @login_required
 @require_http_methods(["POST"])
 def generate_all_explanations(request, quiz_id):
     """
     HTMX View: 
     1. Finds ALL wrong/skipped answers.
-    2. Generates AI text for them in a batch (loop).
-    3. Re-renders the answer list part of the page with explanations included.
+    2. Reuses memoized explanations (ExplanationMemo) and generates AI text
+       for the rest in one batch call (AI_EXPLANATION_MODE='batch')
+       or concurrently (bounded by AI_EXPLANATION_CONCURRENCY).
+    3. Saves them with one bulk_update and re-renders the answer list.
     Uses the same AI model that was used to generate the quiz.
     """
     quiz = get_object_or_404(Quiz, id=quiz_id, user=request.user)
@@ -377,18 +692,7 @@ def generate_all_explanations(request, quiz_id):
     model_to_use = quiz.model_used if quiz.model_used else None
     generator = QuizGenerator(model_name=model_to_use)
     
-    for ans in answers_needing_help:
-        # Use Python filtering instead of DB query to leverage prefetch
-        correct_opt = next((o for o in ans.question.options.all() if o.is_correct), None)
-        user_text = ans.selected_option.text if ans.selected_option else "Skipped"
-        
-        explanation = generator.generate_explanation(
-            question_text=ans.question.text,
-            user_answer=user_text,
-            correct_answer=correct_opt.text if correct_opt else "Unknown"
-        )
-        ans.error_explanation = explanation
-        ans.save(update_fields=['error_explanation'])
+    explain_answers(generator, list(answers_needing_help))
     
     # Re-fetch all answers to render the list again
     user_answers = UserAnswer.objects.filter(quiz=quiz).select_related(
@@ -399,6 +703,37 @@ def generate_all_explanations(request, quiz_id):
     return render(request, 'quizzes/partials/results_list.html', {'user_answers': user_answers})
 
 
+@login_required
+@require_http_methods(["POST"])
+async def generate_all_explanations_async(request, quiz_id):
+    """
+    Async version of generate_all_explanations for ASGI deployments
+    (ASYNC_VIEWS_ENABLED). Explanation calls are awaited, not threaded.
+    """
+    user = await request.auser()
+    quiz = await aget_object_or_404(Quiz, id=quiz_id, user=user)
+
+    answers_needing_help = [
+        ans async for ans in UserAnswer.objects.filter(
+            quiz=quiz,
+            is_correct=False,
+            error_explanation=''
+        ).select_related('question', 'selected_option').prefetch_related('question__options')
+    ]
+
+    generator = QuizGenerator(model_name=quiz.model_used if quiz.model_used else None)
+    await aexplain_answers(generator, answers_needing_help)
+
+    # Materialize the list here; templates can't run queries in async context
+    user_answers = [
+        ans async for ans in UserAnswer.objects.filter(quiz=quiz).select_related(
+            'question', 'selected_option'
+        ).prefetch_related('question__options')
+    ]
+
+    return render(request, 'quizzes/partials/results_list.html', {'user_answers': user_answers})
+
+
 @login_required
 @require_http_methods(["POST"])
 def retry_quiz(request, quiz_id):
@@ -410,13 +745,17 @@ def retry_quiz(request, quiz_id):
     """
     quiz = get_object_or_404(Quiz, id=quiz_id, user=request.user)
     
-    # Delete all existing answers
+    # Delete all existing answers, saved or buffered
     quiz.answers.all().delete()
+    answer_buffer.discard(quiz)
     
     # Reset quiz state
     quiz.score = 0
     quiz.completed_at = None
-    quiz.save(update_fields=['score', 'completed_at'])
+    quiz.answered_count = 0
+    quiz.current_position = 0
+    quiz.answers_buffered_at = None
+    quiz.save(update_fields=['score', 'completed_at', 'answered_count', 'current_position', 'answers_buffered_at'])
     
     return redirect('quiz_player', quiz_id=quiz.id)
 
@@ -430,6 +769,7 @@ def delete_quiz(request, quiz_id):
     """
     quiz = get_object_or_404(Quiz, id=quiz_id, user=request.user)
     topic = quiz.topic_description[:50]
+    answer_buffer.discard(quiz)
     quiz.delete()
     messages.success(request, f'Quiz "{topic}" deleted successfully.')
     return redirect('dashboard')
@@ -439,46 +779,8 @@ def delete_quiz(request, quiz_id):
 # 6. QUICK QUIZ (DEMO MODE)
 # ==========================================
 
-DEMO_TOPICS = [
-    ('Python', 'Variables and Data Types'),
-    ('Python', 'Functions and Arguments'),
-    ('JavaScript', 'ES6 Arrow Functions'),
-    ('JavaScript', 'Async/Await Basics'),
-    ('SQL', 'SELECT Queries'),
-    ('Git', 'Basic Commands'),
-    ('CSS', 'Flexbox Basics'),
-    ('HTML', 'Semantic Elements'),
-]
-
-
-@ratelimit(key='ip', rate='10/m', method='GET', block=True)
-def quick_quiz(request):
-    """
-    One-click random quiz - works for both guests and logged-in users.
-    Generates a 5-question quiz on a random topic.
-    """
-    language, topic = random.choice(DEMO_TOPICS)
-    
-    # Get default model - handle database errors specifically
-    default_model = AIModel.objects.filter(is_active=True).first()
-    if default_model:
-        model_name = default_model.model_name
-    else:
-        model_name = 'gemini-flash-lite-latest'
-        logger.warning("No active AI model found, using fallback: gemini-flash-lite-latest")
-    
-    generator = QuizGenerator(model_name=model_name)
-    
-    logger.info(f"Quick Quiz: Generating {language} - {topic} with model {model_name}")
-    
-    questions_data = generator.generate_quiz(
-        language=language, 
-        topic=topic, 
-        level='Easy', 
-        num_questions=5,
-        include_code=False
-    )
-    
+def _quick_quiz_error(request, questions_data):
+    """Redirect home with a message if Quick Quiz generation failed, else None."""
     # Handle AI error
     if isinstance(questions_data, AIError):
         logger.error(f"Quick Quiz AI Error: {questions_data.error_type} - {questions_data.message}")
@@ -491,66 +793,125 @@ def quick_quiz(request):
         return redirect('home')
     
     logger.info(f"Quick Quiz: Generated {len(questions_data)} questions successfully")
+    return None
+
+
+def _save_quick_quiz(user, language, topic, model_name, questions_data):
+    """Save a Quick Quiz to the database for a logged-in user."""
+    return QuizBuilder(questions_data).save(
+        user=user,
+        topic_description=f"{language} - {topic}",
+        difficulty='Easy',
+        model_used=model_name,
+    )
+
+
+def _demo_session_quiz(language, topic, questions_data):
+    """Session payload for a guest demo quiz."""
+    # Optimize session data - keep only essential fields
+    optimized_questions = [
+        {
+            'text': q.get('text', ''),
+            'options': q.get('options', []),
+            'correct_answer': q.get('correct_answer', ''),
+            'code_snippet': q.get('code_snippet') if q.get('code_snippet') else None,
+        }
+        for q in questions_data
+    ]
+    return {
+        'questions': optimized_questions,
+        'topic': f"{language} - {topic}",
+        'current_index': 0,
+        'score': 0,
+        'answers': [],
+    }
+
+
+@ratelimit(key='ip', rate='10/m', method='GET', block=True)
+def quick_quiz(request):
+    """
+    One-click random quiz - works for both guests and logged-in users.
+    Serves a 5-question quiz from the pre-generated pool, falling back to
+    live generation only when the pool is empty.
+    """
+    pooled = take_pooled_quiz()
+    if pooled:
+        language, topic = pooled.language, pooled.topic
+        model_name = pooled.model_used
+        questions_data = pooled.questions
+        logger.info(f"Quick Quiz: Served {language} - {topic} from pool")
+    else:
+        language, topic = random.choice(DEMO_TOPICS)
+        
+        _, model_name = choose_model()
+        generator = QuizGenerator(model_name=model_name)
+        
+        logger.info(f"Quick Quiz: Pool empty, generating {language} - {topic} with model {model_name}")
+        
+        questions_data = generator.generate_quiz(
+            language=language, 
+            topic=topic, 
+            level=DEMO_LEVEL, 
+            num_questions=DEMO_NUM_QUESTIONS,
+            include_code=False
+        )
+    
+    error_response = _quick_quiz_error(request, questions_data)
+    if error_response:
+        return error_response
     
     if request.user.is_authenticated:
         # For logged-in users: save to database like normal
-        with transaction.atomic():
-            quiz = Quiz.objects.create(
-                user=request.user,
-                topic_description=f"{language} - {topic}",
-                difficulty='Easy',
-                total_questions=len(questions_data),
-                model_used=model_name,
-            )
-            
-            options_to_create = []
-            for q_data in questions_data:
-                question = Question.objects.create(
-                    quiz=quiz,
-                    text=q_data.get('text', ''),
-                    code_snippet=q_data.get('code_snippet'),
-                )
-                
-                for option_data in q_data.get('options', []):
-                    # Handle both string and dict options from AI
-                    if isinstance(option_data, dict):
-                        option_text = str(option_data.get('text', ''))
-                    else:
-                        option_text = str(option_data)
-                    
-                    options_to_create.append(Option(
-                        question=question,
-                        text=option_text,
-                        is_correct=(option_text == str(q_data.get('correct_answer', '')))
-                    ))
-            
-            # Bulk create all options at once
-            if options_to_create:
-                Option.objects.bulk_create(options_to_create)
-        
+        try:
+            quiz = _save_quick_quiz(request.user, language, topic, model_name, questions_data)
+        except InvalidQuizData:
+            return _quick_quiz_error(request, None)
         return redirect('quiz_player', quiz_id=quiz.id)
     else:
         # For guests: store in session for demo mode
-        # Optimize session data - keep only essential fields
-        optimized_questions = [
-            {
-                'text': q.get('text', ''),
-                'options': q.get('options', []),
-                'correct_answer': q.get('correct_answer', ''),
-                'code_snippet': q.get('code_snippet') if q.get('code_snippet') else None,
-            }
-            for q in questions_data
-        ]
-        request.session['demo_quiz'] = {
-            'questions': optimized_questions,
-            'topic': f"{language} - {topic}",
-            'current_index': 0,
-            'score': 0,
-            'answers': [],
-        }
+        request.session['demo_quiz'] = _demo_session_quiz(language, topic, questions_data)
         return redirect('demo_player')
 
 
+@async_ratelimit(key='ip', rate='10/m', method='GET', block=True)
+async def quick_quiz_async(request):
+    """Async version of quick_quiz for ASGI deployments (ASYNC_VIEWS_ENABLED)."""
+    pooled = await atake_pooled_quiz()
+    if pooled:
+        language, topic = pooled.language, pooled.topic
+        model_name = pooled.model_used
+        questions_data = pooled.questions
+        logger.info(f"Quick Quiz: Served {language} - {topic} from pool")
+    else:
+        language, topic = random.choice(DEMO_TOPICS)
+        _, model_name = await achoose_model()
+        generator = QuizGenerator(model_name=model_name)
+
+        logger.info(f"Quick Quiz: Pool empty, generating {language} - {topic} with model {model_name}")
+
+        questions_data = await generator.generate_quiz_async(
+            language=language,
+            topic=topic,
+            level=DEMO_LEVEL,
+            num_questions=DEMO_NUM_QUESTIONS,
+            include_code=False
+        )
+
+    error_response = _quick_quiz_error(request, questions_data)
+    if error_response:
+        return error_response
+
+    user = await request.auser()
+    if user.is_authenticated:
+        try:
+            quiz = await sync_to_async(_save_quick_quiz)(user, language, topic, model_name, questions_data)
+        except InvalidQuizData:
+            return _quick_quiz_error(request, None)
+        return redirect('quiz_player', quiz_id=quiz.id)
+    await request.session.aset('demo_quiz', _demo_session_quiz(language, topic, questions_data))
+    return redirect('demo_player')
+
+
 def demo_player(request):
     """
     Demo quiz player for guests (session-based).
@@ -127,7 +127,11 @@ def check_and_award_badges(user, profile):
             earned = profile.total_correct_answers >= badge.requirement_value
         
         if earned:
-            UserBadge.objects.create(user=user, badge=badge)
             awarded.append(badge)
     
+    # One INSERT for everything earned; a concurrent award of the same badge is skipped
+    if awarded:
+        UserBadge.objects.bulk_create(
+            [UserBadge(user=user, badge=badge) for badge in awarded], ignore_conflicts=True
+        )
     return awarded
@@ -0,0 +1,318 @@
+"""
+Management command to fill the database with synthetic users and quiz history
+for scale-testing the dashboard, results and admin pages.
+
+Usage:
+    python manage.py seed_scale_data --size small              # ~1k users, ~90k answers
+    python manage.py seed_scale_data --size medium             # ~10k users, ~2M answers
+    python manage.py seed_scale_data --size large --workers 8  # ~100k users, ~45M answers
+    python manage.py seed_scale_data --users 500 --quizzes-per-user 30 --seed 7
+
+Users are generated --chunk-size at a time; each chunk is written with one
+bulk_create per table (users, profiles, quizzes, questions, options,
+answers, badges). Distributions are skewed like real traffic: most users
+have a few quizzes and some have many, skill varies per user, and a share of
+quizzes is left half-played. Profiles (XP, level, cached stats) and badges
+are derived from the generated answers, so pages show consistent numbers.
+
+--workers > 1 splits the chunks across processes; that needs a database
+with concurrent writers (Postgres). Rerunning adds more users alongside
+the earlier ones rather than replacing them.
+"""
+import math
+import random
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+from apps.quizzes.models import Quiz, Question, Option, UserAnswer
+from apps.quizzes.pool import DEMO_TOPICS
+from apps.users.gamification import calculate_quiz_xp, calculate_level_from_xp
+from apps.users.management.commands.seed_gamification import BADGE_DEFINITIONS
+from apps.users.models import User, UserProfile, Badge, UserBadge
+
+SIZES = {
+    'small': {'users': 1_000, 'quizzes_per_user': 10},
+    'medium': {'users': 10_000, 'quizzes_per_user': 20},
+    'large': {'users': 100_000, 'quizzes_per_user': 50},
+}
+
+GENERAL_TOPICS = [
+    ('History', 'Ancient Rome'), ('Geography', 'European Capitals'),
+    ('Science', 'Solar System'), ('Biology', 'Cell Structure'),
+    ('Movies', '90s Classics'), ('Sports', 'Football World Cup'),
+]
+
+# Quiz lengths users pick, and how often
+QUESTION_COUNTS = [5, 10, 15, 20]
+QUESTION_COUNT_WEIGHTS = [50, 30, 10, 10]
+
+COMPLETED_SHARE = 0.85
+SKIP_SHARE = 0.05
+HISTORY_DAYS = 365
+BATCH_SIZE = 5000
+PASSWORD = 'scale-test-pass'
+
+
+@contextmanager
+def _manual_timestamps(*fields):
+    """Let bulk_create keep the generated dates on auto_now_add fields."""
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def _plan_user(rng, quizzes_per_user, now):
+    """Quiz history for one user: a list of per-quiz dicts, oldest first."""
+    skill = rng.betavariate(5, 3)
+    # Exponential: many light users, a long tail of heavy ones
+    count = min(int(rng.expovariate(1 / quizzes_per_user)), quizzes_per_user * 10)
+    ages = sorted((rng.uniform(0, HISTORY_DAYS) for _ in range(count)), reverse=True)
+
+    quizzes = []
+    for age in ages:
+        total = rng.choices(QUESTION_COUNTS, QUESTION_COUNT_WEIGHTS)[0]
+        completed = rng.random() < COMPLETED_SHARE
+        answered = total if completed else rng.randrange(total)
+        answers = []
+        for _ in range(answered):
+            skipped = rng.random() < SKIP_SHARE
+            answers.append({
+                'correct_index': rng.randrange(4),
+                'correct': not skipped and rng.random() < skill,
+                'skipped': skipped,
+                'time_taken': min(max(int(rng.lognormvariate(math.log(20), 0.6)), 1), 600),
+            })
+        quizzes.append({
+            'created_at': now - timedelta(days=age),
+            'total': total,
+            'completed': completed,
+            'answers': answers,
+        })
+    return quizzes
+
+
+def _quiz_row(rng, user, plan):
+    if rng.random() < 0.7:
+        quiz_type, (subject, topic) = 'tech', rng.choice(DEMO_TOPICS)
+    else:
+        quiz_type, (subject, topic) = 'general', rng.choice(GENERAL_TOPICS)
+
+    correct = sum(a['correct'] for a in plan['answers'])
+    completed_at = None
+    if plan['completed']:
+        completed_at = plan['created_at'] + timedelta(seconds=sum(a['time_taken'] for a in plan['answers']))
+    return Quiz(
+        user=user,
+        quiz_type=quiz_type,
+        language=subject,
+        topic_description=f"{subject}: {topic}",
+        difficulty=rng.choice(['beginner', 'intermediate', 'intermediate', 'expert']),
+        created_at=plan['created_at'],
+        model_used='gemini-flash-latest',
+        total_questions=plan['total'],
+        score=round(correct / plan['total'] * 100) if plan['completed'] else 0,
+        completed_at=completed_at,
+        xp_awarded=plan['completed'],
+        answered_count=len(plan['answers']),
+        current_position=len(plan['answers']),
+    )
+
+
+def _profile_row(rng, user, plans):
+    completed = [p for p in plans if p['completed']]
+    xp = 0
+    correct_total = 0
+    study_time = 0
+    best_score = 0
+    for plan in completed:
+        correct = sum(a['correct'] for a in plan['answers'])
+        total_time = sum(a['time_taken'] for a in plan['answers'])
+        xp += calculate_quiz_xp(correct, total_time, plan['total'])
+        correct_total += correct
+        study_time += total_time
+        best_score = max(best_score, round(correct / plan['total'] * 100))
+
+    longest_streak = min(int(rng.expovariate(1 / 4)), len(completed))
+    return UserProfile(
+        user=user,
+        xp=xp,
+        level=calculate_level_from_xp(xp),
+        current_streak=rng.randint(0, longest_streak),
+        longest_streak=longest_streak,
+        last_quiz_date=completed[-1]['created_at'].date() if completed else None,
+        total_correct_answers=correct_total,
+        total_study_time=study_time,
+        best_score=best_score,
+    )
+
+
+def _earned(badge, profile):
+    value = {
+        'level': profile.level,
+        'streak': profile.longest_streak,
+        'score': profile.best_score,
+        'correct': profile.total_correct_answers,
+    }.get(badge.requirement_type)
+    return value is not None and value >= badge.requirement_value
+
+
+def seed_chunk(start, count, quizzes_per_user, seed, password_hash):
+    """Create users start..start+count-1 with their history. Returns row counts."""
+    rng = random.Random(f"{seed}:{start}")
+    now = timezone.now()
+    badges = list(Badge.objects.all())
+
+    with transaction.atomic():
+        users = [
+            User(
+                username=f"scale{number}",
+                email=f"scale{number}@example.com",
+                password=password_hash,
+                first_name=f"User{number}",
+                date_joined=now - timedelta(days=HISTORY_DAYS + rng.uniform(0, 30)),
+            )
+            for number in range(start, start + count)
+        ]
+        # bulk_create skips post_save, so profiles are created below
+        User.objects.bulk_create(users, batch_size=BATCH_SIZE)
+
+        plans = {user.pk: _plan_user(rng, quizzes_per_user, now) for user in users}
+        profiles = [_profile_row(rng, user, plans[user.pk]) for user in users]
+        UserProfile.objects.bulk_create(profiles, batch_size=BATCH_SIZE)
+
+        quiz_plans = [(user, plan) for user in users for plan in plans[user.pk]]
+        quizzes = [_quiz_row(rng, user, plan) for user, plan in quiz_plans]
+        with _manual_timestamps(Quiz._meta.get_field('created_at')):
+            Quiz.objects.bulk_create(quizzes, batch_size=BATCH_SIZE)
+
+        questions = []
+        for quiz, (_, plan) in zip(quizzes, quiz_plans):
+            for number in range(1, plan['total'] + 1):
+                questions.append(Question(
+                    quiz=quiz,
+                    text=f"{quiz.topic_description} - question {number}: which statement is correct?",
+                    explanation="Synthetic question for scale testing.",
+                    position=number - 1,
+                ))
+        Question.objects.bulk_create(questions, batch_size=BATCH_SIZE)
+
+        # Options and answers, walking the questions in the order they were created
+        options = []
+        answer_plans = []
+        question_iter = iter(questions)
+        for quiz, (_, plan) in zip(quizzes, quiz_plans):
+            for index in range(plan['total']):
+                question = next(question_iter)
+                answer = plan['answers'][index] if index < len(plan['answers']) else None
+                correct_index = answer['correct_index'] if answer else 0
+                choices = [
+                    Option(question=question, text=f"Statement {letter}", is_correct=(position == correct_index))
+                    for position, letter in enumerate('ABCD')
+                ]
+                options.extend(choices)
+                if answer:
+                    answer_plans.append((quiz, question, choices, answer))
+        Option.objects.bulk_create(options, batch_size=BATCH_SIZE)
+
+        answers = []
+        for quiz, question, choices, answer in answer_plans:
+            if answer['skipped']:
+                selected = None
+            elif answer['correct']:
+                selected = choices[answer['correct_index']]
+            else:
+                selected = rng.choice([c for c in choices if not c.is_correct])
+            answers.append(UserAnswer(
+                quiz=quiz, question=question, selected_option=selected,
+                is_correct=answer['correct'], time_taken=answer['time_taken'],
+            ))
+        UserAnswer.objects.bulk_create(answers, batch_size=BATCH_SIZE)
+
+        user_badges = [
+            UserBadge(user=profile.user, badge=badge, earned_at=now - timedelta(days=rng.uniform(0, HISTORY_DAYS)))
+            for profile in profiles for badge in badges if _earned(badge, profile)
+        ]
+        with _manual_timestamps(UserBadge._meta.get_field('earned_at')):
+            UserBadge.objects.bulk_create(user_badges, batch_size=BATCH_SIZE)
+
+    return {
+        'users': len(users), 'quizzes': len(quizzes), 'questions': len(questions),
+        'options': len(options), 'answers': len(answers), 'badges': len(user_badges),
+    }
+
+
+def _seed_chunk_in_worker(*args):
+    # Spawned workers (macOS/Windows) start without Django configured
+    django.setup()
+    try:
+        return seed_chunk(*args)
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = 'Generate synthetic users, quizzes and answers for scale testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', choices=SIZES, default='small', help='Preset dataset size')
+        parser.add_argument('--users', type=int, default=None, help='Override the number of users')
+        parser.add_argument('--quizzes-per-user', type=int, default=None, help='Override the mean quizzes per user')
+        parser.add_argument('--chunk-size', type=int, default=200, help='Users generated and inserted per chunk')
+        parser.add_argument('--workers', type=int, default=1, help='Processes to insert chunks in (Postgres only)')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed, for reproducible datasets')
+
+    def handle(self, *args, **options):
+        size = SIZES[options['size']]
+        total_users = options['users'] or size['users']
+        quizzes_per_user = options['quizzes_per_user'] or size['quizzes_per_user']
+        chunk_size = max(options['chunk_size'], 1)
+        workers = max(options['workers'], 1)
+        if workers > 1 and connection.vendor == 'sqlite':
+            raise CommandError("SQLite allows one writer at a time; run with --workers 1 or use Postgres.")
+
+        for badge_data in BADGE_DEFINITIONS:
+            Badge.objects.get_or_create(name=badge_data['name'], defaults=badge_data)
+
+        start = User.objects.filter(username__startswith='scale').count()
+        # One hash for every user; hashing per user would dominate the run time
+        password_hash = make_password(PASSWORD)
+        chunks = [
+            (offset, min(chunk_size, start + total_users - offset), quizzes_per_user, options['seed'], password_hash)
+            for offset in range(start, start + total_users, chunk_size)
+        ]
+        self.stdout.write(
+            f"🌱 Seeding {total_users} users (~{quizzes_per_user} quizzes each) "
+            f"in {len(chunks)} chunks with {workers} worker(s)..."
+        )
+
+        totals = {}
+        started = timezone.now()
+        if workers == 1:
+            results = (seed_chunk(*chunk) for chunk in chunks)
+        else:
+            # Forked workers must not share the parent's connection
+            connections.close_all()
+            pool = ProcessPoolExecutor(max_workers=workers)
+            results = pool.map(_seed_chunk_in_worker, *zip(*chunks))
+
+        for done, counts in enumerate(results, start=1):
+            for table, rows in counts.items():
+                totals[table] = totals.get(table, 0) + rows
+            self.stdout.write(f"  chunk {done}/{len(chunks)}: {totals['answers']} answers so far")
+        if workers > 1:
+            pool.shutdown()
+
+        elapsed = (timezone.now() - started).total_seconds()
+        summary = ', '.join(f"{rows} {table}" for table, rows in totals.items())
+        self.stdout.write(self.style.SUCCESS(f"✅ Created {summary} in {elapsed:.0f}s. Password: {PASSWORD}"))
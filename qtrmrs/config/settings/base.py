@@ -117,6 +117,174 @@ RATELIMIT_VIEW = 'apps.core.views.ratelimited_view'
 DEFAULT_AI_MODEL = os.getenv('DEFAULT_AI_MODEL', 'gemini-flash-latest')
 QUIZ_RATE_LIMIT = os.getenv('QUIZ_RATE_LIMIT', '10/m')
 
+# --- AI BACKEND ---
+# 'gemini' calls the real API; 'fake' answers offline with deterministic,
+# schema-valid output (see apps/ai_agent/fake_backend.py) so the whole
+# request path can be load tested without network or quota. A dotted path
+# to a callable(model_name) plugs in any other backend.
+AI_BACKEND = os.getenv('AI_BACKEND', 'gemini')
+AI_FAKE_LATENCY = float(os.getenv('AI_FAKE_LATENCY', 0.8))  # median seconds to first token
+AI_FAKE_LATENCY_SIGMA = float(os.getenv('AI_FAKE_LATENCY_SIGMA', 0.5))
+AI_FAKE_TOKENS_PER_SECOND = float(os.getenv('AI_FAKE_TOKENS_PER_SECOND', 200))
+AI_FAKE_TOKENS_PER_QUESTION = int(os.getenv('AI_FAKE_TOKENS_PER_QUESTION', 150))
+AI_FAKE_ERROR_RATE = float(os.getenv('AI_FAKE_ERROR_RATE', 0.0))
+AI_FAKE_ERROR_TYPES = os.getenv('AI_FAKE_ERROR_TYPES', 'quota,model_not_found,timeout').split(',')
+AI_FAKE_SEED = None
+
+# --- AI GENERATION CACHE ---
+# Identical quiz requests are served from cache instead of calling Gemini.
+# Tier 1 is a per-process LRU, tier 2 is the shared 'ai_generation' cache
+# below (run `manage.py createcachetable` once to create its table).
+AI_CACHE_ENABLED = os.getenv('AI_CACHE_ENABLED', 'True') == 'True'
+AI_CACHE_TTL = int(os.getenv('AI_CACHE_TTL', 60 * 60 * 24))  # Seconds
+AI_CACHE_LRU_SIZE = int(os.getenv('AI_CACHE_LRU_SIZE', 256))
+AI_CACHE_ALIAS = 'ai_generation'
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    AI_CACHE_ALIAS: {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'ai_generation_cache',
+        'TIMEOUT': AI_CACHE_TTL,
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('AI_CACHE_MAX_ENTRIES', 5000)),
+        },
+    },
+}
+
+# --- STREAMING GENERATION ---
+# Open the player as soon as the first question is streamed in; the rest
+# are saved by a background thread while the user answers. The async views
+# stream too, waiting for the first question in a worker thread.
+AI_STREAMING_ENABLED = os.getenv('AI_STREAMING_ENABLED', 'False') == 'True'
+
+# --- EXPLANATIONS ---
+# "Explain All Mistakes" runs this many Gemini calls in parallel, each
+# capped at AI_EXPLANATION_TIMEOUT seconds.
+AI_EXPLANATION_CONCURRENCY = int(os.getenv('AI_EXPLANATION_CONCURRENCY', 4))
+AI_EXPLANATION_TIMEOUT = int(os.getenv('AI_EXPLANATION_TIMEOUT', 20))
+# 'batch' explains every mistake in one structured call (falling back per
+# item for anything missing); 'parallel' makes one call per mistake.
+AI_EXPLANATION_MODE = os.getenv('AI_EXPLANATION_MODE', 'batch')
+
+# --- ASYNC VIEWS ---
+# When serving with uvicorn (config.asgi), route quiz creation, chat, Quick
+# Quiz and explain-all to their native async views so in-flight Gemini calls
+# wait on the event loop instead of holding a thread each.
+ASYNC_VIEWS_ENABLED = os.getenv('ASYNC_VIEWS_ENABLED', 'False') == 'True'
+
+# --- CHAT AGENT ---
+# 'combined' parses the chat message and generates the quiz in one Gemini
+# call; 'two_step' parses intent first, then generates (two round trips).
+AI_CHAT_MODE = os.getenv('AI_CHAT_MODE', 'combined')
+# Chat messages the rule-based parser reads with at least this confidence
+# (0-1) skip the LLM intent step entirely. Set above 1 to always ask the LLM.
+AI_INTENT_CONFIDENCE_THRESHOLD = float(os.getenv('AI_INTENT_CONFIDENCE_THRESHOLD', 0.6))
+
+# --- MODEL FALLBACK ---
+# A model that fails AI_BREAKER_FAILURE_THRESHOLD times in a row (quota,
+# timeout, not found) is skipped for AI_BREAKER_COOLDOWN seconds, and
+# requests are retried on the next active AIModel by priority.
+AI_FALLBACK_ENABLED = os.getenv('AI_FALLBACK_ENABLED', 'True') == 'True'
+AI_BREAKER_FAILURE_THRESHOLD = int(os.getenv('AI_BREAKER_FAILURE_THRESHOLD', 3))
+AI_BREAKER_COOLDOWN = int(os.getenv('AI_BREAKER_COOLDOWN', 60))
+
+# --- MODEL REGISTRY ---
+# Workers cache the active AIModel names. Saving or deleting an AIModel
+# bumps a version stamp in the shared AI_CACHE_ALIAS cache; other workers
+# read it at most every AI_MODEL_REGISTRY_CHECK_INTERVAL seconds and reload
+# their models when it changed.
+AI_MODEL_REGISTRY_CHECK_INTERVAL = int(os.getenv('AI_MODEL_REGISTRY_CHECK_INTERVAL', 10))
+
+# --- REQUEST COALESCING ---
+# Identical concurrent generations share one Gemini call. With
+# AI_SINGLEFLIGHT_CROSS_PROCESS the leader also holds a lock in the shared
+# 'ai_generation' cache, so other gunicorn workers wait for its result too.
+AI_SINGLEFLIGHT_ENABLED = os.getenv('AI_SINGLEFLIGHT_ENABLED', 'True') == 'True'
+AI_SINGLEFLIGHT_CROSS_PROCESS = os.getenv('AI_SINGLEFLIGHT_CROSS_PROCESS', 'False') == 'True'
+AI_SINGLEFLIGHT_TIMEOUT = 90  # seconds a follower waits before generating on its own
+
+# --- MODEL ROUTING ---
+# Picks the model when the user leaves the selector on "Auto":
+# 'fastest', 'cheapest', 'round_robin', 'default' or a dotted path to a
+# policy callable. Models above AI_ROUTER_MAX_ERROR_RATE are avoided.
+# AI_ROUTER_OVERRIDE pins a model name (handy for tests and incidents).
+# With 'fastest', AIModel.is_default only breaks ties: models within
+# AI_ROUTER_LATENCY_TOLERANCE (20%) of the fastest count as tied, models
+# without a latency reading are tried first, and AI_ROUTER_EXPLORE_RATE of
+# requests go to a random model to refresh its reading.
+AI_ROUTER_POLICY = os.getenv('AI_ROUTER_POLICY', 'fastest')
+AI_ROUTER_MAX_ERROR_RATE = 0.5
+AI_ROUTER_LATENCY_TOLERANCE = 0.2
+AI_ROUTER_EXPLORE_RATE = float(os.getenv('AI_ROUTER_EXPLORE_RATE', 0.05))
+AI_ROUTER_OVERRIDE = os.getenv('AI_ROUTER_OVERRIDE', '')
+
+# --- AI TELEMETRY ---
+# Every Gemini call is logged to AICallLog (batched, written off the request
+# path). Only the newest AI_TELEMETRY_MAX_ROWS rows are kept.
+AI_TELEMETRY_ENABLED = os.getenv('AI_TELEMETRY_ENABLED', 'True') == 'True'
+AI_TELEMETRY_MAX_ROWS = int(os.getenv('AI_TELEMETRY_MAX_ROWS', 10000))
+AI_TELEMETRY_FLUSH_SIZE = 20
+AI_TELEMETRY_FLUSH_INTERVAL = 30  # seconds
+
+# --- GENERATION JOBS ---
+# Queue quiz creation (setup form and chat) instead of generating inside the
+# request; `manage.py run_generation_worker` processes the queue with
+# AI_JOB_WORKER_THREADS threads per process. Workers send a heartbeat for
+# their running jobs every AI_JOB_HEARTBEAT_INTERVAL seconds; jobs without
+# one for AI_JOB_STALE_AFTER seconds (their worker died) are retried, up to
+# AI_JOB_MAX_ATTEMPTS times.
+AI_JOB_QUEUE_ENABLED = os.getenv('AI_JOB_QUEUE_ENABLED', 'False') == 'True'
+AI_JOB_WORKER_THREADS = int(os.getenv('AI_JOB_WORKER_THREADS', 4))
+AI_JOB_HEARTBEAT_INTERVAL = 30  # seconds
+AI_JOB_STALE_AFTER = 300  # seconds
+AI_JOB_MAX_ATTEMPTS = 3
+
+# --- QUIZ OUTPUT FORMAT ---
+# 'compact' (short keys, answer index, enforced with response_schema) or
+# 'verbose' (the original full-key JSON). Calls are logged with the format
+# version so the two can be compared in AICallLog / ai_metrics.
+AI_QUIZ_OUTPUT_FORMAT = os.getenv('AI_QUIZ_OUTPUT_FORMAT', 'compact')
+
+# --- CHUNKED GENERATION ---
+# Quizzes of AI_CHUNK_MIN_QUESTIONS or more are generated as up to
+# AI_CHUNK_MAX_PARALLEL concurrent calls of ~AI_CHUNK_SIZE questions, each
+# with its own focus area. Near-duplicate questions (word overlap at or
+# above AI_CHUNK_DEDUPE_THRESHOLD) are dropped and the quiz topped up.
+AI_CHUNKED_GENERATION_ENABLED = os.getenv('AI_CHUNKED_GENERATION_ENABLED', 'True') == 'True'
+AI_CHUNK_MIN_QUESTIONS = int(os.getenv('AI_CHUNK_MIN_QUESTIONS', 10))
+AI_CHUNK_SIZE = int(os.getenv('AI_CHUNK_SIZE', 5))
+AI_CHUNK_MAX_PARALLEL = int(os.getenv('AI_CHUNK_MAX_PARALLEL', 4))
+AI_CHUNK_DEDUPE_THRESHOLD = 0.9
+AI_CHUNK_TOP_UP_ROUNDS = 1
+
+# --- EXAM PAYLOAD MODE ---
+# Send the whole quiz (without answers) to the player in one response and
+# take every answer back in a single POST, instead of one round trip per
+# question. Streamed quizzes still use the per-question player.
+QUIZ_EXAM_MODE_ENABLED = os.getenv('QUIZ_EXAM_MODE_ENABLED', 'False') == 'True'
+
+# --- ANSWER WRITE-BEHIND BUFFER ---
+# Hold per-question answers in QUIZ_ANSWER_BUFFER_CACHE (shared by every
+# web process, e.g. Redis or Memcached) and write them in one bulk insert
+# when the quiz completes, on logout, or when `manage.py flush_answer_buffers`
+# finds them idle for QUIZ_ANSWER_BUFFER_IDLE seconds. Answers the cache
+# loses are asked again, never half-saved. The 'default' cache is locmem,
+# which is per process: enabling the buffer without pointing it at a shared
+# cache raises ImproperlyConfigured unless DEBUG (or
+# QUIZ_ANSWER_BUFFER_ALLOW_LOCMEM, for a single-process server) is on.
+QUIZ_ANSWER_BUFFER_ENABLED = os.getenv('QUIZ_ANSWER_BUFFER_ENABLED', 'False') == 'True'
+QUIZ_ANSWER_BUFFER_CACHE = os.getenv('QUIZ_ANSWER_BUFFER_CACHE', 'default')
+QUIZ_ANSWER_BUFFER_ALLOW_LOCMEM = os.getenv('QUIZ_ANSWER_BUFFER_ALLOW_LOCMEM', 'False') == 'True'
+QUIZ_ANSWER_BUFFER_TTL = 86400  # seconds
+QUIZ_ANSWER_BUFFER_IDLE = 900  # seconds
+
+# --- QUICK QUIZ POOL ---
+# Ready-made quizzes kept per demo topic by `manage.py refill_quiz_pool`
+QUICK_QUIZ_POOL_SIZE = int(os.getenv('QUICK_QUIZ_POOL_SIZE', 5))
+
 # --- LOGGING ---
 LOGGING = {
     'version': 1,
@@ -7,6 +7,24 @@ from django.contrib.auth import get_user_model
 User = get_user_model()
 
 
+@pytest.fixture(autouse=True)
+def telemetry_buffer():
+    """Start every test with an empty AI telemetry buffer."""
+    from apps.ai_agent import telemetry
+    telemetry.reset()
+    yield
+    telemetry.reset()
+
+
+@pytest.fixture(autouse=True)
+def model_registry():
+    """Rolled-back AIModel rows must not linger in the cached fallback chain."""
+    from apps.ai_agent import client
+    client.invalidate_models()
+    yield
+    client.invalidate_models()
+
+
 @pytest.fixture
 def user(db):
     """Create a test user."""
@@ -58,7 +76,8 @@ def quiz(db, user, ai_model):
     q1 = Question.objects.create(
         quiz=quiz,
         text='What keyword is used to define a variable in Python?',
-        explanation='In Python, variables are created by assignment.'
+        explanation='In Python, variables are created by assignment.',
+        position=0
     )
     Option.objects.create(question=q1, text='var', is_correct=False)
     Option.objects.create(question=q1, text='let', is_correct=False)
@@ -68,7 +87,8 @@ def quiz(db, user, ai_model):
     q2 = Question.objects.create(
         quiz=quiz,
         text='What is the output of print(type(5))?',
-        explanation="The type() function returns the class type of an object."
+        explanation="The type() function returns the class type of an object.",
+        position=1
     )
     Option.objects.create(question=q2, text='int', is_correct=False)
     Option.objects.create(question=q2, text="<class 'int'>", is_correct=True)
@@ -76,3 +96,34 @@ def quiz(db, user, ai_model):
     Option.objects.create(question=q2, text='number', is_correct=False)
     
     return quiz
+
+
+@pytest.fixture
+def mock_gemini(db):
+    """
+    Patch the Gemini SDK so QuizGenerator never touches the network.
+    Set `mock_gemini.generate_content.return_value.text` to control responses.
+    """
+    import json
+    from unittest.mock import MagicMock, patch
+    from apps.ai_agent import breaker, metrics
+    from apps.ai_agent.cache import get_generation_cache
+
+    get_generation_cache().clear()
+    metrics.reset()
+    breaker.reset()
+
+    model = MagicMock()
+    model.generate_content.return_value.text = json.dumps({
+        'questions': [{
+            'text': 'What does len([1, 2]) return?',
+            'code_snippet': '',
+            'options': ['1', '2', '3', 'Error'],
+            'correct_answer': '2',
+            'explanation': 'len() counts the items in the list.'
+        }]
+    })
+    with patch('apps.ai_agent.services.get_generative_model', return_value=model):
+        yield model
+
+    get_generation_cache().clear()